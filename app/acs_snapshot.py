@@ -0,0 +1,152 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.config import ACS_SNAPSHOT_PATH
+
+VINTAGE = "2022"
+ZCTA_SLOTS = 100_000
+MISSING = -(2**31)
+COLUMNS = (
+    "population",
+    "median_home_value",
+    "owner_occupied_units",
+    "renter_occupied_units",
+)
+DTYPE = [("present", "u1")] + [(col, "<i4") for col in COLUMNS]
+
+_lock = threading.Lock()
+_snapshot: tuple[int, Any, dict] | None = None
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def load_snapshot(path: Path = ACS_SNAPSHOT_PATH) -> tuple[Any, dict] | None:
+    global _snapshot
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    current = _snapshot
+    if current is not None and current[0] == mtime:
+        return current[1], current[2]
+    with _lock:
+        if _snapshot is not None and _snapshot[0] == mtime:
+            return _snapshot[1], _snapshot[2]
+        try:
+            table = np.load(path, mmap_mode="r")
+            meta = json.loads(_meta_path(path).read_text()) if _meta_path(path).exists() else {}
+        except (OSError, ValueError):
+            return None
+        _snapshot = (mtime, table, meta)
+        return table, meta
+
+
+def get(zcta: str) -> tuple[bool, dict | None]:
+    loaded = load_snapshot()
+    if loaded is None or not zcta.isdigit() or len(zcta) != 5:
+        return False, None
+    table, _meta = loaded
+    row = table[int(zcta)]
+    if not row["present"]:
+        return True, None
+    out: dict[str, Any] = {"zcta": zcta, "name": f"ZCTA5 {zcta}"}
+    for col in COLUMNS:
+        value = int(row[col])
+        out[col] = None if value == MISSING else value
+    return True, out
+
+
+def data_vintage() -> str:
+    loaded = load_snapshot()
+    if loaded is None:
+        return f"acs5-{VINTAGE}-live"
+    meta = loaded[1]
+    return f"acs5-{meta.get('vintage', VINTAGE)}-snapshot-{meta.get('built_at', 0)}"
+
+
+def _rows_from_file(path: Path) -> dict[str, dict]:
+    from app.census import _parse_acs_row
+
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text())
+        headers, rows = data[0], data[1:]
+    else:
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            headers = next(reader)
+            rows = list(reader)
+    geo_col = headers.index("zip code tabulation area")
+    return {row[geo_col]: _parse_acs_row(row[geo_col], headers, row) for row in rows}
+
+
+def table_from_rows(rows: dict[str, dict]) -> Any:
+    table = np.zeros(ZCTA_SLOTS, dtype=DTYPE)
+    for col in COLUMNS:
+        table[col] = MISSING
+    for zcta, row in rows.items():
+        if not zcta.isdigit() or len(zcta) != 5:
+            continue
+        slot = table[int(zcta)]
+        slot["present"] = 1
+        for col in COLUMNS:
+            value = row.get(col)
+            if value is not None:
+                slot[col] = value
+    return table
+
+
+def build_snapshot(
+    source: Path | None = None,
+    path: Path = ACS_SNAPSHOT_PATH,
+) -> int:
+    if source is not None:
+        rows = _rows_from_file(source)
+    else:
+        from app.census import _fetch_acs5_table
+
+        rows = _fetch_acs5_table("*")
+    if not rows:
+        raise RuntimeError("No ZCTA rows to write")
+
+    table = table_from_rows(rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, table)
+    meta = {
+        "vintage": VINTAGE,
+        "source": str(source) if source else "api.census.gov",
+        "built_at": int(time.time()),
+        "zctas": int(table["present"].sum()),
+    }
+    meta_tmp = _meta_path(path).with_name(_meta_path(path).name + ".tmp")
+    meta_tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(meta_tmp, _meta_path(path))
+    os.replace(tmp, path)
+    return meta["zctas"]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the offline ACS 5-year ZCTA snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Download or import the national ZCTA table")
+    build.add_argument("--from-file", type=Path, help="Census API JSON or CSV export to import instead of downloading")
+    build.add_argument("--out", type=Path, default=ACS_SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        count = build_snapshot(source=args.from_file, path=args.out)
+        print(f"Wrote {count} ZCTAs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import json
+import re
+import threading
+import unicodedata
+from pathlib import Path
+
+from app.config import PLACES_PATH
+
+_UNIT_RE = re.compile(
+    r"(?:#\s*|\b(?:apt|apartment|unit|suite|ste|rm|room|fl|floor|bldg|building|spc|space|lot)\b\.?\s*#?\s*)"
+    r"((?:[a-z]?\d+[a-z]?|[a-z])(?:-[a-z0-9]+)?)(?![\w-])",
+)
+_HOUSE_NUMBER_RE = re.compile(r"\s*\d+[a-z]?\s*")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "road": "rd",
+    "boulevard": "blvd",
+    "drive": "dr",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "terrace": "ter",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "california": "ca",
+}
+
+
+def _split_units(t: str) -> tuple[str, list[str]]:
+    units: list[str] = []
+
+    def repl(m: re.Match) -> str:
+        if not m.group(0).startswith("#") and _HOUSE_NUMBER_RE.fullmatch(t[: m.start()]):
+            return m.group(0)
+        units.append(m.group(1))
+        return " "
+
+    return _UNIT_RE.sub(repl, t), units
+
+
+def _canonical(t: str) -> str:
+    t = _PUNCT_RE.sub(" ", t)
+    words = [_ABBREVIATIONS.get(w, w) for w in _SPACE_RE.split(t) if w]
+    return " ".join(words)
+
+
+def normalize_address(text: str | None) -> str:
+    return _canonical(_split_units((text or "").lower())[0])
+
+
+def address_key(text: str | None) -> str:
+    t, units = _split_units((text or "").lower())
+    return _canonical(" ".join([t, *(f"unit {u}" for u in units)]))
+
+
+_ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+_STATE_RE = re.compile(r"^[A-Za-z]{2}$")
+_PLACE_SUFFIX_RE = re.compile(r"\s+(?:city|town|cdp|village)$", re.IGNORECASE)
+
+_STREET_SUFFIXES = frozenset(
+    ["st", "ave", "rd", "blvd", "dr", "ln", "ct", "pl", "pkwy", "hwy", "cir", "ter", "way", "trl", "loop"]
+)
+_NOT_A_PLACE_AFTER = _STREET_SUFFIXES | {"county"}
+_LEADING_NUMBER_RE = re.compile(r"\s*\d")
+_DEFAULT_PLACES = {
+    "irvine": "92618",
+    "costa mesa": "92626",
+    "santa ana": "92701",
+    "anaheim": "92801",
+    "newport beach": "92660",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    t = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return [_ABBREVIATIONS.get(w, w) for w in _SPACE_RE.split(_PUNCT_RE.sub(" ", t)) if w]
+
+
+class PlaceIndex:
+    def __init__(self, places: dict[str, str]) -> None:
+        self._root: dict = {}
+        self.size = 0
+        for name, zip_code in places.items():
+            self.add(name, zip_code)
+
+    def add(self, name: str, zip_code: str) -> None:
+        node = self._root
+        for token in _tokens(name):
+            node = node.setdefault(token, {})
+        if None not in node:
+            self.size += 1
+        node[None] = zip_code
+
+    def match(self, text: str) -> str | None:
+        tokens = _tokens(text)
+        best = None
+        for start in range(len(tokens)):
+            if tokens[max(0, start - 2) : start] == ["county", "of"]:
+                continue
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node and (end + 1 == len(tokens) or tokens[end + 1] not in _NOT_A_PLACE_AFTER):
+                    if best is None or end > best[0]:
+                        best = (end, node[None])
+        return best[1] if best else None
+
+
+_places: PlaceIndex | None = None
+_places_lock = threading.Lock()
+
+
+def load_places(path: Path = PLACES_PATH) -> PlaceIndex:
+    global _places
+    try:
+        places = json.loads(path.read_text())
+    except (OSError, ValueError):
+        places = _DEFAULT_PLACES
+    index = PlaceIndex(places)
+    _places = index
+    return index
+
+
+def _place_index() -> PlaceIndex:
+    if _places is not None:
+        return _places
+    with _places_lock:
+        return _places or load_places()
+
+
+def parse_zip(text: str | None) -> str | None:
+    match = _ZIP_RE.search(text or "")
+    return match.group(1) if match else None
+
+
+def extract_zip(text: str | None) -> str | None:
+    if not text or not text.strip():
+        return None
+    zip_code = parse_zip(text)
+    if zip_code or _LEADING_NUMBER_RE.match(text):
+        return zip_code
+    return _place_index().match(text)
+
+
+def split_address(text: str | None) -> tuple[str, str, str, str]:
+    t = (text or "").strip()
+    match = _ZIP_RE.search(t)
+    zip_code = match.group(1) if match else ""
+    if match:
+        t = (t[: match.start()] + t[match.end() :]).strip()
+    parts = [p.strip() for p in t.split(",") if p.strip()]
+    state = ""
+    if parts and _STATE_RE.match(parts[-1].split()[-1]) and (len(parts) > 1 or len(parts[-1].split()) == 1):
+        tokens = parts[-1].split()
+        state = tokens[-1].upper()
+        rest = " ".join(tokens[:-1])
+        parts = parts[:-1] + ([rest] if rest else [])
+    city = parts.pop() if len(parts) > 1 else ""
+    street = ", ".join(parts)
+    return street, city, state, zip_code
+
+
+def _places_from_file(path: Path, state_fips: str | None) -> dict[str, str]:
+    with open(path, newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter="|" if "|" in sample.splitlines()[0] else ",")
+        fields = {name.lower(): name for name in reader.fieldnames or []}
+        if "geoid_zcta5_20" in fields:
+            best: dict[str, tuple[int, str]] = {}
+            for row in reader:
+                geoid = row[fields["geoid_place_20"]]
+                if not geoid or (state_fips and not geoid.startswith(state_fips)):
+                    continue
+                name = _PLACE_SUFFIX_RE.sub("", row[fields["namelsad_place_20"]]).lower()
+                area = int(row[fields["arealand_part"]] or 0)
+                if name not in best or area > best[name][0]:
+                    best[name] = (area, row[fields["geoid_zcta5_20"]])
+            return {name: zcta for name, (_area, zcta) in best.items()}
+        return {
+            _PLACE_SUFFIX_RE.sub("", row[fields["place"]]).lower(): row[fields["zip"]]
+            for row in reader
+            if row[fields["place"]] and row[fields["zip"]]
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the place-name to ZIP gazetteer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import-places", help="Import a place,zip CSV or the Census ZCTA-to-place relationship file")
+    imp.add_argument("source", type=Path)
+    imp.add_argument("--state-fips", default="06", help="Keep only places in this state (Census relationship file only)")
+    imp.add_argument("--out", type=Path, default=PLACES_PATH)
+    imp.add_argument("--replace", action="store_true", help="Replace the existing gazetteer instead of merging")
+    args = parser.parse_args(argv)
+    if args.command == "import-places":
+        places = {} if args.replace or not args.out.exists() else json.loads(args.out.read_text())
+        added = _places_from_file(args.source, args.state_fips)
+        places.update(added)
+        args.out.write_text(json.dumps(dict(sorted(places.items())), indent=2) + "\n")
+        print(f"Imported {len(added)} places; {len(places)} in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,30 @@
 import json
 import re
+import threading
+import time
+from html import escape
 
 import httpx
 
-from app.config import DATA_DIR, RESEND_API_KEY
+from app import job_queue
+from app.config import (
+    ALERT_DELIVERY,
+    ALERT_OUTBOX_PATH,
+    ALERT_SCORE_THRESHOLD,
+    BREAKER_LIMIT_COOLDOWN,
+    FREETXT_API_BASE,
+    RESEND_API_KEY,
+)
+from app.http_clients import get_client
+from app.job_queue import PermanentJobError, RetryLater
+from app.resilience import ProviderUnavailable, guard, throttle
+from app.subscriber_store import save_subscriber, subscribers_for_zip
 
-SUBSCRIBERS_PATH = DATA_DIR / "alert_subscribers.json"
-FREETXT_API = "https://freetxtapi.com"
-SMS_TIMEOUT = 30.0
+FREETXT_API = FREETXT_API_BASE
+
+SMS_LIMIT_MESSAGE = "SMS rate limit reached (FreeTxtAPI)"
+
+_outbox_lock = threading.Lock()
 
 
 def _normalize_phone(raw: str) -> str | None:
@@ -19,39 +36,39 @@ def _normalize_phone(raw: str) -> str | None:
     return None
 
 
+def _sms_result(r: httpx.Response) -> tuple[bool, str]:
+    try:
+        data = r.json() if r.content else {}
+    except Exception:
+        data = {}
+    status = (data.get("status") or "").upper()
+    if status == "DELIVERED":
+        return True, "SMS sent"
+    if status == "WAITING OPT-IN":
+        return False, "Recipient must opt in first (FreeTxtAPI)"
+    if status == "LIMIT REACHED":
+        return False, SMS_LIMIT_MESSAGE
+    return False, data.get("status") or (r.text or f"HTTP {r.status_code}") or "SMS failed"
+
+
 def _send_sms_freetxt(phone_10: str, body: str) -> tuple[bool, str]:
-    last_err = ""
-    for attempt in range(2):
-        try:
-            with httpx.Client(timeout=SMS_TIMEOUT) as client:
-                r = client.post(
-                    FREETXT_API,
-                    data={"phone": phone_10, "message": body},
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                )
-                try:
-                    data = r.json() if r.content else {}
-                except Exception:
-                    data = {}
-                status = (data.get("status") or "").upper()
-                if status == "DELIVERED":
-                    return True, "SMS sent"
-                if status == "WAITING OPT-IN":
-                    return False, "Recipient must opt in first (FreeTxtAPI)"
-                if status == "LIMIT REACHED":
-                    return False, "SMS rate limit reached (FreeTxtAPI)"
-                last_err = data.get("status") or (r.text or f"HTTP {r.status_code}")
-                break
-        except (httpx.TimeoutException, httpx.ConnectError) as e:
-            last_err = str(e)
-            if attempt == 0:
-                import time
-                time.sleep(1)
-            else:
-                return False, last_err
-        except Exception as e:
-            return False, str(e)
-    return False, last_err or "SMS failed"
+    try:
+        with guard("freetxt") as provider:
+            r = get_client("freetxt").post(
+                FREETXT_API,
+                data={"phone": phone_10, "message": body},
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+            if r.status_code >= 500:
+                r.raise_for_status()
+            ok, message = _sms_result(r)
+            if r.status_code == 429 or message == SMS_LIMIT_MESSAGE:
+                throttle(provider.name)
+        return ok, message
+    except ProviderUnavailable:
+        raise
+    except Exception as e:
+        return False, str(e) or type(e).__name__
 
 
 def _send_email(to: str, subject: str, html: str) -> tuple[bool, str]:
@@ -60,38 +77,96 @@ def _send_email(to: str, subject: str, html: str) -> tuple[bool, str]:
     try:
         import resend
         resend.api_key = RESEND_API_KEY
-        resend.Emails.send({
-            "from": "First-Mover Alert <onboarding@resend.dev>",
-            "to": [to],
-            "subject": subject,
-            "html": html,
-        })
+        with guard("resend"):
+            resend.Emails.send({
+                "from": "First-Mover Alert <onboarding@resend.dev>",
+                "to": [to],
+                "subject": subject,
+                "html": html,
+            })
         return True, "Email sent"
+    except ProviderUnavailable:
+        raise
     except Exception as e:
         return False, str(e)
 
 
-def _save_subscriber(
+def _record_fake_delivery(channel: str, to: str, payload: dict) -> tuple[bool, str]:
+    ALERT_OUTBOX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with _outbox_lock, open(ALERT_OUTBOX_PATH, "a") as f:
+        f.write(json.dumps({"channel": channel, "to": to, "sent_at": time.time(), **payload}) + "\n")
+    return True, f"{channel} recorded in fake outbox"
+
+
+def deliver_sms(payload: dict) -> None:
+    if ALERT_DELIVERY == "fake":
+        _record_fake_delivery("sms", payload["phone"], payload)
+        return
+    try:
+        ok, message = _send_sms_freetxt(payload["phone"], payload["body"])
+    except ProviderUnavailable as e:
+        raise RetryLater(str(e), e.retry_in) from e
+    if ok:
+        return
+    if message == SMS_LIMIT_MESSAGE:
+        raise RetryLater(message, BREAKER_LIMIT_COOLDOWN)
+    if "opt in" in message:
+        raise PermanentJobError(message)
+    raise RuntimeError(message)
+
+
+def deliver_email(payload: dict) -> None:
+    if ALERT_DELIVERY == "fake":
+        _record_fake_delivery("email", payload["to"], payload)
+        return
+    if not RESEND_API_KEY:
+        raise PermanentJobError("Resend not configured")
+    try:
+        ok, message = _send_email(payload["to"], payload["subject"], payload["html"])
+    except ProviderUnavailable as e:
+        raise RetryLater(str(e), e.retry_in) from e
+    if not ok:
+        raise RuntimeError(message)
+
+
+JOB_HANDLERS = {
+    "sms": deliver_sms,
+    "email": deliver_email,
+}
+
+
+def _notification_jobs(
+    key: str,
     email: str | None,
     phone: str | None,
-    zip_code: str | None,
-) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    entries = []
-    if SUBSCRIBERS_PATH.exists():
-        try:
-            with open(SUBSCRIBERS_PATH) as f:
-                data = json.load(f)
-            entries = data.get("subscribers", [])
-        except Exception:
-            pass
-    entries.append({
-        "email": (email or "").strip() or None,
-        "phone": phone,
-        "zip_code": (zip_code or "").strip() or None,
-    })
-    with open(SUBSCRIBERS_PATH, "w") as f:
-        json.dump({"subscribers": entries}, f, indent=2)
+    sms_body: str,
+    subject: str,
+    html: str,
+) -> list[tuple[str, dict, str]]:
+    jobs = []
+    if phone:
+        jobs.append(("sms", {"phone": phone, "body": sms_body}, f"{key}:sms"))
+    if email:
+        jobs.append(("email", {"to": email, "subject": subject, "html": html}, f"{key}:email"))
+    return jobs
+
+
+def _confirmation(zip_code: str | None) -> tuple[str, str, str]:
+    zip_part = f" for ZIP {zip_code}" if zip_code else ""
+    msg_body = f"You're signed up for First-Mover Alert{zip_part}. We'll notify you when high corporate-risk listings match your area."
+    subject = "You're signed up for First-Mover Alert"
+    html = f"<p>You're signed up for First-Mover Alert{zip_part}.</p><p>We'll notify you when high corporate-risk listings match your area.</p>"
+    return msg_body, subject, html
+
+
+def _validate(email: str | None, phone: str | None) -> tuple[str, str | None, str | None]:
+    email_clean = (email or "").strip()
+    phone_10 = _normalize_phone(phone) if phone else None
+    if not email_clean and not phone_10:
+        return email_clean, phone_10, "Provide at least one of email or phone"
+    if phone and not phone_10:
+        return email_clean, phone_10, "Invalid phone number (use 10-digit US)"
+    return email_clean, phone_10, None
 
 
 def subscribe(
@@ -99,34 +174,55 @@ def subscribe(
     phone: str | None = None,
     zip_code: str | None = None,
 ) -> tuple[bool, str]:
-    email_clean = (email or "").strip()
-    phone_10 = _normalize_phone(phone) if phone else None
-    if not email_clean and not phone_10:
-        return False, "Provide at least one of email or phone"
-    if phone and not phone_10:
-        return False, "Invalid phone number (use 10-digit US)"
-    _save_subscriber(email_clean or None, phone_10, zip_code)
-    zip_part = f" for ZIP {zip_code}" if zip_code else ""
-    msg_body = f"You're signed up for First-Mover Alert{zip_part}. We'll notify you when high corporate-risk listings match your area."
-    sms_ok, sms_err = False, ""
-    if phone_10:
-        sms_ok, sms_err = _send_sms_freetxt(phone_10, msg_body)
-    email_ok, email_err = False, ""
-    if email_clean:
-        subject = "You're signed up for First-Mover Alert"
-        html = f"<p>You're signed up for First-Mover Alert{zip_part}.</p><p>We'll notify you when high corporate-risk listings match your area.</p>"
-        email_ok, email_err = _send_email(email_clean, subject, html)
-    if sms_ok or email_ok:
-        parts = []
-        if sms_ok:
-            parts.append("SMS")
-        if email_ok:
-            parts.append("email")
-        return True, f"Subscription confirmed via {' + '.join(parts)}."
-    if phone_10 and not sms_ok:
-        return True, "You're subscribed. Confirmation SMS didn't go through (free service may be slow); we'll still alert you when we have listings."
-    if email_clean and not email_ok:
-        if not RESEND_API_KEY:
-            return True, "You're subscribed. Add RESEND_API_KEY in .env for confirmation emails."
-        return False, f"Email: {email_err}"
-    return True, "Subscription saved."
+    email_clean, phone_10, error = _validate(email, phone)
+    if error:
+        return False, error
+    subscriber_id = save_subscriber(email_clean or None, phone_10, zip_code)
+    msg_body, subject, html = _confirmation(zip_code)
+    job_queue.enqueue_many(_notification_jobs(
+        f"confirm:{subscriber_id}:{(zip_code or '').strip()}",
+        email_clean or None,
+        phone_10,
+        msg_body,
+        subject,
+        html,
+    ))
+    if email_clean and not phone_10 and not RESEND_API_KEY and ALERT_DELIVERY != "fake":
+        return True, "You're subscribed. Add RESEND_API_KEY in .env for confirmation emails."
+    return True, "You're subscribed. Your confirmation is on its way."
+
+
+def _listing_alert(listing: dict, zip_code: str) -> tuple[str, str, str]:
+    risk = listing["risk"]
+    price = f" listed at ${listing['price']:,}" if listing.get("price") else ""
+    sms_body = (
+        f"First-Mover Alert: {listing['address']}{price} in ZIP {zip_code}. "
+        f"Corporate acquisition risk {risk['score']}/10 ({risk['label']})."
+    )
+    subject = f"New high-risk listing in {zip_code}: {listing['address']}"
+    html = (
+        f"<p><strong>{escape(listing['address'])}</strong>{escape(price)}</p>"
+        f"<p>Corporate acquisition risk {risk['score']}/10: {escape(risk['label'])}.</p>"
+        f"<p>{escape(risk.get('explanation') or '')}</p>"
+    )
+    return sms_body, subject, html
+
+
+def enqueue_listing_alerts(listings: list[dict]) -> int:
+    jobs = []
+    for listing in listings:
+        risk = listing.get("risk") or {}
+        zip_code = listing.get("zip_code") or risk.get("resolved_zip")
+        if not zip_code or (risk.get("score") or 0) < ALERT_SCORE_THRESHOLD:
+            continue
+        sms_body, subject, html = _listing_alert(listing, zip_code)
+        for sub in subscribers_for_zip(zip_code):
+            jobs.extend(_notification_jobs(
+                f"listing:{listing['id']}:{sub['id']}",
+                sub.get("email"),
+                sub.get("phone"),
+                sms_body,
+                subject,
+                html,
+            ))
+    return job_queue.enqueue_many(jobs)
@@ -0,0 +1,171 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app import db
+from app.config import CACHE_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+class TieredCache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        negative_ttl: float,
+        max_entries: int = 1024,
+        path: Path = CACHE_DB_PATH,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        return db.connect(self.path, _SCHEMA)
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return True, entry[1]
+                del self._memory[key]
+        try:
+            row = self._conn().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, now),
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return False, None
+        value = json.loads(row["value"])
+        self._remember(key, row["expires_at"], value)
+        with self._lock:
+            self.disk_hits += 1
+        return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), expires_at),
+            )
+        except sqlite3.Error:
+            pass
+
+    def set_many(self, items: dict[str, Any]) -> None:
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            ttl = self.ttl if value is not None else self.negative_ttl
+            if ttl <= 0:
+                continue
+            self._remember(key, now + ttl, value)
+            rows.append((self.namespace, key, json.dumps(value), now + ttl))
+        if not rows:
+            return
+        try:
+            with db.transaction(self._conn()) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        try:
+            self._conn().execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+
+class BytesLRU:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._items: OrderedDict[Any, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> bytes | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _key, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._items), "bytes": self.size}
@@ -1,83 +1,194 @@
-import httpx
+import asyncio
+import csv
+import io
 import re
 
-CENSUS_BASE = "https://api.census.gov/data/2022/acs/acs5"
-TIMEOUT = 15.0
+import httpx
+
+from app import acs_snapshot
+from app.address import normalize_address, parse_zip, split_address
+from app.cache import TieredCache
+from app.config import (
+    ACS_CACHE_MAX_ENTRIES,
+    ACS_CACHE_NEGATIVE_TTL,
+    ACS_CACHE_TTL,
+    CENSUS_API_BASE,
+    CENSUS_GEOCODER_BASE,
+    GEOCODE_CACHE_MAX_ENTRIES,
+    GEOCODE_CACHE_NEGATIVE_TTL,
+    GEOCODE_CACHE_TTL,
+    NOMINATIM_BASE,
+)
+from app.http_clients import get_async_client, get_client
+from app.resilience import guard, guard_async
+from app.request_scope import request_memo
+
+CENSUS_BASE = CENSUS_API_BASE
 VARS = "NAME,B01003_001E,B25077_001E,B25003_002E,B25003_003E"
+ACS_BULK_CHUNK = 200
+_ZCTA_RE = re.compile(r"\d{5}")
 
+ACS_CACHE = TieredCache(
+    "acs5",
+    ttl=ACS_CACHE_TTL,
+    negative_ttl=ACS_CACHE_NEGATIVE_TTL,
+    max_entries=ACS_CACHE_MAX_ENTRIES,
+)
+GEOCODE_CACHE = TieredCache(
+    "geocode.v2",
+    ttl=GEOCODE_CACHE_TTL,
+    negative_ttl=GEOCODE_CACHE_NEGATIVE_TTL,
+    max_entries=GEOCODE_CACHE_MAX_ENTRIES,
+)
 
-def fetch_acs5_for_zcta(zcta: str) -> dict | None:
+
+def _parse_int(value) -> int | None:
     try:
-        with httpx.Client(timeout=TIMEOUT) as client:
-            r = client.get(
-                CENSUS_BASE,
-                params={
-                    "get": VARS,
-                    "for": f"zip code tabulation area:{zcta}",
-                },
-            )
-            r.raise_for_status()
-            data = r.json()
-    except Exception:
-        return None
-    if not data or len(data) < 2:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
         return None
-    headers = data[0]
-    row = data[1]
+
+
+def _parse_acs_row(zcta: str, headers: list[str], row: list) -> dict:
     out = dict(zip(headers, row))
-    name = out.get("NAME", "")
-    pop = out.get("B01003_001E")
-    med_val = out.get("B25077_001E")
-    owner = out.get("B25003_002E")
-    renter = out.get("B25003_003E")
-    try:
-        population = int(pop) if pop not in (None, "") else None
-    except (TypeError, ValueError):
-        population = None
-    try:
-        median_value = int(med_val) if med_val not in (None, "") else None
-    except (TypeError, ValueError):
-        median_value = None
-    try:
-        owner_occupied = int(owner) if owner not in (None, "") else None
-    except (TypeError, ValueError):
-        owner_occupied = None
-    try:
-        renter_occupied = int(renter) if renter not in (None, "") else None
-    except (TypeError, ValueError):
-        renter_occupied = None
     return {
         "zcta": zcta,
-        "name": name,
-        "population": population,
-        "median_home_value": median_value,
-        "owner_occupied_units": owner_occupied,
-        "renter_occupied_units": renter_occupied,
+        "name": out.get("NAME", ""),
+        "population": _parse_int(out.get("B01003_001E")),
+        "median_home_value": _parse_int(out.get("B25077_001E")),
+        "owner_occupied_units": _parse_int(out.get("B25003_002E")),
+        "renter_occupied_units": _parse_int(out.get("B25003_003E")),
     }
 
 
-def _parse_zip(text: str) -> str | None:
-    match = re.search(r"\b(\d{5})(?:-\d{4})?\b", text or "")
-    return match.group(1) if match else None
+def _acs_params(geography: str) -> dict[str, str]:
+    return {
+        "get": VARS,
+        "for": f"zip code tabulation area:{geography}",
+    }
 
 
-def _census_geocode(query: str) -> dict | None:
-    geocode_url = "https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
-    try:
-        with httpx.Client(timeout=TIMEOUT) as client:
-            response = client.get(
-                geocode_url,
-                params={
-                    "address": query.strip(),
-                    "benchmark": "Public_AR_Current",
-                    "format": "json",
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-    except Exception:
-        return None
+def _parse_acs_table(r: httpx.Response) -> dict[str, dict]:
+    if r.status_code == 204 or not r.content:
+        return {}
+    data = r.json()
+    if not data or len(data) < 2:
+        return {}
+    headers = data[0]
+    geo_col = headers.index("zip code tabulation area")
+    return {row[geo_col]: _parse_acs_row(row[geo_col], headers, row) for row in data[1:]}
+
+
+def _fetch_acs5_table(geography: str) -> dict[str, dict]:
+    with guard("census"):
+        r = get_client("census").get(CENSUS_BASE, params=_acs_params(geography))
+        r.raise_for_status()
+    return _parse_acs_table(r)
+
+
+async def _fetch_acs5_table_async(geography: str) -> dict[str, dict]:
+    async with guard_async("census"):
+        r = await get_async_client("census").get(CENSUS_BASE, params=_acs_params(geography))
+        r.raise_for_status()
+    return _parse_acs_table(r)
+
+
+def _national_table(table: dict[str, dict], zip_prefix: str | tuple[str, ...] | None) -> dict[str, dict]:
+    if zip_prefix:
+        table = {z: row for z, row in table.items() if z.startswith(zip_prefix)}
+    ACS_CACHE.set_many(table)
+    return table
+
+
+def _split_cached(zctas: list[str]) -> tuple[dict[str, dict | None], list[list[str]]]:
+    results: dict[str, dict | None] = {}
+    missing: list[str] = []
+    for zcta in dict.fromkeys(zctas):
+        if not _ZCTA_RE.fullmatch(zcta or ""):
+            results[zcta] = None
+            continue
+        found, cached = acs_snapshot.get(zcta)
+        if not found:
+            found, cached = ACS_CACHE.get(zcta)
+        if found:
+            results[zcta] = cached
+        else:
+            missing.append(zcta)
+    chunks = [missing[i : i + ACS_BULK_CHUNK] for i in range(0, len(missing), ACS_BULK_CHUNK)]
+    return results, chunks
+
+
+def _store_chunk(chunk: list[str], table: dict[str, dict]) -> dict[str, dict | None]:
+    fetched = {zcta: table.get(zcta) for zcta in chunk}
+    ACS_CACHE.set_many(fetched)
+    return fetched
+
+
+def fetch_acs5_bulk(
+    zctas: list[str] | None = None,
+    zip_prefix: str | tuple[str, ...] | None = None,
+) -> dict[str, dict | None]:
+    if zctas is None:
+        try:
+            return _national_table(_fetch_acs5_table("*"), zip_prefix)
+        except Exception:
+            return {}
+
+    results, chunks = _split_cached(zctas)
+    for chunk in chunks:
+        try:
+            results.update(_store_chunk(chunk, _fetch_acs5_table(",".join(chunk))))
+        except Exception:
+            results.update(dict.fromkeys(chunk))
+    return results
+
+
+async def fetch_acs5_bulk_async(
+    zctas: list[str] | None = None,
+    zip_prefix: str | tuple[str, ...] | None = None,
+) -> dict[str, dict | None]:
+    if zctas is None:
+        try:
+            return _national_table(await _fetch_acs5_table_async("*"), zip_prefix)
+        except Exception:
+            return {}
+
+    results, chunks = _split_cached(zctas)
+    tables = await asyncio.gather(
+        *(_fetch_acs5_table_async(",".join(chunk)) for chunk in chunks),
+        return_exceptions=True,
+    )
+    for chunk, table in zip(chunks, tables):
+        if isinstance(table, BaseException):
+            results.update(dict.fromkeys(chunk))
+        else:
+            results.update(_store_chunk(chunk, table))
+    return results
+
+
+def fetch_acs5_for_zcta(zcta: str) -> dict | None:
+    return fetch_acs5_bulk([zcta]).get(zcta)
+
+
+async def fetch_acs5_for_zcta_async(zcta: str) -> dict | None:
+    return (await fetch_acs5_bulk_async([zcta])).get(zcta)
+
+
+CENSUS_GEOCODE_URL = f"{CENSUS_GEOCODER_BASE}/locations/onelineaddress"
+CENSUS_BATCH_GEOCODE_URL = f"{CENSUS_GEOCODER_BASE}/locations/addressbatch"
+GEOCODE_BATCH_LIMIT = 10_000
+NOMINATIM_URL = f"{NOMINATIM_BASE}/search"
+
 
+def _census_geocode_params(query: str) -> dict[str, str]:
+    return {
+        "address": query.strip(),
+        "benchmark": "Public_AR_Current",
+        "format": "json",
+    }
+
+
+def _parse_census_geocode(query: str, data: dict) -> dict | None:
     matches = data.get("result", {}).get("addressMatches", [])
     if not matches:
         return None
@@ -93,7 +204,7 @@ def _census_geocode(query: str) -> dict | None:
     zip_code = address_components.get("zip")
     if not zip_code:
         matched_address = best.get("matchedAddress", "")
-        zip_code = _parse_zip(matched_address)
+        zip_code = parse_zip(matched_address)
 
     return {
         "query": query,
@@ -104,35 +215,23 @@ def _census_geocode(query: str) -> dict | None:
     }
 
 
-def _nominatim_geocode(query: str) -> dict | None:
-    try:
-        with httpx.Client(
-            timeout=TIMEOUT,
-            headers={
-                "User-Agent": "EquityGuardian/1.0 (local-demo)"
-            },
-        ) as client:
-            response = client.get(
-                "https://nominatim.openstreetmap.org/search",
-                params={
-                    "q": query.strip(),
-                    "format": "jsonv2",
-                    "addressdetails": 1,
-                    "limit": 1,
-                    "countrycodes": "us",
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-    except Exception:
-        return None
+def _nominatim_params(query: str) -> dict:
+    return {
+        "q": query.strip(),
+        "format": "jsonv2",
+        "addressdetails": 1,
+        "limit": 1,
+        "countrycodes": "us",
+    }
 
+
+def _parse_nominatim(query: str, data: list) -> dict | None:
     if not data:
         return None
 
     best = data[0]
     address = best.get("address", {})
-    zip_code = address.get("postcode") or _parse_zip(best.get("display_name", ""))
+    zip_code = address.get("postcode") or parse_zip(best.get("display_name", ""))
     if zip_code and "-" in zip_code:
         zip_code = zip_code.split("-", 1)[0]
 
@@ -150,8 +249,165 @@ def _nominatim_geocode(query: str) -> dict | None:
     }
 
 
+def _census_geocode(query: str) -> dict | None:
+    with guard("geocoder"):
+        response = get_client("geocoder").get(CENSUS_GEOCODE_URL, params=_census_geocode_params(query))
+        response.raise_for_status()
+    return _parse_census_geocode(query, response.json())
+
+
+async def _census_geocode_async(query: str) -> dict | None:
+    async with guard_async("geocoder"):
+        response = await get_async_client("geocoder").get(CENSUS_GEOCODE_URL, params=_census_geocode_params(query))
+        response.raise_for_status()
+    return _parse_census_geocode(query, response.json())
+
+
+def _nominatim_geocode(query: str) -> dict | None:
+    with guard("nominatim"):
+        response = get_client("nominatim").get(NOMINATIM_URL, params=_nominatim_params(query))
+        response.raise_for_status()
+    return _parse_nominatim(query, response.json())
+
+
+async def _nominatim_geocode_async(query: str) -> dict | None:
+    async with guard_async("nominatim"):
+        response = await get_async_client("nominatim").get(NOMINATIM_URL, params=_nominatim_params(query))
+        response.raise_for_status()
+    return _parse_nominatim(query, response.json())
+
+
+def _geocode_uncached(key: str, query: str) -> dict | None:
+    cacheable = True
+    for geocoder in (_census_geocode, _nominatim_geocode):
+        try:
+            result = geocoder(query)
+        except Exception:
+            cacheable = False
+            continue
+        if result:
+            GEOCODE_CACHE.set(key, result)
+            return result
+    if cacheable:
+        GEOCODE_CACHE.set(key, None)
+    return None
+
+
+async def _geocode_uncached_async(key: str, query: str) -> dict | None:
+    cacheable = True
+    for geocoder in (_census_geocode_async, _nominatim_geocode_async):
+        try:
+            result = await geocoder(query)
+        except Exception:
+            cacheable = False
+            continue
+        if result:
+            GEOCODE_CACHE.set(key, result)
+            return result
+    if cacheable:
+        GEOCODE_CACHE.set(key, None)
+    return None
+
+
+def _with_query(result: dict | None, query: str) -> dict | None:
+    return {**result, "query": query} if result else None
+
+
 def geocode_location(query: str) -> dict | None:
     if not query or not query.strip():
         return None
 
-    return _census_geocode(query) or _nominatim_geocode(query)
+    key = normalize_address(query)
+    memo = request_memo("geocode")
+    if memo is not None and key in memo and not isinstance(memo[key], asyncio.Future):
+        return _with_query(memo[key], query)
+    found, result = GEOCODE_CACHE.get(key)
+    if not found:
+        result = _geocode_uncached(key, query)
+    if memo is not None:
+        memo[key] = result
+    return _with_query(result, query)
+
+
+async def geocode_location_async(query: str) -> dict | None:
+    if not query or not query.strip():
+        return None
+
+    key = normalize_address(query)
+    memo = request_memo("geocode")
+    if memo is not None and key in memo:
+        pending = memo[key]
+        result = await asyncio.shield(pending) if isinstance(pending, asyncio.Future) else pending
+        return _with_query(result, query)
+    found, result = GEOCODE_CACHE.get(key)
+    if found:
+        if memo is not None:
+            memo[key] = result
+        return _with_query(result, query)
+    task = asyncio.ensure_future(_geocode_uncached_async(key, query))
+    if memo is not None:
+        memo[key] = task
+    return _with_query(await asyncio.shield(task), query)
+
+
+def _batch_csv(addresses: list[str]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for idx, address in enumerate(addresses):
+        writer.writerow([idx, *split_address(address)])
+    return buf.getvalue().encode()
+
+
+def _parse_batch_geocode(addresses: list[str], text: str) -> list[dict | None]:
+    results: list[dict | None] = [None] * len(addresses)
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) < 6 or row[2] != "Match" or not row[0].isdigit():
+            continue
+        idx = int(row[0])
+        if idx >= len(addresses):
+            continue
+        try:
+            lon, lat = (float(v) for v in row[5].split(","))
+        except ValueError:
+            continue
+        results[idx] = {
+            "query": addresses[idx],
+            "matched_address": row[4] or addresses[idx],
+            "longitude": lon,
+            "latitude": lat,
+            "zip_code": parse_zip(row[4]),
+        }
+    return results
+
+
+def _census_geocode_batch(addresses: list[str]) -> list[dict | None]:
+    with guard("geocoder_batch"):
+        response = get_client("geocoder_batch").post(
+            CENSUS_BATCH_GEOCODE_URL,
+            data={"benchmark": "Public_AR_Current"},
+            files={"addressFile": ("addresses.csv", _batch_csv(addresses), "text/csv")},
+        )
+        response.raise_for_status()
+    return _parse_batch_geocode(addresses, response.text)
+
+
+def geocode_batch(addresses: list[str]) -> list[dict | None]:
+    keys = [normalize_address(a) for a in addresses]
+    resolved: dict[str, dict | None] = {}
+    missing: dict[str, str] = {}
+    for key, address in zip(keys, addresses):
+        if not key or key in resolved or key in missing:
+            continue
+        found, cached = GEOCODE_CACHE.get(key)
+        if found:
+            resolved[key] = cached
+        else:
+            missing[key] = address
+    pending = list(missing.items())
+    for i in range(0, len(pending), GEOCODE_BATCH_LIMIT):
+        chunk = pending[i : i + GEOCODE_BATCH_LIMIT]
+        matched = _census_geocode_batch([address for _key, address in chunk])
+        fetched = {key: result for (key, _address), result in zip(chunk, matched)}
+        GEOCODE_CACHE.set_many({key: result for key, result in fetched.items() if result})
+        resolved.update(fetched)
+    return [_with_query(resolved.get(key), address) for key, address in zip(keys, addresses)]
@@ -0,0 +1,107 @@
+import argparse
+import csv
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.acs_snapshot import ZCTA_SLOTS
+from app.config import ZCTA_CENTROIDS_PATH
+
+DTYPE = [("lat", "<f4"), ("lng", "<f4")]
+
+SEED_CENTERS = {
+    "92618": (33.64, -117.79),
+    "92626": (33.64, -117.91),
+    "92701": (33.74, -117.87),
+    "92606": (33.69, -117.83),
+    "92801": (33.83, -117.96),
+    "92660": (33.62, -117.93),
+}
+
+_lock = threading.Lock()
+_centroids: tuple[int | None, Any] | None = None
+
+
+def _seed_table() -> Any:
+    table = np.full(ZCTA_SLOTS, np.nan, dtype=DTYPE)
+    for zcta, (lat, lng) in SEED_CENTERS.items():
+        table[int(zcta)] = (lat, lng)
+    return table
+
+
+def load_centroids(path: Path = ZCTA_CENTROIDS_PATH) -> Any:
+    global _centroids
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    current = _centroids
+    if current is not None and current[0] == mtime:
+        return current[1]
+    with _lock:
+        if _centroids is not None and _centroids[0] == mtime:
+            return _centroids[1]
+        table = None
+        if mtime is not None:
+            try:
+                table = np.load(path)
+            except (OSError, ValueError):
+                table = None
+        _centroids = (mtime, table if table is not None else _seed_table())
+        return _centroids[1]
+
+
+def version() -> str:
+    load_centroids()
+    return f"centroids-{_centroids[0]}" if _centroids and _centroids[0] else "centroids-seed"
+
+
+def get(zcta: str) -> tuple[float, float] | None:
+    if not zcta.isdigit() or len(zcta) != 5:
+        return None
+    lat, lng = load_centroids()[int(zcta)]
+    if np.isnan(lat):
+        return None
+    return round(float(lat), 5), round(float(lng), 5)
+
+
+def import_gazetteer(source: Path, path: Path = ZCTA_CENTROIDS_PATH) -> int:
+    table = np.full(ZCTA_SLOTS, np.nan, dtype=DTYPE)
+    count = 0
+    with open(source, newline="") as f:
+        reader = csv.reader(f, delimiter="\t" if "\t" in f.readline() else ",")
+        f.seek(0)
+        headers = [h.strip().upper() for h in next(reader)]
+        geo, lat_col, lng_col = headers.index("GEOID"), headers.index("INTPTLAT"), headers.index("INTPTLONG")
+        for row in reader:
+            zcta = row[geo].strip()
+            if not zcta.isdigit() or len(zcta) != 5:
+                continue
+            table[int(zcta)] = (float(row[lat_col]), float(row[lng_col]))
+            count += 1
+    if not count:
+        raise RuntimeError("No ZCTA centroids found")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp, path)
+    return count
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage ZCTA centroid coordinates.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a Census Gazetteer ZCTA file (GEOID, INTPTLAT, INTPTLONG)")
+    imp.add_argument("source", type=Path)
+    imp.add_argument("--out", type=Path, default=ZCTA_CENTROIDS_PATH)
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        print(f"Wrote {import_gazetteer(args.source, path=args.out)} centroids to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,91 @@ DATA_DIR = PROJECT_ROOT / "data"
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
+
+CACHE_DB_PATH = Path(os.environ.get("CACHE_DB_PATH", DATA_DIR / "cache.sqlite3"))
+ACS_CACHE_TTL = float(os.environ.get("ACS_CACHE_TTL", 30 * 24 * 3600))
+ACS_CACHE_NEGATIVE_TTL = float(os.environ.get("ACS_CACHE_NEGATIVE_TTL", 24 * 3600))
+ACS_CACHE_MAX_ENTRIES = int(os.environ.get("ACS_CACHE_MAX_ENTRIES", 4096))
+GEOCODE_CACHE_TTL = float(os.environ.get("GEOCODE_CACHE_TTL", 90 * 24 * 3600))
+GEOCODE_CACHE_NEGATIVE_TTL = float(os.environ.get("GEOCODE_CACHE_NEGATIVE_TTL", 6 * 3600))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.environ.get("GEOCODE_CACHE_MAX_ENTRIES", 10000))
+GEOCODE_WRITE_BATCH = int(os.environ.get("GEOCODE_WRITE_BATCH", 500))
+GEOCODE_FALLBACK_LIMIT = int(os.environ.get("GEOCODE_FALLBACK_LIMIT", 50))
+GEOCODE_FALLBACK_SECONDS = float(os.environ.get("GEOCODE_FALLBACK_SECONDS", 60.0))
+ACS_SNAPSHOT_PATH = Path(os.environ.get("ACS_SNAPSHOT_PATH", DATA_DIR / "acs5_zcta.npy"))
+
+CENSUS_API_BASE = os.environ.get("CENSUS_API_BASE", "https://api.census.gov/data/2022/acs/acs5")
+CENSUS_GEOCODER_BASE = os.environ.get("CENSUS_GEOCODER_BASE", "https://geocoding.geo.census.gov/geocoder")
+NOMINATIM_BASE = os.environ.get("NOMINATIM_BASE", "https://nominatim.openstreetmap.org")
+HUD_API_BASE = os.environ.get("HUD_API_BASE", "https://data.hud.gov")
+FREETXT_API_BASE = os.environ.get("FREETXT_API_BASE", "https://freetxtapi.com")
+
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "1") != "0"
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_TIMEOUTS = {
+    name: float(os.environ.get(f"HTTP_TIMEOUT_{name.upper()}", default))
+    for name, default in {
+        "census": 15.0,
+        "geocoder": 15.0,
+        "geocoder_batch": 300.0,
+        "nominatim": 15.0,
+        "hud": 15.0,
+        "freetxt": 30.0,
+    }.items()
+}
+
+LISTINGS_CONCURRENCY = int(os.environ.get("LISTINGS_CONCURRENCY", 8))
+LISTINGS_PAGE_DEADLINE = float(os.environ.get("LISTINGS_PAGE_DEADLINE", 5.0))
+LISTINGS_DB_PATH = Path(os.environ.get("LISTINGS_DB_PATH", DATA_DIR / "listings.sqlite3"))
+ALERTS_DB_PATH = Path(os.environ.get("ALERTS_DB_PATH", DATA_DIR / "alerts.sqlite3"))
+
+ALERT_DELIVERY = os.environ.get("ALERT_DELIVERY", "live")
+ALERT_OUTBOX_PATH = Path(os.environ.get("ALERT_OUTBOX_PATH", DATA_DIR / "alert_outbox.ndjson"))
+ALERT_SCORE_THRESHOLD = int(os.environ.get("ALERT_SCORE_THRESHOLD", 7))
+ALERT_WORKERS = int(os.environ.get("ALERT_WORKERS", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_BASE = float(os.environ.get("JOB_BACKOFF_BASE", 2.0))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 120.0))
+
+PROVIDER_RATE_LIMITS = {
+    name: float(os.environ.get(f"RATE_LIMIT_{name.upper()}", default))
+    for name, default in {
+        "census": 10.0,
+        "geocoder": 10.0,
+        "geocoder_batch": 1.0,
+        "nominatim": 1.0,
+        "hud": 5.0,
+        "freetxt": 1.0,
+        "resend": 2.0,
+        "openai": 5.0,
+    }.items()
+}
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("RATE_LIMIT_MAX_WAIT", 5.0))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", 30.0))
+BREAKER_LIMIT_COOLDOWN = float(os.environ.get("BREAKER_LIMIT_COOLDOWN", 900.0))
+
+EXPLAIN_CACHE_TTL = float(os.environ.get("EXPLAIN_CACHE_TTL", 30 * 24 * 3600))
+EXPLAIN_CACHE_MAX_ENTRIES = int(os.environ.get("EXPLAIN_CACHE_MAX_ENTRIES", 2048))
+EXPLAIN_DEADLINE = float(os.environ.get("EXPLAIN_DEADLINE", 3.0))
+RISK_BATCH_MAX_ITEMS = int(os.environ.get("RISK_BATCH_MAX_ITEMS", 5000))
+RISK_TABLE_PATH = Path(os.environ.get("RISK_TABLE_PATH", DATA_DIR / "risk_table.npz"))
+RISK_TABLE_CHECK_INTERVAL = float(os.environ.get("RISK_TABLE_CHECK_INTERVAL", 1.0))
+PLACES_PATH = Path(os.environ.get("PLACES_PATH", DATA_DIR / "ca_places.json"))
+
+MAP_CLUSTER_MAX_ZOOM = int(os.environ.get("MAP_CLUSTER_MAX_ZOOM", 16))
+MAP_CLUSTER_CELL_PX = int(os.environ.get("MAP_CLUSTER_CELL_PX", 64))
+MAP_MAX_FEATURES = int(os.environ.get("MAP_MAX_FEATURES", 500))
+MAP_INDEX_REFRESH_SECONDS = float(os.environ.get("MAP_INDEX_REFRESH_SECONDS", 300.0))
+ZCTA_CENTROIDS_PATH = Path(os.environ.get("ZCTA_CENTROIDS_PATH", DATA_DIR / "zcta_centroids.npy"))
+TILE_MAX_AGE = int(os.environ.get("TILE_MAX_AGE", 300))
+TILE_CACHE_ENTRIES = int(os.environ.get("TILE_CACHE_ENTRIES", 2048))
+MAP_CACHE_MAX_BYTES = int(os.environ.get("MAP_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+TIMESERIES_DIR = Path(os.environ.get("TIMESERIES_DIR", DATA_DIR / "timeseries"))
+TIMESERIES_CHECK_INTERVAL = float(os.environ.get("TIMESERIES_CHECK_INTERVAL", 1.0))
+ENTITIES_PATH = Path(os.environ.get("ENTITIES_PATH", DATA_DIR / "entities.json"))
+ENTITY_NAME_THRESHOLD = float(os.environ.get("ENTITY_NAME_THRESHOLD", 0.7))
+ENTITY_MAX_ADDRESS_BLOCK = int(os.environ.get("ENTITY_MAX_ADDRESS_BLOCK", 200))
@@ -0,0 +1,38 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+_local = threading.local()
+
+
+def connect(path: Path, schema: str | None = None) -> sqlite3.Connection:
+    if not hasattr(_local, "conns"):
+        _local.conns = {}
+        _local.schemas = set()
+    conns = _local.conns
+    key = str(path)
+    conn = conns.get(key)
+    if conn is None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=30.0, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[key] = conn
+    if schema and (key, schema) not in _local.schemas:
+        conn.executescript(schema)
+        _local.schemas.add((key, schema))
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,481 @@
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+from app import timeseries
+from app.address import address_key, parse_zip
+from app.config import ENTITIES_PATH, ENTITY_MAX_ADDRESS_BLOCK, ENTITY_NAME_THRESHOLD
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+TOP_BUYERS = 4
+CHUNK = 50_000
+
+FIELDS = {
+    "owner": ("owner", "owner_name", "buyer", "buyer_name", "grantee", "grantee_name"),
+    "mailing": ("mailing_address", "owner_address", "mail_address", "grantee_address"),
+    "property": ("property_address", "situs_address", "address"),
+    "zip": ("zip", "zip_code", "property_zip", "situs_zip"),
+    "date": ("sale_date", "recording_date", "date"),
+    "cash": ("cash", "all_cash", "cash_sale"),
+}
+
+_COMPANY_SUFFIXES = {
+    "llc": "llc",
+    "lc": "llc",
+    "inc": "inc",
+    "incorporated": "inc",
+    "corp": "corp",
+    "corporation": "corp",
+    "co": "co",
+    "company": "co",
+    "lp": "lp",
+    "llp": "lp",
+    "ltd": "ltd",
+    "limited": "ltd",
+    "fund": "fund",
+    "reit": "reit",
+}
+_COMPANY_WORDS = frozenset(
+    ["holdings", "capital", "properties", "investments", "partners", "ventures", "homes", "realty", "group", "assets", "equity"]
+)
+_COMPANY_KINDS = frozenset(_COMPANY_SUFFIXES.values())
+_TRUST_WORDS = frozenset(["trust", "trustee", "ttee", "tr"])
+_DOTTED_RE = re.compile(r"\b([a-z])\.\s*([a-z])\.(?:\s*([a-z])\.)?")
+_NAME_PUNCT_RE = re.compile(r"[^a-z0-9 ]")
+_SPACE_RE = re.compile(r"\s+")
+_TRUTHY = frozenset(["1", "y", "yes", "true", "t", "cash"])
+
+_HASH_A = None
+_HASH_B = None
+_MIX = None
+
+_lock = threading.Lock()
+_summary: tuple[int, dict] | None = None
+
+
+@lru_cache(maxsize=1 << 18)
+def normalize_name(raw: str) -> tuple[str, str, bool]:
+    t = unicodedata.normalize("NFKD", raw.lower()).encode("ascii", "ignore").decode()
+    t = _DOTTED_RE.sub(lambda m: "".join(g for g in m.groups() if g), t.replace("&", " and "))
+    words = [w for w in _SPACE_RE.split(_NAME_PUNCT_RE.sub(" ", t)) if w]
+    if words[:1] == ["the"]:
+        words = words[1:]
+    full = [_COMPANY_SUFFIXES.get(w, w) for w in words]
+    core = [w for w in full if w not in _COMPANY_KINDS and w not in _TRUST_WORDS]
+    company = any(w in _COMPANY_KINDS for w in full) or any(w in _COMPANY_WORDS for w in core)
+    return " ".join(full), " ".join(core) or " ".join(full), company
+
+
+@lru_cache(maxsize=1 << 18)
+def _address_key(raw: str) -> str:
+    return address_key(raw)
+
+
+def _shingles(text: str) -> list[int]:
+    padded = f" {text} "
+    return [zlib.crc32(padded[i:i + 3].encode()) for i in range(max(1, len(padded) - 2))]
+
+
+def _hash_params() -> tuple[Any, Any, Any]:
+    global _HASH_A, _HASH_B, _MIX
+    if _HASH_A is None:
+        rng = np.random.default_rng(0x5EED)
+        _HASH_A = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        _HASH_B = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+        _MIX = rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+    return _HASH_A, _HASH_B, _MIX
+
+
+def minhash(names: list[str]) -> Any:
+    a, b, _mix = _hash_params()
+    sig = np.empty((len(names), NUM_PERM), dtype=np.uint32)
+    for lo in range(0, len(names), CHUNK):
+        shingles = [_shingles(name) for name in names[lo:lo + CHUNK]]
+        lengths = np.fromiter((len(s) for s in shingles), dtype=np.int64, count=len(shingles))
+        flat = np.fromiter((h for s in shingles for h in s), dtype=np.uint64, count=int(lengths.sum()))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        with np.errstate(over="ignore"):
+            hashed = ((flat[:, None] * a + b) >> np.uint64(32)).astype(np.uint32)
+        sig[lo:lo + len(shingles)] = np.minimum.reduceat(hashed, starts, axis=0)
+    return sig
+
+
+def similar_pairs(sig: Any, threshold: float = ENTITY_NAME_THRESHOLD) -> tuple[Any, Any]:
+    _a, _b, mix = _hash_params()
+    left, right = [], []
+    for band in range(BANDS):
+        rows = sig[:, band * ROWS:(band + 1) * ROWS].astype(np.uint64)
+        with np.errstate(over="ignore"):
+            keys = (rows * mix).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        leader = order[np.repeat(starts, np.diff(np.append(starts, len(order))))]
+        candidate = leader != order
+        members, leader = order[candidate], leader[candidate]
+        keep = (sig[members] == sig[leader]).mean(axis=1) >= threshold
+        left.append(members[keep])
+        right.append(leader[keep])
+    return np.concatenate(left), np.concatenate(right)
+
+
+@lru_cache(maxsize=1 << 16)
+def _distinctive_shingles(core: str) -> frozenset[int]:
+    return frozenset(_shingles(" ".join(w for w in core.split() if w not in _COMPANY_WORDS) or core))
+
+
+def verify_pairs(names: list[str], left: Any, right: Any, threshold: float = ENTITY_NAME_THRESHOLD) -> tuple[Any, Any]:
+    keep = np.zeros(len(left), dtype=bool)
+    for i, (a, b) in enumerate(zip(left.tolist(), right.tolist())):
+        x, y = _distinctive_shingles(names[a]), _distinctive_shingles(names[b])
+        keep[i] = len(x & y) >= threshold * len(x | y)
+    return left[keep], right[keep]
+
+
+class DisjointSet:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def labels(self) -> list[int]:
+        return [self.find(x) for x in range(len(self.parent))]
+
+
+@lru_cache(maxsize=64)
+def _columns(keys: tuple[str, ...]) -> tuple[str | None, ...]:
+    return tuple(next((key for key in aliases if key in keys), None) for aliases in FIELDS.values())
+
+
+def _intern(table: dict[str, int], key: str) -> int:
+    idx = table.get(key)
+    if idx is None:
+        idx = table[key] = len(table)
+    return idx
+
+
+def resolve(records: Iterable[dict]) -> dict[str, Any]:
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    names: dict[str, int] = {}
+    cores: dict[str, int] = {}
+    mailings: dict[str, int] = {}
+    properties: dict[str, int] = {}
+    zips: dict[str, int] = {}
+    raw_names: list[str] = []
+    name_ids, core_ids, mailing_ids, property_ids, zip_ids, months, cash = [], [], [], [], [], [], []
+    for row in records:
+        owner_key, mailing_key, property_key, zip_key, date_key, cash_key = _columns(tuple(row))
+        owner = str(row.get(owner_key) or "").strip()
+        if not owner:
+            continue
+        full, core, company = normalize_name(owner)
+        if not full:
+            continue
+        name_id = names.get(full)
+        if name_id is None:
+            name_id = names[full] = len(names)
+            raw_names.append(owner)
+        name_ids.append(name_id)
+        core_ids.append(_intern(cores, core) if company else -1)
+        mailing = _address_key(str(row.get(mailing_key) or ""))
+        mailing_ids.append(_intern(mailings, mailing) if mailing else -1)
+        raw_property = str(row.get(property_key) or "")
+        prop = _address_key(raw_property)
+        property_ids.append(_intern(properties, prop) if prop else -1 - len(property_ids))
+        zip_code = parse_zip(str(row.get(zip_key) or "")) or parse_zip(raw_property)
+        zip_ids.append(_intern(zips, zip_code) if zip_code else -1)
+        date = str(row.get(date_key) or "")
+        try:
+            months.append(timeseries.month_index(date) if date else -1)
+        except ValueError:
+            months.append(-1)
+        cash.append(str(row.get(cash_key) or "").strip().lower() in _TRUTHY)
+    n = len(name_ids)
+    timings["parse"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    core_ids = np.asarray(core_ids, dtype=np.int64)
+    mailing_ids = np.asarray(mailing_ids, dtype=np.int64)
+    core_names = list(cores)
+    sig = minhash(core_names) if core_names else np.empty((0, NUM_PERM), dtype=np.uint32)
+    timings["minhash"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    left, right = verify_pairs(core_names, *similar_pairs(sig))
+    timings["lsh"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    companies = np.flatnonzero(core_ids >= 0)
+    first_core = np.full(len(core_names), -1, dtype=np.int64)
+    first_core[core_ids[companies[::-1]]] = companies[::-1]
+    edges = [(companies, first_core[core_ids[companies]]), (first_core[left], first_core[right])]
+    addressed = np.flatnonzero(mailing_ids >= 0)
+    block_size = np.bincount(mailing_ids[addressed], minlength=len(mailings))
+    addressed = addressed[block_size[mailing_ids[addressed]] <= ENTITY_MAX_ADDRESS_BLOCK]
+    first_mailing = np.full(len(mailings), -1, dtype=np.int64)
+    first_mailing[mailing_ids[addressed[::-1]]] = addressed[::-1]
+    edges.append((addressed, first_mailing[mailing_ids[addressed]]))
+    dsu = DisjointSet(n)
+    union = dsu.union
+    for a, b in edges:
+        for x, y in zip(a.tolist(), b.tolist()):
+            if x != y:
+                union(x, y)
+    roots, entity = np.unique(np.asarray(dsu.labels(), dtype=np.int64), return_inverse=True)
+    timings["cluster"] = time.perf_counter() - started
+
+    return {
+        "entity": entity.astype(np.int64),
+        "entities": len(roots),
+        "name": np.asarray(name_ids, dtype=np.int64),
+        "raw_names": raw_names,
+        "company": core_ids >= 0,
+        "property": np.asarray(property_ids, dtype=np.int64),
+        "zip": np.asarray(zip_ids, dtype=np.int64),
+        "zips": list(zips),
+        "month": np.asarray(months, dtype=np.int64),
+        "cash": np.asarray(cash, dtype=bool),
+        "timings": timings,
+    }
+
+
+def _distinct_per_entity(entity: Any, values: Any, entities: int) -> Any:
+    pairs = np.unique(np.stack([entity, values], axis=1), axis=0)
+    return np.bincount(pairs[:, 0], minlength=entities)
+
+
+def _display_names(result: dict[str, Any]) -> Any:
+    entity, name = result["entity"], result["name"]
+    pairs, counts = np.unique(np.stack([entity, name], axis=1), axis=0, return_counts=True)
+    display = np.empty(result["entities"], dtype=np.int64)
+    if len(pairs) == 0:
+        return display
+    order = np.lexsort((-counts, pairs[:, 0]))
+    pairs = pairs[order]
+    first = np.concatenate(([True], pairs[1:, 0] != pairs[:-1, 0]))
+    display[pairs[first, 0]] = pairs[first, 1]
+    return display
+
+
+def _zip_buyers(result: dict[str, Any], investor: Any, owned: Any, variants: Any) -> dict[str, dict]:
+    entity = result["entity"]
+    zoned = np.flatnonzero((result["zip"] >= 0) & investor[entity])
+    pairs, counts = np.unique(np.stack([result["zip"][zoned], entity[zoned]], axis=1), axis=0, return_counts=True)
+    if len(pairs) == 0:
+        return {}
+    display = _display_names(result)
+    order = np.lexsort((pairs[:, 1], -counts, pairs[:, 0]))
+    pairs, counts = pairs[order], counts[order]
+    starts = np.flatnonzero(np.concatenate(([True], pairs[1:, 0] != pairs[:-1, 0])))
+    zips = {}
+    for lo, hi in zip(starts.tolist(), np.append(starts[1:], len(pairs)).tolist()):
+        top = pairs[lo:min(hi, lo + TOP_BUYERS), 1].tolist()
+        zips[result["zips"][int(pairs[lo, 0])]] = {
+            "buyers": [
+                {"name": result["raw_names"][int(display[e])], "count": int(c)}
+                for e, c in zip(top, counts[lo:lo + len(top)].tolist())
+            ],
+            "properties_owned": int(owned[top[0]]),
+            "related_entities": int(variants[top[0]]),
+        }
+    return zips
+
+
+def summarize(result: dict[str, Any]) -> dict[str, Any]:
+    entity, entities = result["entity"], result["entities"]
+    owned = _distinct_per_entity(entity, result["property"], entities)
+    variants = _distinct_per_entity(entity, result["name"], entities)
+    company = np.bincount(entity, result["company"], minlength=entities) > 0
+    investor = company | (owned >= 2)
+    return {
+        "meta": {
+            "records": len(entity),
+            "entities": int(entities),
+            "investor_entities": int(investor.sum()),
+            "built_at": int(time.time()),
+        },
+        "zips": _zip_buyers(result, investor, owned, variants),
+    }
+
+
+def history_rows(result: dict[str, Any]) -> list[dict]:
+    entity = result["entity"]
+    owned = _distinct_per_entity(entity, result["property"], result["entities"])
+    dated = np.flatnonzero((result["zip"] >= 0) & (result["month"] >= 0))
+    company = result["company"][dated]
+    cash = result["cash"][dated]
+    repeat = owned[entity[dated]] >= 2
+    columns = {
+        "purchases": np.ones(len(dated), dtype=np.int64),
+        "llc": company,
+        "cash": cash,
+        "repeat": repeat,
+        "investor": company | cash | repeat,
+    }
+    keys, inverse = np.unique(np.stack([result["zip"][dated], result["month"][dated]], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = {name: np.bincount(inverse, values, minlength=len(keys)).astype(int) for name, values in columns.items()}
+    return [
+        {
+            "zip": result["zips"][int(z)],
+            "month": timeseries.month_label(int(m)),
+            **{name: int(sums[name][i]) for name in columns},
+        }
+        for i, (z, m) in enumerate(keys.tolist())
+    ]
+
+
+def build(sources: list[Path], path: Path = ENTITIES_PATH, history: bool = False) -> dict[str, Any]:
+    result = resolve(row for source in sources for row in _records_from_file(source))
+    summary = summarize(result)
+    summary["meta"]["timings"] = {k: round(v, 3) for k, v in result["timings"].items()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(summary))
+    os.replace(tmp, path)
+    if history:
+        summary["meta"]["history_rows"] = timeseries.append(history_rows(result))
+    return summary["meta"]
+
+
+def load_summary(path: Path = ENTITIES_PATH) -> dict | None:
+    global _summary
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    current = _summary
+    if current is not None and current[0] == mtime:
+        return current[1]
+    with _lock:
+        if _summary is not None and _summary[0] == mtime:
+            return _summary[1]
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return current[1] if current is not None else None
+        _summary = (mtime, summary)
+        return summary
+
+
+def zip_summary(zcta: str | None) -> dict | None:
+    summary = load_summary() if zcta else None
+    return summary["zips"].get(zcta) if summary is not None else None
+
+
+def version() -> int:
+    current = _summary if load_summary() is not None else None
+    return current[0] if current is not None else 0
+
+
+def _records_from_file(path: Path) -> Iterable[dict]:
+    with open(path, newline="") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield {key.strip().lower(): value for key, value in row.items() if key}
+
+
+def synthetic_records(count: int, seed: int = 0) -> Iterable[dict]:
+    rng = random.Random(seed)
+    stems = ["Sunset", "Arrow", "Evergreen", "Bright", "Harbor", "Summit", "Cedar", "Pacific", "Golden", "Lakeside"]
+    kinds = ["Holdings", "Capital", "Homes", "Properties", "Ventures", "Equity"]
+    firms = [
+        (
+            f"{''.join(rng.choice('bcdfghklmnprstvz') + rng.choice('aeiou') for _ in range(3)).title()} {rng.choice(kinds)}",
+            f"{100 + n} Main St Ste {n % 90 + 10}, Irvine, CA 92618",
+        )
+        for n in range(max(1, count // 200))
+    ]
+    variants = ["{} LLC", "{} L.L.C.", "{}, Inc.", "The {} Trust", "{} II LLC", "{} Fund LP"]
+    for i in range(count):
+        zip_code = f"9{rng.randint(2000, 2999):04d}"
+        date = f"{rng.randint(2021, 2025)}-{rng.randint(1, 12):02d}-01"
+        if rng.random() < 0.3:
+            name, mailing = rng.choice(firms)
+            owner = rng.choice(variants).format(name)
+            if rng.random() < 0.1:
+                owner = owner.upper()
+            cash = rng.random() < 0.7
+        else:
+            owner = f"Owner {i} {rng.choice(stems)}"
+            mailing = f"{i} Residential Way, Irvine, CA {zip_code}"
+            cash = rng.random() < 0.15
+        yield {
+            "owner": owner,
+            "mailing_address": mailing,
+            "property_address": f"{rng.randint(1, 99999)} Example Ave, Irvine, CA {zip_code}",
+            "zip": zip_code,
+            "sale_date": date,
+            "cash": "Y" if cash else "N",
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Resolve deed buyers into related entities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Resolve deed/transaction records (CSV or NDJSON) into buyer entities")
+    build_cmd.add_argument("sources", type=Path, nargs="+")
+    build_cmd.add_argument("--out", type=Path, default=ENTITIES_PATH)
+    build_cmd.add_argument("--history", action="store_true", help="Also append per-ZIP monthly aggregates to the time-series store")
+    show = sub.add_parser("show", help="Print the resolved buyers for a ZIP")
+    show.add_argument("zip")
+    bench = sub.add_parser("bench", help="Resolve synthetic records and report stage timings")
+    bench.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        meta = build(args.sources, path=args.out, history=args.history)
+        print(f"Resolved {meta['records']} records into {meta['entities']} entities "
+              f"({meta['investor_entities']} investors); wrote {args.out}")
+    elif args.command == "show":
+        found = zip_summary(args.zip)
+        if found is None:
+            raise SystemExit(f"No resolved buyers for {args.zip}")
+        print(f"{found['properties_owned']} properties across {found['related_entities']} related entities (top buyer)")
+        for buyer in found["buyers"]:
+            print(f"{buyer['count']:>6}  {buyer['name']}")
+    elif args.command == "bench":
+        started = time.perf_counter()
+        result = resolve(synthetic_records(args.records))
+        summary = summarize(result)
+        elapsed = time.perf_counter() - started
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in result["timings"].items())
+        print(f"Resolved {args.records} records into {result['entities']} entities in {elapsed:.2f}s "
+              f"({args.records / elapsed:,.0f} records/s; {stages}); {len(summary['zips'])} ZIPs summarized")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,116 @@
-from app.config import OPENAI_API_KEY
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator
+
+from app.cache import TieredCache
+from app.config import EXPLAIN_CACHE_MAX_ENTRIES, EXPLAIN_CACHE_TTL, EXPLAIN_DEADLINE, OPENAI_API_KEY
+from app.resilience import guard, guard_async
+
+MODEL = "gpt-4o-mini"
+
+EXPLAIN_CACHE = TieredCache(
+    "explain",
+    ttl=EXPLAIN_CACHE_TTL,
+    negative_ttl=0,
+    max_entries=EXPLAIN_CACHE_MAX_ENTRIES,
+)
+
+_client: Any = None
+_async_client: Any = None
+_async_clients: dict[asyncio.AbstractEventLoop, Any] = {}
+_injected = False
+_lock = threading.Lock()
+_inflight: dict[str, Future] = {}
+_async_inflight: dict[str, asyncio.Task] = {}
+
+
+def set_client(client: Any = None, async_client: Any = None) -> None:
+    global _client, _async_client, _injected
+    with _lock:
+        _client = client
+        _async_client = async_client
+        _async_clients.clear()
+        _injected = client is not None or async_client is not None
+
+
+def _enabled() -> bool:
+    return _injected or bool(OPENAI_API_KEY)
+
+
+def _get_client() -> Any:
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def _get_async_client() -> Any:
+    if _async_client is not None:
+        return _async_client
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI
+        client = _async_clients[loop] = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return client
+
+
+def _prompt(signals: list[str], score: int, label: str, location: str | None) -> str:
+    loc = f" for this location (ZIP/area: {location})" if location else " for this area"
+    return (
+        "You are a real estate transparency assistant. In one or two short sentences, "
+        f"explain to a family homebuyer why{loc} there is the following corporate acquisition risk: "
+        f"score {score}/10, {label}. Be clear and helpful. Do not use bullet points. "
+        "Write as if speaking directly about this specific location.\n\n"
+        "Signals: " + "; ".join(signals)
+    )
+
+
+def explanation_key(signals: list[str], score: int, label: str, location: str | None) -> str:
+    raw = json.dumps([MODEL, signals, score, label, location], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _completion_text(r) -> str | None:
+    if r.choices and r.choices[0].message.content:
+        return r.choices[0].message.content.strip()
+    return None
+
+
+def _complete(prompt: str) -> str | None:
+    try:
+        with guard("openai", max_wait=0):
+            r = _get_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=150,
+            )
+        return _completion_text(r)
+    except Exception:
+        return None
+
+
+async def _complete_async(key: str, prompt: str) -> str | None:
+    try:
+        async with guard_async("openai", max_wait=0):
+            r = await _get_async_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=150,
+            )
+        text = _completion_text(r)
+    except Exception:
+        return None
+    if text:
+        EXPLAIN_CACHE.set(key, text)
+    return text
 
 
 def generate_risk_explanation(
@@ -8,26 +120,148 @@ def generate_risk_explanation(
     fallback: str,
     location: str | None = None,
 ) -> str:
-    if not OPENAI_API_KEY or not signals:
+    if not _enabled() or not signals:
         return fallback
+    key = explanation_key(signals, score, label, location)
+    found, cached = EXPLAIN_CACHE.get(key)
+    if found:
+        return cached
+    with _lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result() or fallback
+    text = None
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        loc = f" for this location (ZIP/area: {location})" if location else " for this area"
-        prompt = (
-            "You are a real estate transparency assistant. In one or two short sentences, "
-            f"explain to a family homebuyer why{loc} there is the following corporate acquisition risk: "
-            f"score {score}/10, {label}. Be clear and helpful. Do not use bullet points. "
-            "Write as if speaking directly about this specific location.\n\n"
-            "Signals: " + "; ".join(signals)
-        )
-        r = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150,
-        )
-        if r.choices and r.choices[0].message.content:
-            return r.choices[0].message.content.strip()
+        text = _complete(_prompt(signals, score, label, location))
+        if text:
+            EXPLAIN_CACHE.set(key, text)
+    finally:
+        future.set_result(text)
+        with _lock:
+            _inflight.pop(key, None)
+    return text or fallback
+
+
+def cached_risk_explanation(
+    signals: list[str],
+    score: int,
+    label: str,
+    fallback: str,
+    location: str | None = None,
+) -> str:
+    if not signals:
+        return fallback
+    found, cached = EXPLAIN_CACHE.get(explanation_key(signals, score, label, location))
+    return cached if found else fallback
+
+
+async def generate_risk_explanation_async(
+    signals: list[str],
+    score: int,
+    label: str,
+    fallback: str,
+    location: str | None = None,
+    deadline: float | None = EXPLAIN_DEADLINE,
+) -> str:
+    if not _enabled() or not signals:
+        return fallback
+    key = explanation_key(signals, score, label, location)
+    found, cached = EXPLAIN_CACHE.get(key)
+    if found:
+        return cached
+    task = _async_inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_complete_async(key, _prompt(signals, score, label, location)))
+        _async_inflight[key] = task
+        task.add_done_callback(lambda t: _async_inflight.pop(key, None) if _async_inflight.get(key) is t else None)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), deadline) or fallback
+    except asyncio.TimeoutError:
+        return fallback
+
+
+async def stream_risk_explanation(
+    signals: list[str],
+    score: int,
+    label: str,
+    fallback: str,
+    location: str | None = None,
+) -> AsyncIterator[str]:
+    if not _enabled() or not signals:
+        yield fallback
+        return
+    key = explanation_key(signals, score, label, location)
+    found, cached = EXPLAIN_CACHE.get(key)
+    if found:
+        yield cached
+        return
+    parts: list[str] = []
+    try:
+        async with guard_async("openai", max_wait=0):
+            stream = await _get_async_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": _prompt(signals, score, label, location)}],
+                max_tokens=150,
+                stream=True,
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if not parts:
+                        delta = delta.lstrip()
+                    parts.append(delta)
+                    yield delta
     except Exception:
-        pass
-    return fallback
+        if not parts:
+            yield fallback
+        return
+    text = "".join(parts).strip()
+    if text:
+        EXPLAIN_CACHE.set(key, text)
+    else:
+        yield fallback
+
+
+def warm(zip_codes: list[str] | None = None) -> dict[str, int]:
+    from app.risk_engine import _load_rules, compute_risk
+
+    if zip_codes is None:
+        zip_codes = [z for z in _load_rules() if z.isdigit()]
+    counts = {"generated": 0, "cached": 0, "fallback": 0}
+    for zip_code in zip_codes:
+        risk = compute_risk(zip_code=zip_code, geocode=False)
+        location = risk.get("resolved_zip") or zip_code
+        if EXPLAIN_CACHE.get(explanation_key(risk["signals"], risk["score"], risk["label"], location))[0]:
+            counts["cached"] += 1
+            continue
+        text = generate_risk_explanation(
+            signals=risk["signals"],
+            score=risk["score"],
+            label=risk["label"],
+            fallback=risk["explanation"],
+            location=location,
+        )
+        counts["generated" if text != risk["explanation"] else "fallback"] += 1
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage cached risk explanations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm_cmd = sub.add_parser("warm", help="Pre-generate explanations for every ZIP in risk_rules.json.")
+    warm_cmd.add_argument("zip_codes", nargs="*", help="Only warm these ZIPs.")
+    sub.add_parser("clear", help="Drop all cached explanations.")
+    args = parser.parse_args(argv)
+    if args.command == "warm":
+        counts = warm(args.zip_codes or None)
+        print(f"Generated {counts['generated']}, already cached {counts['cached']}, fell back {counts['fallback']}")
+    else:
+        EXPLAIN_CACHE.clear()
+        print("Cleared explanation cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import httpx
+
+from app.config import (
+    HTTP2_ENABLED,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_TIMEOUTS,
+)
+
+PROVIDER_OPTIONS: dict[str, dict] = {
+    "census": {},
+    "geocoder": {},
+    "geocoder_batch": {},
+    "nominatim": {"headers": {"User-Agent": "EquityGuardian/1.0 (local-demo)"}},
+    "hud": {"follow_redirects": True, "headers": {"Accept": "application/json"}},
+    "freetxt": {},
+}
+
+_lock = threading.Lock()
+_clients: dict[str, httpx.Client] = {}
+_async_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs(name: str) -> dict:
+    return {
+        "timeout": httpx.Timeout(HTTP_TIMEOUTS[name], connect=HTTP_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": _http2_available(),
+        **PROVIDER_OPTIONS[name],
+    }
+
+
+def get_client(name: str) -> httpx.Client:
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        if name not in _clients:
+            _clients[name] = httpx.Client(**_client_kwargs(name))
+        return _clients[name]
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(name)
+    if entry is not None and entry[0] is loop:
+        return entry[1]
+    client = httpx.AsyncClient(**_client_kwargs(name))
+    _async_clients[name] = (loop, client)
+    return client
+
+
+def open_clients() -> None:
+    for name in PROVIDER_OPTIONS:
+        get_client(name)
+        get_async_client(name)
+
+
+async def close_clients() -> None:
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+    entries = list(_async_clients.values())
+    _async_clients.clear()
+    loop = asyncio.get_running_loop()
+    for owner, client in entries:
+        if owner is loop:
+            await client.aclose()
@@ -1,26 +1,20 @@
-import httpx
+from app.config import HUD_API_BASE
+from app.http_clients import get_async_client, get_client
+from app.resilience import guard, guard_async
 
-HUD_BASE = "https://data.hud.gov"
-TIMEOUT = 15.0
+HUD_BASE = HUD_API_BASE
 
 
-def fetch_housing_counselors(city: str | None = None, state: str | None = None, limit: int = 50) -> list[dict]:
+def _counselor_params(city: str | None, state: str | None, limit: int) -> dict[str, str]:
     params = {"RowLimit": str(min(limit, 100))}
     if city:
         params["City"] = city.strip()
     if state:
         params["State"] = state.strip()[:2].upper()
-    try:
-        with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as client:
-            r = client.get(
-                f"{HUD_BASE}/Housing_Counselor/search",
-                params=params,
-                headers={"Accept": "application/json"},
-            )
-            r.raise_for_status()
-            data = r.json()
-    except Exception:
-        return []
+    return params
+
+
+def _parse_counselors(data) -> list[dict]:
     raw = data if isinstance(data, list) else data.get("results", data.get("agencies", []))
     if not isinstance(raw, list):
         return []
@@ -41,3 +35,31 @@ def fetch_housing_counselors(city: str | None = None, state: str | None = None,
             "services": item.get("Services") or item.get("services"),
         })
     return out
+
+
+def fetch_housing_counselors(city: str | None = None, state: str | None = None, limit: int = 50) -> list[dict]:
+    try:
+        with guard("hud"):
+            r = get_client("hud").get(
+                f"{HUD_BASE}/Housing_Counselor/search",
+                params=_counselor_params(city, state, limit),
+            )
+            r.raise_for_status()
+        data = r.json()
+    except Exception:
+        return []
+    return _parse_counselors(data)
+
+
+async def fetch_housing_counselors_async(city: str | None = None, state: str | None = None, limit: int = 50) -> list[dict]:
+    try:
+        async with guard_async("hud"):
+            r = await get_async_client("hud").get(
+                f"{HUD_BASE}/Housing_Counselor/search",
+                params=_counselor_params(city, state, limit),
+            )
+            r.raise_for_status()
+        data = r.json()
+    except Exception:
+        return []
+    return _parse_counselors(data)
@@ -0,0 +1,342 @@
+import argparse
+import codecs
+import csv
+import json
+import secrets
+import threading
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+from app import listing_store, spatial
+from app.address import address_key
+from app.alert_service import enqueue_listing_alerts
+from app.census import GEOCODE_BATCH_LIMIT, geocode_batch, geocode_location
+from app.config import GEOCODE_FALLBACK_LIMIT, GEOCODE_FALLBACK_SECONDS, GEOCODE_WRITE_BATCH
+from app.risk_engine import compute_risk, prefetch_census, stored_risk_version
+
+RESCORE_BATCH_SIZE = 500
+BULK_INGEST_BATCH = 1000
+BULK_MAX_ERRORS = 1000
+
+_job_lock = threading.Lock()
+_requested = threading.Event()
+
+
+class ListingIn(BaseModel):
+    address: str
+    price: int | None = None
+    source: str | None = None
+
+
+def new_listing_id() -> str:
+    return f"ingested-{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+
+
+def new_listing_row(listing: ListingIn, listing_id: str | None = None) -> dict:
+    return {
+        "id": listing_id or new_listing_id(),
+        "address": listing.address.strip(),
+        "price": listing.price,
+        "source": (listing.source or "ingested").strip() or "ingested",
+        "listed_at": listing_store.utc_timestamp(),
+    }
+
+
+def _geocode_fields(geo: dict | None) -> dict:
+    fields = {"geocoded_at": int(time.time())}
+    if geo:
+        fields.update({
+            "lat": geo["latitude"],
+            "lng": geo["longitude"],
+            "matched_address": geo.get("matched_address"),
+        })
+        if geo.get("zip_code"):
+            fields["zip_code"] = geo["zip_code"]
+    return fields
+
+
+def score_fields(row: dict) -> dict:
+    rules_version, data_vintage = stored_risk_version()
+    risk = compute_risk(
+        address=row.get("address"),
+        zip_code=row.get("zip_code"),
+        geocode=False,
+    )
+    fields = {
+        "risk": risk,
+        "rules_version": rules_version,
+        "data_vintage": data_vintage,
+        "scored_at": int(time.time()),
+    }
+    if not row.get("zip_code") and risk.get("resolved_zip"):
+        fields["zip_code"] = risk["resolved_zip"]
+    return fields
+
+
+def is_stale(row: dict, version: tuple[str, str] | None = None) -> bool:
+    rules_version, data_vintage = version or stored_risk_version()
+    return (
+        "risk" not in row
+        or row.get("rules_version") != rules_version
+        or row.get("data_vintage") != data_vintage
+    )
+
+
+def mark_alert_due(row: dict) -> bool:
+    risk = row.get("risk") or {}
+    if row.get("alerted_at") or not (row.get("zip_code") or risk.get("resolved_zip")):
+        return False
+    row["alerted_at"] = int(time.time())
+    return True
+
+
+def _apply_geocodes(rows: list[dict], geos: list[dict | None]) -> list[dict]:
+    updates = {}
+    for row, geo in zip(rows, geos):
+        fields = _geocode_fields(geo)
+        fields.update(score_fields({**row, **fields}))
+        updates[row["id"]] = fields
+    merged = [{**row, **updates[row["id"]]} for row in rows]
+    due = [row for row in merged if mark_alert_due(row)]
+    for row in due:
+        updates[row["id"]]["alerted_at"] = row["alerted_at"]
+    enqueue_listing_alerts(due)
+    listing_store.update_listings(updates)
+    spatial.invalidate()
+    return merged
+
+
+def _geocode_fallback(rows: list[dict]) -> int:
+    deadline = time.monotonic() + GEOCODE_FALLBACK_SECONDS
+    found_rows, found = [], []
+    for row in rows[:GEOCODE_FALLBACK_LIMIT]:
+        if time.monotonic() > deadline:
+            break
+        try:
+            geo = geocode_location(row.get("address", ""))
+        except Exception:
+            geo = None
+        if geo:
+            found_rows.append(row)
+            found.append(geo)
+    if found:
+        _apply_geocodes(found_rows, found)
+    return len(found)
+
+
+def _geocode_pending_batch() -> int:
+    pending = listing_store.pending_geocode(GEOCODE_BATCH_LIMIT)
+    if not pending:
+        return 0
+    try:
+        matches = geocode_batch([r.get("address", "") for r in pending])
+    except Exception:
+        return 0
+    misses = []
+    for lo in range(0, len(pending), GEOCODE_WRITE_BATCH):
+        rows = _apply_geocodes(pending[lo:lo + GEOCODE_WRITE_BATCH], matches[lo:lo + GEOCODE_WRITE_BATCH])
+        misses.extend(row for row, geo in zip(rows, matches[lo:lo + GEOCODE_WRITE_BATCH]) if geo is None)
+    _geocode_fallback(misses)
+    return len(pending)
+
+
+def rescore_listings(force: bool = False) -> int:
+    rules_version, data_vintage = stored_risk_version()
+    total = 0
+    for batch in listing_store.iter_stale(rules_version, data_vintage, RESCORE_BATCH_SIZE, force=force):
+        prefetch_census(
+            zip_codes=[r.get("zip_code") for r in batch],
+            addresses=[r.get("address") for r in batch],
+        )
+        updates = {r["id"]: score_fields(r) for r in batch}
+        listing_store.update_listings(updates)
+        spatial.invalidate()
+        total += len(batch)
+    return total
+
+
+def process_pending_listings() -> int:
+    _requested.set()
+    total = 0
+    while _requested.is_set():
+        if not _job_lock.acquire(blocking=False):
+            return total
+        try:
+            _requested.clear()
+            while True:
+                done = _geocode_pending_batch()
+                total += done
+                if done < GEOCODE_BATCH_LIMIT:
+                    break
+            total += rescore_listings()
+        finally:
+            _job_lock.release()
+    return total
+
+
+class RecordParser:
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+        self.line_no = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buf = ""
+        self._pending = ""
+        self._header: list[str] | None = None
+
+    def feed(self, chunk: bytes) -> list[tuple[int, dict | str]]:
+        self._buf += self._decoder.decode(chunk)
+        *lines, self._buf = self._buf.split("\n")
+        return self._records(lines)
+
+    def close(self) -> list[tuple[int, dict | str]]:
+        self._buf += self._decoder.decode(b"", final=True)
+        lines = [self._buf] if self._buf else []
+        self._buf = ""
+        out = self._records(lines)
+        if self._pending:
+            out.append((self.line_no, "Unterminated quoted field"))
+            self._pending = ""
+        return out
+
+    def _records(self, lines: list[str]) -> list[tuple[int, dict | str]]:
+        out: list[tuple[int, dict | str]] = []
+        for line in lines:
+            self.line_no += 1
+            line = line.rstrip("\r")
+            if self.fmt == "csv":
+                text = self._pending + line
+                if text.count('"') % 2:
+                    self._pending = text + "\n"
+                    continue
+                self._pending = ""
+                if not text.strip():
+                    continue
+                fields = next(csv.reader([text]))
+                if self._header is None:
+                    self._header = [h.strip().lower() for h in fields]
+                    continue
+                out.append((self.line_no, {k: (v if v != "" else None) for k, v in zip(self._header, fields)}))
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                out.append((self.line_no, f"Invalid JSON: {e}"))
+                continue
+            if not isinstance(record, dict):
+                out.append((self.line_no, "Expected a JSON object"))
+                continue
+            out.append((self.line_no, record))
+        return out
+
+
+class BulkIngest:
+    def __init__(self, batch_size: int = BULK_INGEST_BATCH) -> None:
+        self.batch_size = batch_size
+        self.batch: list[dict] = []
+        self.received = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors: list[dict] = []
+        self._seen: set[str] = set()
+        self._prefix = new_listing_id()
+        self._started = time.perf_counter()
+
+    def _error(self, line_no: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < BULK_MAX_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def add(self, line_no: int, record: dict | str) -> bool:
+        self.received += 1
+        if isinstance(record, str):
+            self._error(line_no, record)
+            return False
+        try:
+            listing = ListingIn.model_validate(record)
+        except ValidationError as e:
+            self._error(line_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            return False
+        key = address_key(listing.address)
+        if not key:
+            self._error(line_no, "address: must not be blank")
+            return False
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        self.batch.append(new_listing_row(listing, f"{self._prefix}-{self.received}"))
+        return len(self.batch) >= self.batch_size
+
+    def flush(self) -> None:
+        rows, self.batch = self.batch, []
+        if not rows:
+            return
+        prefetch_census(addresses=[r["address"] for r in rows])
+        for row in rows:
+            row.update(score_fields(row))
+        inserted, duplicates = listing_store.insert_new(rows)
+        self.inserted += inserted
+        self.duplicates += duplicates
+
+    def result(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "ok": True,
+            "received": self.received,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.received / elapsed, 1) if elapsed else None,
+        }
+
+
+def ingest_file(path: Path, fmt: str | None = None, chunk_size: int = 1 << 16) -> dict:
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+    parser = RecordParser(fmt)
+    bulk = BulkIngest()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            for line_no, record in parser.feed(chunk):
+                if bulk.add(line_no, record):
+                    bulk.flush()
+    for line_no, record in parser.close():
+        bulk.add(line_no, record)
+    bulk.flush()
+    return bulk.result()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintenance jobs for ingested listings.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("geocode", help="Geocode listings that have not been geocoded yet")
+    rescore = sub.add_parser("rescore", help="Recompute stored risk for stale listings")
+    rescore.add_argument("--all", action="store_true", help="Rescore every listing, not only stale ones")
+    bulk = sub.add_parser("bulk", help="Ingest an NDJSON or CSV file of listings")
+    bulk.add_argument("path", type=Path)
+    bulk.add_argument("--format", choices=("ndjson", "csv"))
+    args = parser.parse_args(argv)
+    if args.command == "bulk":
+        result = ingest_file(args.path, args.format)
+        print(
+            f"Received {result['received']} rows: {result['inserted']} inserted, "
+            f"{result['duplicates']} duplicates, {result['error_count']} errors "
+            f"in {result['elapsed_seconds']}s ({result['rows_per_second']} rows/s)"
+        )
+        for error in result["errors"][:20]:
+            print(f"  line {error['line']}: {error['error']}")
+        process_pending_listings()
+    elif args.command == "geocode":
+        print(f"Processed {process_pending_listings()} listings")
+    elif args.command == "rescore":
+        print(f"Rescored {rescore_listings(force=args.all)} listings")
+
+
+if __name__ == "__main__":
+    main()
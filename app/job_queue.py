@@ -0,0 +1,175 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from app import db
+from app.config import ALERTS_DB_PATH, JOB_BACKOFF_BASE, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at);
+"""
+
+
+class PermanentJobError(Exception):
+    pass
+
+
+class RetryLater(Exception):
+    def __init__(self, message: str, delay: float) -> None:
+        super().__init__(message)
+        self.delay = delay
+
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_workers: list[threading.Thread] = []
+
+
+def _conn() -> sqlite3.Connection:
+    return db.connect(ALERTS_DB_PATH, _SCHEMA)
+
+
+def enqueue_many(jobs: list[tuple[str, dict, str]]) -> int:
+    if not jobs:
+        return 0
+    now = time.time()
+    conn = _conn()
+    with db.transaction(conn):
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (kind, payload, idempotency_key, run_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(kind, json.dumps(payload), key, now, now, now) for kind, payload, key in jobs],
+        )
+        added = conn.total_changes - before
+    _wakeup.set()
+    return added
+
+
+def enqueue(kind: str, payload: dict, idempotency_key: str) -> bool:
+    return enqueue_many([(kind, payload, idempotency_key)]) == 1
+
+
+def claim() -> dict | None:
+    now = time.time()
+    conn = _conn()
+    with db.transaction(conn):
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' AND run_at <= ? ORDER BY run_at LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND locked_until < ? LIMIT 1",
+                (now,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_until = ?, updated_at = ? "
+            "WHERE id = ? RETURNING id, kind, payload, idempotency_key, attempts",
+            (now + JOB_LEASE_SECONDS, now, row["id"]),
+        ).fetchone()
+    return {**dict(job), "payload": json.loads(job["payload"])}
+
+
+def complete(job_id: int) -> None:
+    _conn().execute(
+        "UPDATE jobs SET status = 'done', locked_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+        (time.time(), job_id),
+    )
+
+
+def fail(job_id: int, attempts: int, error: str, permanent: bool = False) -> None:
+    now = time.time()
+    if permanent or attempts >= JOB_MAX_ATTEMPTS:
+        status, run_at = "failed", now
+    else:
+        delay = JOB_BACKOFF_BASE * 2 ** (attempts - 1)
+        status, run_at = "queued", now + delay * random.uniform(0.8, 1.2)
+    _conn().execute(
+        "UPDATE jobs SET status = ?, run_at = ?, locked_until = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+        (status, run_at, error[:500], now, job_id),
+    )
+
+
+def defer(job_id: int, delay: float, error: str) -> None:
+    now = time.time()
+    _conn().execute(
+        "UPDATE jobs SET status = 'queued', attempts = attempts - 1, run_at = ?, locked_until = NULL, "
+        "last_error = ?, updated_at = ? WHERE id = ?",
+        (now + delay, error[:500], now, job_id),
+    )
+
+
+def run_one(handlers: dict[str, Callable[[dict], Any]]) -> bool:
+    job = claim()
+    if job is None:
+        return False
+    handler = handlers.get(job["kind"])
+    try:
+        if handler is None:
+            raise PermanentJobError(f"No handler for job kind {job['kind']!r}")
+        handler({**job["payload"], "idempotency_key": job["idempotency_key"]})
+    except RetryLater as e:
+        defer(job["id"], e.delay, str(e))
+    except PermanentJobError as e:
+        fail(job["id"], job["attempts"], str(e), permanent=True)
+    except Exception as e:
+        fail(job["id"], job["attempts"], str(e) or type(e).__name__)
+    else:
+        complete(job["id"])
+    return True
+
+
+def _worker_loop(handlers: dict[str, Callable[[dict], Any]], poll_interval: float) -> None:
+    while not _stop.is_set():
+        try:
+            if run_one(handlers):
+                continue
+        except sqlite3.Error:
+            pass
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+
+
+def start_workers(count: int, handlers: dict[str, Callable[[dict], Any]], poll_interval: float = 1.0) -> None:
+    _stop.clear()
+    for idx in range(count):
+        thread = threading.Thread(
+            target=_worker_loop,
+            args=(handlers, poll_interval),
+            name=f"job-worker-{idx}",
+            daemon=True,
+        )
+        thread.start()
+        _workers.append(thread)
+
+
+def stop_workers(timeout: float = 5.0) -> None:
+    _stop.set()
+    _wakeup.set()
+    for thread in _workers:
+        thread.join(timeout)
+    _workers.clear()
+
+
+def stats() -> dict[str, int]:
+    rows = _conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    return {r["status"]: r["n"] for r in rows}
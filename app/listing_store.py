@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from app import db
+from app.address import address_key
+from app.config import DATA_DIR, LISTINGS_DB_PATH
+
+INGESTED_PATH = DATA_DIR / "ingested_listings.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id TEXT PRIMARY KEY,
+    address TEXT NOT NULL,
+    price INTEGER,
+    source TEXT NOT NULL,
+    listed_at TEXT NOT NULL,
+    zip_code TEXT,
+    lat REAL,
+    lng REAL,
+    score INTEGER,
+    geocoded_at INTEGER,
+    rules_version TEXT,
+    data_vintage TEXT,
+    address_key TEXT,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS listings_listed_at ON listings (listed_at);
+CREATE INDEX IF NOT EXISTS listings_zip_listed_at ON listings (zip_code, listed_at);
+CREATE INDEX IF NOT EXISTS listings_score ON listings (score);
+CREATE INDEX IF NOT EXISTS listings_pending_geocode ON listings (id) WHERE geocoded_at IS NULL;
+"""
+
+COLUMNS = (
+    "id",
+    "address",
+    "price",
+    "source",
+    "listed_at",
+    "zip_code",
+    "lat",
+    "lng",
+    "geocoded_at",
+    "rules_version",
+    "data_vintage",
+    "address_key",
+)
+
+_ADDRESS_KEY_VERSION = 1
+
+_migrate_lock = threading.Lock()
+_migrated = False
+
+
+def utc_timestamp(ts: float | None = None) -> str:
+    return datetime.fromtimestamp(time.time() if ts is None else ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _conn():
+    conn = db.connect(LISTINGS_DB_PATH, _SCHEMA)
+    if not _migrated:
+        migrate_json(conn)
+    return conn
+
+
+def _upgrade_schema(conn) -> None:
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(listings)")}
+    if "address_key" not in columns:
+        conn.execute("ALTER TABLE listings ADD COLUMN address_key TEXT")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < _ADDRESS_KEY_VERSION:
+        rows = conn.execute("SELECT id, address FROM listings").fetchall()
+        with db.transaction(conn):
+            conn.executemany(
+                "UPDATE listings SET address_key = ? WHERE id = ?",
+                [(address_key(r["address"]), r["id"]) for r in rows],
+            )
+            conn.execute(f"PRAGMA user_version = {_ADDRESS_KEY_VERSION}")
+    conn.execute("CREATE INDEX IF NOT EXISTS listings_address_key ON listings (address_key)")
+
+
+def _to_params(row: dict) -> dict[str, Any]:
+    params = {col: row.get(col) for col in COLUMNS}
+    params["address_key"] = address_key(row.get("address"))
+    risk = row.get("risk") or {}
+    params["score"] = risk.get("score")
+    params["data"] = json.dumps({k: v for k, v in row.items() if k not in COLUMNS})
+    return params
+
+
+def _from_row(record) -> dict:
+    out = {col: record[col] for col in COLUMNS if record[col] is not None}
+    out.update(json.loads(record["data"] or "{}"))
+    return out
+
+
+def _insert_sql(conflict: str = "ABORT") -> str:
+    cols = COLUMNS + ("score", "data")
+    return (
+        f"INSERT OR {conflict} INTO listings ({', '.join(cols)}) "
+        f"VALUES ({', '.join(':' + c for c in cols)})"
+    )
+
+
+def _legacy_listed_at(row: dict) -> str:
+    if row.get("listed_at"):
+        return row["listed_at"]
+    suffix = str(row.get("id", "")).rsplit("-", 1)[-1]
+    if suffix.isdigit():
+        return utc_timestamp(int(suffix) / 1000)
+    return utc_timestamp()
+
+
+def migrate_json(conn=None) -> int:
+    global _migrated
+    with _migrate_lock:
+        if _migrated:
+            return 0
+        conn = conn or db.connect(LISTINGS_DB_PATH, _SCHEMA)
+        _upgrade_schema(conn)
+        count = 0
+        if INGESTED_PATH.exists():
+            try:
+                with open(INGESTED_PATH) as f:
+                    rows = json.load(f).get("listings", [])
+            except Exception:
+                rows = []
+            with db.transaction(conn):
+                conn.executemany(
+                    _insert_sql("IGNORE"),
+                    [_to_params({**r, "listed_at": _legacy_listed_at(r)}) for r in rows if r.get("id")],
+                )
+            os.replace(INGESTED_PATH, INGESTED_PATH.with_suffix(".json.migrated"))
+            count = len(rows)
+        _migrated = True
+        return count
+
+
+def add_listing(row: dict) -> None:
+    row.setdefault("listed_at", utc_timestamp())
+    _conn().execute(_insert_sql(), _to_params(row))
+
+
+def insert_new(rows: list[dict]) -> tuple[int, int]:
+    if not rows:
+        return 0, 0
+    conn = _conn()
+    params = [_to_params(row) for row in rows]
+    keys = list({p["address_key"] for p in params})
+    with db.transaction(conn):
+        existing: set[str] = set()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            existing.update(
+                r[0] for r in conn.execute(
+                    f"SELECT address_key FROM listings WHERE address_key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        fresh = []
+        for p in params:
+            if p["address_key"] in existing:
+                continue
+            existing.add(p["address_key"])
+            fresh.append(p)
+        conn.executemany(_insert_sql(), fresh)
+    return len(fresh), len(params) - len(fresh)
+
+
+def get_listing(listing_id: str) -> dict | None:
+    record = _conn().execute("SELECT * FROM listings WHERE id = ?", (listing_id,)).fetchone()
+    return _from_row(record) if record else None
+
+
+def update_listings(updates: dict[str, dict]) -> None:
+    if not updates:
+        return
+    conn = _conn()
+    with db.transaction(conn):
+        for listing_id, changes in updates.items():
+            record = conn.execute("SELECT * FROM listings WHERE id = ?", (listing_id,)).fetchone()
+            if record is None:
+                continue
+            conn.execute(_insert_sql("REPLACE"), _to_params({**_from_row(record), **changes}))
+
+
+def query_listings(
+    zip_code: str | None = None,
+    min_score: int | None = None,
+    max_score: int | None = None,
+    source: str | None = None,
+    since: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[dict]:
+    clauses, params = [], []
+    if zip_code:
+        clauses.append("zip_code = ?")
+        params.append(zip_code)
+    if min_score is not None:
+        clauses.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("score <= ?")
+        params.append(max_score)
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    if since:
+        clauses.append("listed_at >= ?")
+        params.append(since)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    records = _conn().execute(
+        f"SELECT * FROM listings {where} ORDER BY listed_at DESC, id DESC LIMIT ? OFFSET ?",
+        (*params, limit, offset),
+    ).fetchall()
+    return [_from_row(r) for r in records]
+
+
+def pending_geocode(limit: int) -> list[dict]:
+    records = _conn().execute(
+        "SELECT * FROM listings WHERE geocoded_at IS NULL LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [_from_row(r) for r in records]
+
+
+def iter_stale(
+    rules_version: str,
+    data_vintage: str,
+    batch_size: int,
+    force: bool = False,
+) -> Iterator[list[dict]]:
+    after = ""
+    while True:
+        records = _conn().execute(
+            "SELECT * FROM listings WHERE id > ? AND (? OR score IS NULL OR rules_version IS NOT ? OR data_vintage IS NOT ?) "
+            "ORDER BY id LIMIT ?",
+            (after, force, rules_version, data_vintage, batch_size),
+        ).fetchall()
+        if not records:
+            return
+        after = records[-1]["id"]
+        yield [_from_row(r) for r in records]
+
+
+def geocoded_points() -> list[tuple]:
+    return [
+        tuple(r)
+        for r in _conn().execute(
+            "SELECT id, address, price, listed_at, lat, lng, score FROM listings "
+            "WHERE lat IS NOT NULL AND lng IS NOT NULL"
+        )
+    ]
+
+
+def count_listings() -> int:
+    return _conn().execute("SELECT COUNT(*) FROM listings").fetchone()[0]
@@ -1,11 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import http_clients, job_queue, spatial
+from app.alert_service import JOB_HANDLERS
+from app.config import ALERT_WORKERS
+from app.ingest import process_pending_listings
+from app.request_scope import RequestScopeMiddleware
 from app.routers import alerts, assistance, health, listings, metrics, risk
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    http_clients.open_clients()
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, process_pending_listings)
+    loop.run_in_executor(None, spatial.get_index)
+    job_queue.start_workers(ALERT_WORKERS, JOB_HANDLERS)
+    yield
+    job_queue.stop_workers()
+    await http_clients.close_clients()
+
+
 app = FastAPI(
     title="First-Mover Alert API",
     description="Reduce reaction time for local buyers. Transparency in institutional real estate activity.",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +36,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestScopeMiddleware)
 
 app.include_router(health.router)
 app.include_router(listings.router)
@@ -0,0 +1,25 @@
+from contextvars import ContextVar
+
+_memo: ContextVar[dict | None] = ContextVar("request_memo", default=None)
+
+
+def request_memo(namespace: str) -> dict | None:
+    memo = _memo.get()
+    if memo is None:
+        return None
+    return memo.setdefault(namespace, {})
+
+
+class RequestScopeMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _memo.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _memo.reset(token)
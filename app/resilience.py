@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+from app.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_LIMIT_COOLDOWN,
+    BREAKER_RESET_SECONDS,
+    PROVIDER_RATE_LIMITS,
+    RATE_LIMIT_MAX_WAIT,
+)
+
+
+class ProviderUnavailable(Exception):
+    def __init__(self, message: str, retry_in: float = 0.0) -> None:
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float | None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def tokens(self) -> float:
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.burst, self._tokens + elapsed * self.rate)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._open_until = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() < self._open_until:
+                    return False
+                self.state = "half_open"
+                self._trial = False
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                return
+            self.state = "closed"
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "open":
+                return
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self._open(self.reset_seconds)
+
+    def trip(self, seconds: float) -> None:
+        with self._lock:
+            self._open(seconds)
+
+    def _open(self, seconds: float) -> None:
+        self.state = "open"
+        self._open_until = time.monotonic() + seconds
+        self._trial = False
+
+    def retry_in(self) -> float:
+        return max(0.0, self._open_until - time.monotonic()) if self.state == "open" else 0.0
+
+
+class Provider:
+    def __init__(self, name: str, rate: float) -> None:
+        self.name = name
+        self.bucket = TokenBucket(rate)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        self.calls = 0
+        self.rejected = 0
+
+    def admit(self, max_wait: float) -> float:
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise ProviderUnavailable(f"{self.name} circuit open", self.breaker.retry_in())
+        wait = self.bucket.reserve(max_wait)
+        if wait is None:
+            self.rejected += 1
+            self.breaker.release()
+            raise ProviderUnavailable(f"{self.name} rate limit exceeded", 1 / self.bucket.rate)
+        self.calls += 1
+        return wait
+
+    def record(self, exc: BaseException | None) -> None:
+        if exc is None or _client_error(exc):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "retry_in": round(self.breaker.retry_in(), 1),
+            "rate_per_sec": self.bucket.rate,
+            "tokens": round(self.bucket.tokens(), 2),
+            "calls": self.calls,
+            "rejected": self.rejected,
+        }
+
+
+def _client_error(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status < 500 and status != 429
+    return False
+
+
+PROVIDERS = {name: Provider(name, rate) for name, rate in PROVIDER_RATE_LIMITS.items()}
+
+
+@contextmanager
+def guard(name: str, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    provider = PROVIDERS[name]
+    wait = provider.admit(max_wait)
+    try:
+        if wait:
+            time.sleep(wait)
+        yield provider
+    except Exception as e:
+        provider.record(e)
+        raise
+    except BaseException:
+        provider.breaker.release()
+        raise
+    provider.record(None)
+
+
+@asynccontextmanager
+async def guard_async(name: str, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    provider = PROVIDERS[name]
+    wait = provider.admit(max_wait)
+    try:
+        if wait:
+            await asyncio.sleep(wait)
+        yield provider
+    except Exception as e:
+        provider.record(e)
+        raise
+    except BaseException:
+        provider.breaker.release()
+        raise
+    provider.record(None)
+
+
+def throttle(name: str, seconds: float = BREAKER_LIMIT_COOLDOWN) -> None:
+    PROVIDERS[name].breaker.trip(seconds)
+
+
+def stats() -> dict[str, dict]:
+    return {name: provider.stats() for name, provider in PROVIDERS.items()}
@@ -1,59 +1,88 @@
+import hashlib
 import json
-import re
+import threading
 from typing import Any
 
-from app.census import fetch_acs5_for_zcta, geocode_location
+from app import acs_snapshot, entities, risk_table
+from app.address import extract_zip
+from app.census import (
+    fetch_acs5_bulk,
+    fetch_acs5_bulk_async,
+    fetch_acs5_for_zcta,
+    fetch_acs5_for_zcta_async,
+    geocode_batch,
+    geocode_location,
+    geocode_location_async,
+)
 from app.config import DATA_DIR
 
 RULES_PATH = DATA_DIR / "risk_rules.json"
 _RULES: dict[str, Any] | None = None
-
-_CITY_TO_ZIP: dict[str, str] = {
-    "irvine": "92618",
-    "costa mesa": "92626",
-    "santa ana": "92701",
-    "anaheim": "92801",
-    "newport beach": "92660",
-}
+_RULES_VERSION: str | None = None
+_RULES_MTIME: int | None = None
+_rules_lock = threading.Lock()
 
 
 def _clamp_score(value: int) -> int:
     return max(1, min(10, value))
 
 
+def _rules_mtime() -> int | None:
+    try:
+        return RULES_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
 def _load_rules() -> dict[str, Any]:
-    global _RULES
-    if _RULES is not None:
+    global _RULES, _RULES_VERSION, _RULES_MTIME
+    mtime = _rules_mtime()
+    if _RULES is not None and mtime == _RULES_MTIME:
         return _RULES
-    if not RULES_PATH.exists():
-        _RULES = {
-            "default": {
-                "score": 4,
-                "label": "Moderate corporate acquisition risk",
-                "signals": ["No risk data loaded. Add data/risk_rules.json."],
-                "properties_owned": None,
-                "all_cash": None,
-                "related_entities": None,
-                "explanation_fallback": "Risk rules file not found. Using default message.",
+    with _rules_lock:
+        if _RULES is not None and mtime == _RULES_MTIME:
+            return _RULES
+        if mtime is None:
+            rules = {
+                "default": {
+                    "score": 4,
+                    "label": "Moderate corporate acquisition risk",
+                    "signals": ["No risk data loaded. Add data/risk_rules.json."],
+                    "properties_owned": None,
+                    "all_cash": None,
+                    "related_entities": None,
+                    "explanation_fallback": "Risk rules file not found. Using default message.",
+                }
             }
-        }
-        return _RULES
-    with open(RULES_PATH) as f:
-        _RULES = json.load(f)
-    return _RULES
+            version = "builtin"
+        else:
+            try:
+                raw = RULES_PATH.read_bytes()
+                rules = json.loads(raw)
+            except (OSError, ValueError):
+                if _RULES is not None:
+                    return _RULES
+                raise
+            version = hashlib.sha256(raw).hexdigest()[:16]
+        _RULES_VERSION = version
+        _RULES = rules
+        _RULES_MTIME = mtime
+        return rules
 
 
-def _extract_zip(text: str | None) -> str | None:
-    if not text or not text.strip():
-        return None
-    t = text.strip().lower()
-    m = re.search(r"\b(\d{5})(?:-\d{4})?\b", t)
-    if m:
-        return m.group(1)
-    for city, zip_code in _CITY_TO_ZIP.items():
-        if city in t:
-            return zip_code
-    return None
+def rules_version() -> str:
+    _load_rules()
+    return _RULES_VERSION or "builtin"
+
+
+def risk_version() -> tuple[str, str]:
+    return rules_version(), acs_snapshot.data_vintage()
+
+
+def stored_risk_version() -> tuple[str, str]:
+    rules, vintage = risk_version()
+    built = entities.version()
+    return rules, f"{vintage}+entities.{built}" if built else vintage
 
 
 def _profile_for_unknown_zip(zip_code: str) -> dict[str, Any]:
@@ -104,6 +133,61 @@ def _profile_for_unknown_zip(zip_code: str) -> dict[str, Any]:
     }
 
 
+CENSUS_OWNER_SIGNALS = (
+    "Owner-occupant share is below 50% in this ZIP",
+    "Owner-occupant share is below regional norms",
+    "Owner occupancy is healthy but softening",
+    "Owner-occupant share remains comparatively strong",
+)
+CENSUS_VALUE_SIGNALS = (
+    "Higher home values can attract repeat investor targeting",
+    "Home values are elevated enough to draw institutional attention",
+    "Home values are less likely to drive concentrated institutional demand",
+)
+CENSUS_POPULATION_SIGNAL = "Larger ZIP footprint increases investor acquisition opportunities"
+CENSUS_LABELS = (
+    (
+        "Lower corporate acquisition risk",
+        "This location currently shows a stronger owner-occupant mix and lower investor pressure than typical high-competition zones.",
+    ),
+    (
+        "Moderate corporate acquisition risk",
+        "This location shows balanced market activity. Buyers should still monitor new listings early because investor activity is present, but not dominant.",
+    ),
+    (
+        "Moderate-high corporate acquisition risk",
+        "This location shows rising investor pressure, with a softer owner-occupant mix and market conditions that favor faster entity-backed acquisitions.",
+    ),
+    (
+        "High corporate acquisition risk",
+        "This location shows elevated investor pressure, with market conditions that can favor entity-backed and faster acquisitions over owner-occupant buyers.",
+    ),
+)
+
+
+def census_profile(
+    score: int,
+    owner_signal: int,
+    value_signal: int,
+    population_signal: bool,
+    properties_owned: int,
+) -> dict[str, Any]:
+    label_idx = 0 if score <= 3 else 1 if score <= 5 else 2 if score <= 7 else 3
+    label, fallback = CENSUS_LABELS[label_idx]
+    signals = [CENSUS_OWNER_SIGNALS[owner_signal], CENSUS_VALUE_SIGNALS[value_signal]]
+    if population_signal:
+        signals.append(CENSUS_POPULATION_SIGNAL)
+    return {
+        "score": score,
+        "label": label,
+        "signals": signals,
+        "explanation_fallback": fallback,
+        "properties_owned": properties_owned,
+        "all_cash": score >= 6,
+        "related_entities": max(1, round((score - 1) / 2)),
+    }
+
+
 def _profile_from_census(zcta: dict[str, Any]) -> dict[str, Any]:
     owner_units = zcta.get("owner_occupied_units") or 0
     renter_units = zcta.get("renter_occupied_units") or 0
@@ -113,62 +197,39 @@ def _profile_from_census(zcta: dict[str, Any]) -> dict[str, Any]:
     population = zcta.get("population") or 0
 
     score = 4
-    signals: list[str] = []
-
     if owner_share < 0.50:
         score += 3
-        signals.append("Owner-occupant share is below 50% in this ZIP")
+        owner_signal = 0
     elif owner_share < 0.58:
         score += 2
-        signals.append("Owner-occupant share is below regional norms")
+        owner_signal = 1
     elif owner_share < 0.64:
         score += 1
-        signals.append("Owner occupancy is healthy but softening")
+        owner_signal = 2
     else:
         score -= 1
-        signals.append("Owner-occupant share remains comparatively strong")
+        owner_signal = 3
 
     if median_value >= 1_000_000:
         score += 2
-        signals.append("Higher home values can attract repeat investor targeting")
+        value_signal = 0
     elif median_value >= 700_000:
         score += 1
-        signals.append("Home values are elevated enough to draw institutional attention")
+        value_signal = 1
     else:
-        signals.append("Home values are less likely to drive concentrated institutional demand")
+        value_signal = 2
 
-    if population >= 70_000:
+    large = population >= 70_000
+    if large:
         score += 1
-        signals.append("Larger ZIP footprint increases investor acquisition opportunities")
-
-    score = _clamp_score(score)
-
-    if score <= 3:
-        label = "Lower corporate acquisition risk"
-        fallback = "This location currently shows a stronger owner-occupant mix and lower investor pressure than typical high-competition zones."
-    elif score <= 5:
-        label = "Moderate corporate acquisition risk"
-        fallback = "This location shows balanced market activity. Buyers should still monitor new listings early because investor activity is present, but not dominant."
-    elif score <= 7:
-        label = "Moderate-high corporate acquisition risk"
-        fallback = "This location shows rising investor pressure, with a softer owner-occupant mix and market conditions that favor faster entity-backed acquisitions."
-    else:
-        label = "High corporate acquisition risk"
-        fallback = "This location shows elevated investor pressure, with market conditions that can favor entity-backed and faster acquisitions over owner-occupant buyers."
 
-    properties_owned = max(2, round((1 - owner_share) * 24))
-    related_entities = max(1, round((score - 1) / 2))
-    all_cash = score >= 6
-
-    return {
-        "score": score,
-        "label": label,
-        "signals": signals,
-        "explanation_fallback": fallback,
-        "properties_owned": properties_owned,
-        "all_cash": all_cash,
-        "related_entities": related_entities,
-    }
+    return census_profile(
+        score=_clamp_score(score),
+        owner_signal=owner_signal,
+        value_signal=value_signal,
+        population_signal=large,
+        properties_owned=max(2, round((1 - owner_share) * 24)),
+    )
 
 
 def _profile_for_geocoded_area(latitude: float, longitude: float) -> dict[str, Any]:
@@ -219,55 +280,148 @@ def _profile_for_geocoded_area(latitude: float, longitude: float) -> dict[str, A
     }
 
 
-def _resolve_zip(address: str | None, zip_code: str | None) -> str | None:
-    if zip_code:
-        return zip_code
+def _prefetch_zips(
+    zip_codes: list[str] | None,
+    addresses: list[str | None] | None,
+) -> list[str]:
+    wanted = [z for z in (zip_codes or []) if z]
+    wanted += [z for z in map(extract_zip, addresses or []) if z]
+    return wanted
 
-    extracted = _extract_zip(address)
-    if extracted:
-        return extracted
 
-    if not address:
-        return None
+def prefetch_census(
+    zip_codes: list[str] | None = None,
+    addresses: list[str | None] | None = None,
+) -> dict[str, dict | None]:
+    wanted = _prefetch_zips(zip_codes, addresses)
+    return fetch_acs5_bulk(wanted) if wanted else {}
 
-    geo = geocode_location(address)
-    if geo:
-        return geo.get("zip_code")
-    return None
 
+async def prefetch_census_async(
+    zip_codes: list[str] | None = None,
+    addresses: list[str | None] | None = None,
+) -> dict[str, dict | None]:
+    wanted = _prefetch_zips(zip_codes, addresses)
+    return await fetch_acs5_bulk_async(wanted) if wanted else {}
 
-def compute_risk(
-    address: str | None = None,
-    zip_code: str | None = None,
+
+def _table_profile(zip_code: str) -> dict[str, Any] | None:
+    hit = risk_table.lookup(zip_code, *risk_version())
+    if hit is None:
+        return None
+    source, profile = hit
+    if source == risk_table.SOURCE_CENSUS:
+        return census_profile(**profile)
+    if source == risk_table.SOURCE_NONE:
+        return _profile_for_unknown_zip(zip_code)
+    return profile
+
+
+def _select_profile(
+    rules: dict[str, Any],
+    resolved_zip: str | None,
+    census_row: dict | None,
+    geo: dict | None,
 ) -> dict[str, Any]:
-    rules = _load_rules()
-    resolved_zip = _resolve_zip(address, zip_code)
     if resolved_zip and resolved_zip in rules:
-        profile = rules[resolved_zip]
-    elif resolved_zip:
-        census_profile = fetch_acs5_for_zcta(resolved_zip)
-        if census_profile:
-            profile = _profile_from_census(census_profile)
-        else:
-            profile = _profile_for_unknown_zip(resolved_zip)
-    elif address:
-        geo = geocode_location(address)
-        if geo:
-            profile = _profile_for_geocoded_area(
-                latitude=float(geo["latitude"]),
-                longitude=float(geo["longitude"]),
-            )
-        else:
-            profile = rules.get("default", _profile_for_unknown_zip("00000"))
-    else:
-        profile = rules.get("default", _profile_for_unknown_zip("00000"))
+        return rules[resolved_zip]
+    if resolved_zip:
+        if census_row:
+            return _profile_from_census(census_row)
+        return _profile_for_unknown_zip(resolved_zip)
+    if geo:
+        return _profile_for_geocoded_area(
+            latitude=float(geo["latitude"]),
+            longitude=float(geo["longitude"]),
+        )
+    return rules.get("default", _profile_for_unknown_zip("00000"))
+
+
+def _risk_result(profile: dict[str, Any], resolved_zip: str | None) -> dict[str, Any]:
+    owners = entities.zip_summary(resolved_zip) or profile
     return {
         "score": int(profile.get("score", 4)),
         "label": profile.get("label", "Moderate corporate acquisition risk"),
         "signals": list(profile.get("signals", [])),
         "explanation": profile.get("explanation_fallback", "Institutional activity varies by area. Early alerts can help local buyers."),
-        "properties_owned": profile.get("properties_owned"),
+        "properties_owned": owners.get("properties_owned"),
         "all_cash": profile.get("all_cash"),
-        "related_entities": profile.get("related_entities"),
+        "related_entities": owners.get("related_entities"),
         "resolved_zip": resolved_zip,
     }
+
+
+def compute_risk(
+    address: str | None = None,
+    zip_code: str | None = None,
+    geocode: bool = True,
+) -> dict[str, Any]:
+    rules = _load_rules()
+    resolved_zip = zip_code or extract_zip(address)
+    geo = None
+    if not resolved_zip and address and geocode:
+        geo = geocode_location(address)
+        resolved_zip = geo.get("zip_code") if geo else None
+    census_row = None
+    if resolved_zip and resolved_zip not in rules:
+        profile = _table_profile(resolved_zip)
+        if profile is not None:
+            return _risk_result(profile, resolved_zip)
+        census_row = fetch_acs5_for_zcta(resolved_zip)
+    return _risk_result(_select_profile(rules, resolved_zip, census_row, geo), resolved_zip)
+
+
+async def compute_risk_async(
+    address: str | None = None,
+    zip_code: str | None = None,
+    geocode: bool = True,
+) -> dict[str, Any]:
+    rules = _load_rules()
+    resolved_zip = zip_code or extract_zip(address)
+    geo = None
+    if not resolved_zip and address and geocode:
+        geo = await geocode_location_async(address)
+        resolved_zip = geo.get("zip_code") if geo else None
+    census_row = None
+    if resolved_zip and resolved_zip not in rules:
+        profile = _table_profile(resolved_zip)
+        if profile is not None:
+            return _risk_result(profile, resolved_zip)
+        census_row = await fetch_acs5_for_zcta_async(resolved_zip)
+    return _risk_result(_select_profile(rules, resolved_zip, census_row, geo), resolved_zip)
+
+
+def compute_risk_batch(
+    items: list[tuple[str | None, str | None]],
+    geocode: bool = True,
+) -> list[dict[str, Any]]:
+    rules = _load_rules()
+    resolved = [zip_code or extract_zip(address) for address, zip_code in items]
+    geos: dict[int, dict | None] = {}
+    if geocode:
+        unresolved = [i for i, (address, _zip) in enumerate(items) if not resolved[i] and address]
+        try:
+            matches = geocode_batch([items[i][0] for i in unresolved]) if unresolved else []
+        except Exception:
+            matches = [None] * len(unresolved)
+        for i, geo in zip(unresolved, matches):
+            geos[i] = geo
+            resolved[i] = geo.get("zip_code") if geo else None
+    by_zip: dict[str | None, dict[str, Any]] = {}
+    for zip_code in {z for z in resolved if z and z not in rules}:
+        profile = _table_profile(zip_code)
+        if profile is not None:
+            by_zip[zip_code] = _risk_result(profile, zip_code)
+    wanted = sorted({z for z in resolved if z and z not in rules and z not in by_zip})
+    census = fetch_acs5_bulk(wanted) if wanted else {}
+    results = []
+    for i, resolved_zip in enumerate(resolved):
+        geo = geos.get(i) if not resolved_zip else None
+        if geo is None and resolved_zip in by_zip:
+            result = by_zip[resolved_zip]
+        else:
+            result = _risk_result(_select_profile(rules, resolved_zip, census.get(resolved_zip), geo), resolved_zip)
+            if geo is None:
+                by_zip[resolved_zip] = result
+        results.append({**result, "signals": list(result["signals"])})
+    return results
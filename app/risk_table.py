@@ -0,0 +1,148 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app import acs_snapshot
+from app.config import RISK_TABLE_CHECK_INTERVAL, RISK_TABLE_PATH
+
+SOURCE_NONE = 0
+SOURCE_CENSUS = 1
+SOURCE_RULES = 2
+DTYPE = [
+    ("source", "u1"),
+    ("score", "i1"),
+    ("owner_signal", "i1"),
+    ("value_signal", "i1"),
+    ("population_signal", "u1"),
+    ("properties_owned", "<i2"),
+    ("rule_idx", "<i2"),
+]
+
+_lock = threading.Lock()
+_table: tuple[tuple[int, int], Any, dict] | None = None
+_checked_at = 0.0
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def load_table(path: Path = RISK_TABLE_PATH) -> tuple[Any, dict] | None:
+    global _table, _checked_at
+    current = _table
+    now = time.monotonic()
+    if current is not None and now - _checked_at < RISK_TABLE_CHECK_INTERVAL:
+        return current[1], current[2]
+    _checked_at = now
+    try:
+        signature = _signature(path)
+    except OSError:
+        _table = None
+        return None
+    if current is not None and current[0] == signature:
+        return current[1], current[2]
+    with _lock:
+        if _table is not None and _table[0] == signature:
+            return _table[1], _table[2]
+        try:
+            with np.load(path) as data:
+                table = data["table"]
+                meta = json.loads(data["meta"].tobytes())
+        except (OSError, ValueError, KeyError):
+            return (current[1], current[2]) if current is not None else None
+        if current is not None and current[2].get("hash") == meta.get("hash"):
+            table, meta = current[1], current[2]
+        _table = (signature, table, meta)
+        return table, meta
+
+
+def lookup(zcta: str, rules_version: str, data_vintage: str) -> tuple[int, dict | None] | None:
+    loaded = load_table()
+    if loaded is None or not zcta.isdigit() or len(zcta) != 5:
+        return None
+    table, meta = loaded
+    if meta.get("rules_version") != rules_version or meta.get("data_vintage") != data_vintage:
+        return None
+    row = table[int(zcta)]
+    source = int(row["source"])
+    if source == SOURCE_RULES:
+        return source, meta["rules"][int(row["rule_idx"])]
+    if source == SOURCE_CENSUS:
+        return source, {
+            "score": int(row["score"]),
+            "owner_signal": int(row["owner_signal"]),
+            "value_signal": int(row["value_signal"]),
+            "population_signal": bool(row["population_signal"]),
+            "properties_owned": int(row["properties_owned"]),
+        }
+    return source, None
+
+
+def build_table(path: Path = RISK_TABLE_PATH) -> dict:
+    from app.risk_engine import _load_rules, risk_version
+    from app.risk_vector import score_snapshot
+
+    loaded = acs_snapshot.load_snapshot()
+    if loaded is not None:
+        census = loaded[0]
+    else:
+        from app.census import _fetch_acs5_table
+
+        census = acs_snapshot.table_from_rows(_fetch_acs5_table("*"))
+    scored = score_snapshot(census)
+    rules_version, data_vintage = risk_version()
+
+    table = np.zeros(acs_snapshot.ZCTA_SLOTS, dtype=DTYPE)
+    table["source"] = np.where(scored["present"], SOURCE_CENSUS, SOURCE_NONE)
+    for col in ("score", "owner_signal", "value_signal", "population_signal", "properties_owned"):
+        table[col] = np.where(scored["present"], scored[col], 0)
+    table["rule_idx"] = -1
+    rules = []
+    for zcta, profile in _load_rules().items():
+        if not zcta.isdigit() or len(zcta) != 5:
+            continue
+        slot = table[int(zcta)]
+        slot["source"] = SOURCE_RULES
+        slot["score"] = int(profile.get("score", 4))
+        slot["rule_idx"] = len(rules)
+        rules.append(profile)
+
+    digest = hashlib.sha256(table.tobytes())
+    digest.update(json.dumps(rules, sort_keys=True).encode())
+    meta = {
+        "rules_version": rules_version,
+        "data_vintage": data_vintage,
+        "built_at": int(time.time()),
+        "zctas": int((table["source"] != SOURCE_NONE).sum()),
+        "hash": digest.hexdigest()[:16],
+        "rules": rules,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, table=table, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+    os.replace(tmp, path)
+    return meta
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the precomputed national risk table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Score every ZCTA and merge risk_rules.json overrides")
+    build.add_argument("--out", type=Path, default=RISK_TABLE_PATH)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        meta = build_table(path=args.out)
+        print(f"Wrote {meta['zctas']} ZCTAs ({len(meta['rules'])} rule overrides) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import time
+from typing import Any
+
+import numpy as np
+
+from app import acs_snapshot
+from app.risk_engine import _profile_from_census, census_profile
+
+
+def _ints(values: Any) -> Any:
+    arr = np.asarray(values, dtype=np.int64)
+    return np.where(arr == acs_snapshot.MISSING, 0, arr)
+
+
+def score_census(owner_units: Any, renter_units: Any, median_value: Any, population: Any) -> dict[str, Any]:
+    owner = _ints(owner_units)
+    total = owner + _ints(renter_units)
+    median = _ints(median_value)
+    share = np.full(owner.shape, 0.5)
+    np.divide(owner, total, out=share, where=total != 0)
+
+    owner_signal = np.select([share < 0.50, share < 0.58, share < 0.64], [0, 1, 2], 3).astype(np.int8)
+    value_signal = np.select([median >= 1_000_000, median >= 700_000], [0, 1], 2).astype(np.int8)
+    population_signal = _ints(population) >= 70_000
+    score = (
+        4
+        + np.array([3, 2, 1, -1], dtype=np.int8)[owner_signal]
+        + np.array([2, 1, 0], dtype=np.int8)[value_signal]
+        + population_signal
+    )
+    score = np.clip(score, 1, 10).astype(np.int8)
+    return {
+        "score": score,
+        "label_idx": np.select([score <= 3, score <= 5, score <= 7], [0, 1, 2], 3).astype(np.int8),
+        "owner_signal": owner_signal,
+        "value_signal": value_signal,
+        "population_signal": population_signal,
+        "properties_owned": np.maximum(2, np.round((1 - share) * 24)).astype(np.int16),
+        "related_entities": np.maximum(1, np.round((score - 1) / 2)).astype(np.int8),
+        "all_cash": score >= 6,
+    }
+
+
+def score_snapshot(table: Any = None) -> dict[str, Any] | None:
+    if table is None:
+        loaded = acs_snapshot.load_snapshot()
+        if loaded is None:
+            return None
+        table = loaded[0]
+    scored = score_census(
+        table["owner_occupied_units"],
+        table["renter_occupied_units"],
+        table["median_home_value"],
+        table["population"],
+    )
+    scored["present"] = np.asarray(table["present"]).astype(bool)
+    return scored
+
+
+def profile_at(scored: dict[str, Any], idx: int) -> dict[str, Any]:
+    return census_profile(
+        score=int(scored["score"][idx]),
+        owner_signal=int(scored["owner_signal"][idx]),
+        value_signal=int(scored["value_signal"][idx]),
+        population_signal=bool(scored["population_signal"][idx]),
+        properties_owned=int(scored["properties_owned"][idx]),
+    )
+
+
+def verify(table: Any = None) -> dict[str, Any]:
+    if table is None:
+        loaded = acs_snapshot.load_snapshot()
+        if loaded is None:
+            raise RuntimeError("No ACS snapshot; run `python -m app.acs_snapshot build` first")
+        table = loaded[0]
+    started = time.perf_counter()
+    scored = score_snapshot(table)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    mismatches = []
+    slots = np.flatnonzero(scored["present"])
+    for idx in slots:
+        row = table[idx]
+        zcta = {col: None if int(row[col]) == acs_snapshot.MISSING else int(row[col]) for col in acs_snapshot.COLUMNS}
+        expected = _profile_from_census(zcta)
+        if (
+            profile_at(scored, idx) != expected
+            or int(scored["related_entities"][idx]) != expected["related_entities"]
+            or bool(scored["all_cash"][idx]) != expected["all_cash"]
+        ):
+            mismatches.append(f"{idx:05d}")
+    return {"zctas": len(slots), "mismatches": mismatches, "vector_ms": round(elapsed_ms, 2)}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Vectorized census risk scoring.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("verify", help="Score the ACS snapshot in one pass and compare with the scalar scorer")
+    args = parser.parse_args(argv)
+    if args.command == "verify":
+        result = verify()
+        print(f"Scored {result['zctas']} ZCTAs in {result['vector_ms']} ms, {len(result['mismatches'])} mismatches")
+        if result["mismatches"]:
+            print(" ".join(result["mismatches"][:50]))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,29 @@
+import asyncio
 import json
-import time
-
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-
-from app.config import DATA_DIR
-from app.census import fetch_acs5_for_zcta
-from app.risk_engine import compute_risk
-from app.explain import generate_risk_explanation
+from datetime import datetime
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+
+from app import centroids, listing_store
+from app.alert_service import enqueue_listing_alerts
+from app.config import DATA_DIR, LISTINGS_CONCURRENCY, LISTINGS_PAGE_DEADLINE
+from app.census import fetch_acs5_for_zcta_async
+from app.risk_engine import compute_risk_async, prefetch_census_async, stored_risk_version
+from app.explain import generate_risk_explanation_async
+from app.ingest import (
+    BulkIngest,
+    ListingIn,
+    RecordParser,
+    is_stale,
+    mark_alert_due,
+    new_listing_row,
+    process_pending_listings,
+    score_fields,
+)
 
 router = APIRouter(prefix="/listings", tags=["listings"])
 
 DEFAULT_ZCTAS = ["92618", "92626", "92701", "92606", "92801", "92660"]
-INGESTED_PATH = DATA_DIR / "ingested_listings.json"
-
-ZIP_CENTERS = {
-    "92618": [33.64, -117.79],
-    "92626": [33.64, -117.91],
-    "92701": [33.74, -117.87],
-    "92606": [33.69, -117.83],
-    "92801": [33.83, -117.96],
-    "92660": [33.62, -117.93],
-}
 
 
 def _zctas_from_rules() -> list[str]:
@@ -37,26 +39,9 @@ def _zctas_from_rules() -> list[str]:
         return DEFAULT_ZCTAS
 
 
-def _load_ingested() -> list[dict]:
-    if not INGESTED_PATH.exists():
-        return []
-    try:
-        with open(INGESTED_PATH) as f:
-            data = json.load(f)
-        return data.get("listings", [])
-    except Exception:
-        return []
-
-
-def _save_ingested(listings: list[dict]) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(INGESTED_PATH, "w") as f:
-        json.dump({"listings": listings}, f, indent=2)
-
-
 def _area_to_listing(area: dict, risk: dict) -> dict:
     zcta = area["zcta"]
-    coords = ZIP_CENTERS.get(zcta)
+    coords = centroids.get(zcta)
     out = {
         "id": zcta,
         "address": area.get("name") or f"ZIP {zcta}",
@@ -77,9 +62,19 @@ def _area_to_listing(area: dict, risk: dict) -> dict:
     return out
 
 
-def _ingested_to_listing(row: dict) -> dict:
-    risk = compute_risk(address=row.get("address"))
-    return {
+async def _stored_risk(row: dict) -> dict:
+    if row.get("risk"):
+        return row["risk"]
+    return await compute_risk_async(
+        address=row.get("address"),
+        zip_code=row.get("zip_code"),
+        geocode=False,
+    )
+
+
+async def _ingested_to_listing(row: dict, risk: dict | None = None) -> dict:
+    risk = risk or await _stored_risk(row)
+    out = {
         "id": row["id"],
         "address": row.get("address", ""),
         "price": row.get("price"),
@@ -91,56 +86,120 @@ def _ingested_to_listing(row: dict) -> dict:
             "explanation": risk["explanation"],
         },
     }
+    if row.get("lat") is not None and row.get("lng") is not None:
+        out["lat"], out["lng"] = row["lat"], row["lng"]
+    return out
+
+
+async def _area_item(zcta: str, areas: dict[str, dict | None]) -> dict | None:
+    area = areas[zcta] if zcta in areas else await fetch_acs5_for_zcta_async(zcta)
+    if not area:
+        return None
+    risk = await compute_risk_async(zip_code=zcta)
+    return _area_to_listing(area, risk)
+
+
+async def _gather_until(coros: list, semaphore: asyncio.Semaphore, timeout: float) -> tuple[list, bool]:
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    tasks = [asyncio.ensure_future(bounded(c)) for c in coros]
+    if not tasks:
+        return [], False
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, timeout))
+    for task in pending:
+        task.cancel()
+    results = []
+    for task in tasks:
+        if task in done and task.exception() is None:
+            results.append(task.result())
+        else:
+            results.append(None)
+    return results, bool(pending)
 
 
 @router.get("")
-def list_listings(
+async def list_listings(
+    background_tasks: BackgroundTasks,
     zip_code: str | None = Query(None),
+    min_score: int | None = Query(None, ge=1, le=10),
+    max_score: int | None = Query(None, ge=1, le=10),
+    source: str | None = Query(None),
+    since: datetime | None = Query(None, description="Only listings ingested at or after this time"),
     limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
 ):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LISTINGS_PAGE_DEADLINE
+    rows = await asyncio.to_thread(
+        listing_store.query_listings,
+        zip_code=zip_code,
+        min_score=min_score,
+        max_score=max_score,
+        source=source,
+        since=listing_store.utc_timestamp(since.timestamp()) if since else None,
+        limit=limit,
+        offset=offset,
+    )
+    version = stored_risk_version()
+    if any(is_stale(r, version) for r in rows):
+        background_tasks.add_task(process_pending_listings)
+    zctas: list[str] = []
+    if offset == 0 and not source and not since:
+        zctas = [zip_code] if zip_code else _zctas_from_rules()
+        zctas = zctas[: max(0, limit - len(rows))]
     try:
-        ingested = [_ingested_to_listing(r) for r in _load_ingested()]
+        areas = await asyncio.wait_for(
+            prefetch_census_async(zip_codes=zctas, addresses=[r.get("address") for r in rows if not r.get("risk")]),
+            timeout=LISTINGS_PAGE_DEADLINE,
+        )
     except Exception:
-        ingested = []
-    zctas = [zip_code] if zip_code else _zctas_from_rules()
-    zctas = zctas[: max(0, limit - len(ingested))]
-    for z in zctas:
-        try:
-            area = fetch_acs5_for_zcta(z)
-            if not area:
-                continue
-            risk = compute_risk(zip_code=z)
-            ingested.append(_area_to_listing(area, risk))
-        except Exception:
-            continue
-    return {"listings": ingested[:limit], "source": "U.S. Census Bureau ACS 5-Year (2022) + ingested"}
+        areas = {}
+    items, partial = await _gather_until(
+        [_ingested_to_listing(r) for r in rows] + [_area_item(z, areas) for z in zctas],
+        asyncio.Semaphore(LISTINGS_CONCURRENCY),
+        deadline - loop.time(),
+    )
+    items = [
+        item for item in items
+        if item
+        and (min_score is None or item["risk"]["score"] >= min_score)
+        and (max_score is None or item["risk"]["score"] <= max_score)
+    ]
+    return {
+        "listings": items[:limit],
+        "source": "U.S. Census Bureau ACS 5-Year (2022) + ingested",
+        "partial": partial,
+        "next_offset": offset + len(rows) if len(rows) == limit else None,
+    }
 
 
 @router.get("/{listing_id}")
-def get_listing(listing_id: str):
+async def get_listing(listing_id: str):
     if listing_id.startswith("ingested-"):
-        for row in _load_ingested():
-            if row.get("id") == listing_id:
-                risk = compute_risk(address=row.get("address"))
-                explanation = generate_risk_explanation(
-                    signals=risk["signals"],
-                    score=risk["score"],
-                    label=risk["label"],
-                    fallback=risk["explanation"],
-                    location=risk.get("resolved_zip") or row.get("address"),
-                )
-                out = _ingested_to_listing(row)
-                out["risk"]["explanation"] = explanation
-                out["risk"]["properties_owned"] = risk.get("properties_owned")
-                out["risk"]["all_cash"] = risk.get("all_cash")
-                out["risk"]["related_entities"] = risk.get("related_entities")
-                return out
-        raise HTTPException(status_code=404, detail="Ingested listing not found")
-    area = fetch_acs5_for_zcta(listing_id)
+        row = await asyncio.to_thread(listing_store.get_listing, listing_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Ingested listing not found")
+        risk = await _stored_risk(row)
+        explanation = await generate_risk_explanation_async(
+            signals=risk["signals"],
+            score=risk["score"],
+            label=risk["label"],
+            fallback=risk["explanation"],
+            location=risk.get("resolved_zip") or row.get("address"),
+        )
+        out = await _ingested_to_listing(row, risk)
+        out["risk"]["explanation"] = explanation
+        out["risk"]["properties_owned"] = risk.get("properties_owned")
+        out["risk"]["all_cash"] = risk.get("all_cash")
+        out["risk"]["related_entities"] = risk.get("related_entities")
+        return out
+    area = await fetch_acs5_for_zcta_async(listing_id)
     if not area:
         raise HTTPException(status_code=404, detail="ZIP not found or no Census data")
-    risk = compute_risk(zip_code=listing_id)
-    explanation = generate_risk_explanation(
+    risk = await compute_risk_async(zip_code=listing_id)
+    explanation = await generate_risk_explanation_async(
         signals=risk["signals"],
         score=risk["score"],
         label=risk["label"],
@@ -155,21 +214,33 @@ def get_listing(listing_id: str):
     return listing
 
 
-class ListingIn(BaseModel):
-    address: str
-    price: int | None = None
-    source: str | None = None
-
-
 @router.post("/ingest")
-def ingest_listing(listing: ListingIn):
-    listings = _load_ingested()
-    lid = f"ingested-{int(time.time() * 1000)}"
-    listings.append({
-        "id": lid,
-        "address": listing.address.strip(),
-        "price": listing.price,
-        "source": (listing.source or "ingested").strip() or "ingested",
-    })
-    _save_ingested(listings)
-    return {"ok": True, "id": lid, "address": listing.address}
+def ingest_listing(listing: ListingIn, background_tasks: BackgroundTasks):
+    row = new_listing_row(listing)
+    row.update(score_fields(row))
+    due = mark_alert_due(row)
+    listing_store.add_listing(row)
+    if due:
+        enqueue_listing_alerts([row])
+    background_tasks.add_task(process_pending_listings)
+    return {"ok": True, "id": row["id"], "address": listing.address}
+
+
+@router.post("/ingest/bulk")
+async def ingest_listings_bulk(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: str | None = Query(None, pattern="^(ndjson|csv)$"),
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    parser = RecordParser(fmt)
+    bulk = BulkIngest()
+    async for chunk in request.stream():
+        for line_no, record in parser.feed(chunk):
+            if bulk.add(line_no, record):
+                await asyncio.to_thread(bulk.flush)
+    for line_no, record in parser.close():
+        bulk.add(line_no, record)
+    await asyncio.to_thread(bulk.flush)
+    background_tasks.add_task(process_pending_listings)
+    return bulk.result()
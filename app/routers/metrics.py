@@ -1,24 +1,22 @@
 import json
 from fastapi import APIRouter
+from app import job_queue, listing_store, resilience, subscriber_store, timeseries
+from app.census import ACS_CACHE, GEOCODE_CACHE
+from app.explain import EXPLAIN_CACHE
+from app.routers.risk import MAP_CACHE
 from app.config import DATA_DIR
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
-SUBSCRIBERS_PATH = DATA_DIR / "alert_subscribers.json"
 RISK_RULES_PATH = DATA_DIR / "risk_rules.json"
-INGESTED_PATH = DATA_DIR / "ingested_listings.json"
 
 
 @router.get("")
 def get_metrics():
-    subscribers = 0
-    if SUBSCRIBERS_PATH.exists():
-        try:
-            with open(SUBSCRIBERS_PATH) as f:
-                data = json.load(f)
-            subscribers = len(data.get("subscribers", []))
-        except Exception:
-            pass
+    try:
+        subscribers = subscriber_store.count_subscribers()
+    except Exception:
+        subscribers = 0
     zctas_covered = 0
     if RISK_RULES_PATH.exists():
         try:
@@ -27,16 +25,27 @@ def get_metrics():
             zctas_covered = len([k for k in data if k != "default" and k.isdigit()])
         except Exception:
             pass
-    ingested_count = 0
-    if INGESTED_PATH.exists():
-        try:
-            with open(INGESTED_PATH) as f:
-                data = json.load(f)
-            ingested_count = len(data.get("listings", []))
-        except Exception:
-            pass
+    try:
+        ingested_count = listing_store.count_listings()
+    except Exception:
+        ingested_count = 0
+    try:
+        jobs = job_queue.stats()
+    except Exception:
+        jobs = {}
+    try:
+        history = timeseries.stats()
+    except Exception:
+        history = {}
     return {
         "alert_subscribers": subscribers,
         "zctas_covered": zctas_covered,
         "ingested_listings": ingested_count,
+        "census_cache": ACS_CACHE.stats(),
+        "geocode_cache": GEOCODE_CACHE.stats(),
+        "explain_cache": EXPLAIN_CACHE.stats(),
+        "map_cache": MAP_CACHE.stats(),
+        "alert_jobs": jobs,
+        "providers": resilience.stats(),
+        "purchase_history": history,
     }
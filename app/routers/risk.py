@@ -1,14 +1,25 @@
+import asyncio
+import hashlib
+import json
 import random
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.census import geocode_location
-from app.explain import generate_risk_explanation
-from app.risk_engine import compute_risk
+from app import entities, spatial, tiles, timeseries
+from app.address import normalize_address
+from app.cache import BytesLRU
+from app.census import geocode_location_async
+from app.config import MAP_CACHE_MAX_BYTES, RISK_BATCH_MAX_ITEMS, TILE_MAX_AGE
+from app.explain import cached_risk_explanation, generate_risk_explanation_async, stream_risk_explanation
+from app.risk_engine import compute_risk_async, compute_risk_batch, risk_version
 
 router = APIRouter(prefix="/risk", tags=["risk"])
 
+MAP_CACHE = BytesLRU(MAP_CACHE_MAX_BYTES)
+_map_inflight: dict[tuple, asyncio.Task] = {}
+
 
 class RiskRequest(BaseModel):
     address: str | None = None
@@ -26,6 +37,18 @@ class RiskResponse(BaseModel):
     related_entities: int | None = None
 
 
+class RiskBatchRequest(BaseModel):
+    items: list[RiskRequest]
+
+
+class RiskBatchItem(RiskResponse):
+    resolved_zip: str | None = None
+
+
+class RiskBatchResponse(BaseModel):
+    results: list[RiskBatchItem]
+
+
 class MapMarker(BaseModel):
     id: str
     kind: str
@@ -62,22 +85,99 @@ def _offset(lat: float, lng: float, dx: float, dy: float) -> tuple[float, float]
     return lat + dy, lng + dx
 
 
-def _build_map_payload(location: str, month: int) -> MapResponse:
-    geo = geocode_location(location) or {
+def _parse_bbox(bbox: str | None) -> tuple[float, float, float, float] | None:
+    if not bbox:
+        return None
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+    return west, south, east, north
+
+
+def _listing_layer(
+    lat: float,
+    lng: float,
+    zoom: int,
+    bbox: tuple[float, float, float, float] | None,
+) -> tuple[list[MapMarker], list[MapCluster]] | None:
+    index = spatial.get_index()
+    if not index:
+        return None
+    view = index.query(*(bbox or spatial.viewport(lat, lng, zoom)), zoom=zoom)
+    if not view["points"] and not view["clusters"]:
+        return None
+    markers = [
+        MapMarker(
+            id=p["id"],
+            kind="listing",
+            label=f"Risk {p['score']}/10" if p["score"] is not None else "Listing",
+            lat=p["lat"],
+            lng=p["lng"],
+            title=p["address"],
+            detail=f"${p['price']:,}" if p["price"] else "Price not listed",
+            date=f"Listed {p['listed_at'][:10]}",
+        )
+        for p in view["points"]
+    ]
+    clusters = [
+        MapCluster(
+            id=c["id"],
+            lat=c["lat"],
+            lng=c["lng"],
+            count=c["count"],
+            title="High Investor Concentration" if (c["avg_score"] or 0) >= 7 else "Listings",
+            detail=f"{c['count']} listings, average risk {c['avg_score']}/10" if c["avg_score"] is not None else f"{c['count']} listings",
+            top_buyer="",
+        )
+        for c in view["clusters"]
+    ]
+    return markers, clusters
+
+
+async def _map_context(
+    location: str,
+    zoom: int,
+    bbox: tuple[float, float, float, float] | None,
+) -> tuple[dict | None, dict, tuple | None]:
+    geo = await geocode_location_async(location)
+    center = geo or {"latitude": 33.6846, "longitude": -117.8265}
+    risk = await compute_risk_async(address=location)
+    layer = await asyncio.to_thread(_listing_layer, float(center["latitude"]), float(center["longitude"]), zoom, bbox)
+    return geo, risk, layer
+
+
+def _map_payload(
+    seed: str,
+    month: int,
+    zoom: int,
+    geo: dict | None,
+    risk: dict,
+    layer: tuple | None,
+    location: str,
+) -> MapResponse:
+    geo = geo or {
         "matched_address": location,
         "latitude": 33.6846,
         "longitude": -117.8265,
     }
-    risk = compute_risk(address=location)
     score = int(risk["score"])
 
     llc_pct = min(90, max(20, score * 7 + (risk.get("related_entities") or 0)))
     cash_pct = min(88, llc_pct - 6) if risk.get("all_cash") else min(78, max(18, score * 5 + 8))
     repeat_pct = min(92, max(24, score * 8 + (risk.get("properties_owned") or 0)))
 
+    owners = entities.zip_summary(risk.get("resolved_zip"))
+    buyers = owners["buyers"] if owners and owners["buyers"] else [
+        {"name": "Sunset Holdings LLC", "count": 18},
+        {"name": "Arrow Capital", "count": 12},
+        {"name": "Evergreen Trust", "count": 9},
+        {"name": "Bright Homes LLC", "count": 7},
+    ]
+
     lat = float(geo["latitude"])
     lng = float(geo["longitude"])
-    rng = random.Random(f"{location}:{month}")
+    rng = random.Random(f"{seed}:{month}")
 
     growth = max(0.45, min(1.2, 0.45 + month * 0.055))
     cluster_a = max(3, round(month / 2 + 1))
@@ -147,7 +247,7 @@ def _build_map_payload(location: str, month: int) -> MapResponse:
             count=cluster_a,
             title="High Investor Concentration",
             detail=f"{cluster_a + 6} LLC purchases in last 90 days",
-            top_buyer="Sunset Holdings LLC",
+            top_buyer=buyers[0]["name"],
         ),
         MapCluster(
             id="cluster-b",
@@ -156,51 +256,47 @@ def _build_map_payload(location: str, month: int) -> MapResponse:
             count=cluster_b,
             title="High Investor Concentration",
             detail=f"{cluster_b + 4} LLC purchases in last 90 days",
-            top_buyer="Arrow Capital",
+            top_buyer=buyers[min(1, len(buyers) - 1)]["name"],
         ),
     ]
 
+    if layer is not None:
+        markers, clusters = layer
+
     investor_series = [18, 22, 28, 34, 42, 50, 58, 66, 72, 78, 84, 92]
     family_series = [52, 54, 56, 58, 60, 61, 62, 63, 64, 66, 67, 68]
 
     trim = max(1, min(12, month))
     investor_series = investor_series[:trim] + [investor_series[trim - 1]] * (12 - trim)
     family_series = family_series[:trim] + [family_series[trim - 1]] * (12 - trim)
-
-    buyers = [
-        {"name": "Sunset Holdings LLC", "count": 18},
-        {"name": "Arrow Capital", "count": 12},
-        {"name": "Evergreen Trust", "count": 9},
-        {"name": "Bright Homes LLC", "count": 7},
-    ]
+    breakdown = {"llc": llc_pct, "cash": cash_pct, "repeat": repeat_pct}
+    trend = {
+        "months": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Present"],
+        "investor": investor_series,
+        "family": family_series,
+    }
+    history = timeseries.map_trend(risk.get("resolved_zip"), month)
+    if history is not None:
+        breakdown, trend = history
 
     return MapResponse(
         location=geo["matched_address"],
         center={"lat": lat, "lng": lng},
-        zoom=14,
-        breakdown={
-            "llc": llc_pct,
-            "cash": cash_pct,
-            "repeat": repeat_pct,
-        },
+        zoom=zoom,
+        breakdown=breakdown,
         buyers=buyers,
-        trend={
-            "months": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Present"],
-            "investor": investor_series,
-            "family": family_series,
-            "heat_scale": round(growth, 2),
-        },
+        trend={**trend, "heat_scale": round(growth, 2)},
         markers=markers,
         clusters=clusters,
     )
 
 
 @router.post("/score", response_model=RiskResponse)
-def get_risk_score(req: RiskRequest):
+async def get_risk_score(req: RiskRequest):
     address = req.address or req.raw
-    result = compute_risk(address=address, zip_code=req.zip_code)
+    result = await compute_risk_async(address=address, zip_code=req.zip_code)
     location = result.get("resolved_zip") or (address if address else req.zip_code)
-    explanation = generate_risk_explanation(
+    explanation = await generate_risk_explanation_async(
         signals=result["signals"],
         score=result["score"],
         label=result["label"],
@@ -218,9 +314,120 @@ def get_risk_score(req: RiskRequest):
     )
 
 
+@router.post("/score/batch", response_model=RiskBatchResponse)
+def get_risk_score_batch(req: RiskBatchRequest):
+    if len(req.items) > RISK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {RISK_BATCH_MAX_ITEMS} items per batch")
+    addresses = [item.address or item.raw for item in req.items]
+    results = compute_risk_batch([(address, item.zip_code) for address, item in zip(addresses, req.items)])
+    out = []
+    for address, item, result in zip(addresses, req.items, results):
+        explanation = cached_risk_explanation(
+            signals=result["signals"],
+            score=result["score"],
+            label=result["label"],
+            fallback=result["explanation"],
+            location=result.get("resolved_zip") or (address if address else item.zip_code),
+        )
+        out.append(RiskBatchItem(**{**result, "explanation": explanation}))
+    return RiskBatchResponse(results=out)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/score/stream")
+async def stream_risk_score(req: RiskRequest):
+    address = req.address or req.raw
+    result = await compute_risk_async(address=address, zip_code=req.zip_code)
+    location = result.get("resolved_zip") or (address if address else req.zip_code)
+
+    async def events():
+        yield _sse("risk", {
+            "score": result["score"],
+            "label": result["label"],
+            "signals": result["signals"],
+            "properties_owned": result.get("properties_owned"),
+            "all_cash": result.get("all_cash"),
+            "related_entities": result.get("related_entities"),
+            "explanation_fallback": result["explanation"],
+        })
+        parts = []
+        async for text in stream_risk_explanation(
+            signals=result["signals"],
+            score=result["score"],
+            label=result["label"],
+            fallback=result["explanation"],
+            location=location,
+        ):
+            parts.append(text)
+            yield _sse("token", {"text": text})
+        yield _sse("done", {"explanation": "".join(parts)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _map_key(location: str, zoom: int, bbox: tuple[float, float, float, float] | None) -> tuple:
+    return (
+        normalize_address(location) or location.strip().lower(),
+        zoom,
+        bbox,
+        *risk_version(),
+        spatial.version(),
+        timeseries.version(),
+        entities.version(),
+    )
+
+
+async def _build_map_payloads(key: tuple, location: str, zoom: int, bbox: tuple | None) -> dict[int, bytes]:
+    geo, risk, layer = await _map_context(location, zoom, bbox)
+    bodies = {
+        month: _map_payload(key[0], month, zoom, geo, risk, layer, location).model_dump_json().encode()
+        for month in range(1, 13)
+    }
+    if geo is not None:
+        for month, body in bodies.items():
+            MAP_CACHE.set((*key, month), body)
+    return bodies
+
+
 @router.get("/map", response_model=MapResponse)
-def get_risk_map(
+async def get_risk_map(
+    request: Request,
     location: str = Query(...),
     month: int = Query(12, ge=1, le=12),
+    zoom: int = Query(14, ge=0, le=22),
+    bbox: str | None = Query(None, description="west,south,east,north"),
 ):
-    return _build_map_payload(location=location, month=month)
+    area = _parse_bbox(bbox)
+    key = _map_key(location, zoom, area)
+    body = MAP_CACHE.get((*key, month))
+    if body is None:
+        task = _map_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_build_map_payloads(key, location, zoom, area))
+            _map_inflight[key] = task
+            task.add_done_callback(lambda _t: _map_inflight.pop(key, None))
+        body = (await asyncio.shield(task))[month]
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/tiles/{z}/{x}/{y}")
+def get_risk_tile(z: int, x: int, y: int, request: Request):
+    if not 0 <= z <= 22 or not 0 <= x < 2**z or not 0 <= y < 2**z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    etag = tiles.tile_etag(z, x, y)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={TILE_MAX_AGE}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    content, etag = tiles.render_tile(z, x, y)
+    return Response(content=content, media_type=tiles.MEDIA_TYPE, headers={**headers, "ETag": etag})
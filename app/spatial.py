@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+from app import listing_store
+from app.config import (
+    MAP_CLUSTER_CELL_PX,
+    MAP_CLUSTER_MAX_ZOOM,
+    MAP_INDEX_REFRESH_SECONDS,
+    MAP_MAX_FEATURES,
+)
+
+MAX_LAT = 85.05112878
+TILE_PX = 256
+
+
+def _project(lat: Any, lng: Any) -> tuple[Any, Any]:
+    lat = np.clip(lat, -MAX_LAT, MAX_LAT)
+    x = (np.asarray(lng) + 180.0) / 360.0
+    sin = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return np.clip(x, 0.0, 1 - 1e-12), np.clip(y, 0.0, 1 - 1e-12)
+
+
+def _unproject(x: float, y: float) -> tuple[float, float]:
+    lng = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, lng
+
+
+def viewport(lat: float, lng: float, zoom: int, width: int = 1024, height: int = 768) -> tuple[float, float, float, float]:
+    x, y = _project(np.array([lat]), np.array([lng]))
+    scale = TILE_PX * 2**zoom
+    north, west = _unproject(float(x[0]) - width / 2 / scale, max(0.0, float(y[0]) - height / 2 / scale))
+    south, east = _unproject(float(x[0]) + width / 2 / scale, min(1 - 1e-12, float(y[0]) + height / 2 / scale))
+    return west, south, east, north
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    n = 2**z
+    north, west = _unproject(x / n, y / n)
+    south, east = _unproject((x + 1) / n, (y + 1) / n)
+    return west, south, east, north
+
+
+def project(lat: Any, lng: Any) -> tuple[Any, Any]:
+    return _project(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64))
+
+
+class _Level:
+    def __init__(self, zoom: int, x: Any, y: Any, lat: Any, lng: Any, score: Any) -> None:
+        self.zoom = zoom
+        self.width = max(1, TILE_PX * 2**zoom // MAP_CLUSTER_CELL_PX)
+        keys = (y * self.width).astype(np.int64) * self.width + (x * self.width).astype(np.int64)
+        self.keys, self.first, inverse, self.count = np.unique(
+            keys, return_index=True, return_inverse=True, return_counts=True
+        )
+        self.lat = np.bincount(inverse, lat) / self.count
+        self.lng = np.bincount(inverse, lng) / self.count
+        scored = ~np.isnan(score)
+        scored_count = np.bincount(inverse, scored, minlength=len(self.keys))
+        totals = np.bincount(inverse, np.where(scored, score, 0.0), minlength=len(self.keys))
+        self.avg_score = np.divide(totals, scored_count, out=np.full(len(self.keys), np.nan), where=scored_count > 0)
+        self.max_score = np.full(len(self.keys), -np.inf)
+        np.maximum.at(self.max_score, inverse, np.where(scored, score, -np.inf))
+
+    def ranges(self, x0: float, y0: float, x1: float, y1: float) -> tuple[Any, Any]:
+        cx0, cx1 = int(x0 * self.width), int(x1 * self.width)
+        rows = np.arange(int(y0 * self.width), int(y1 * self.width) + 1, dtype=np.int64) * self.width
+        return self.keys.searchsorted(rows + cx0, "left"), self.keys.searchsorted(rows + cx1, "right")
+
+
+class SpatialIndex:
+    def __init__(self, points: list[tuple]) -> None:
+        self.points = points
+        self.version = time.time_ns()
+        lat = np.array([p[4] for p in points], dtype=np.float64)
+        lng = np.array([p[5] for p in points], dtype=np.float64)
+        score = np.array([np.nan if p[6] is None else p[6] for p in points], dtype=np.float64)
+        x, y = _project(lat, lng)
+        self.levels = [_Level(z, x, y, lat, lng, score) for z in range(MAP_CLUSTER_MAX_ZOOM + 1)] if points else []
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(self, west: float, south: float, east: float, north: float, zoom: int) -> dict:
+        if not self.levels:
+            return {"zoom": zoom, "clusters": [], "points": []}
+        xs, ys = _project(np.array([north, south]), np.array([west, east]))
+        x0, x1 = sorted(xs)
+        y0, y1 = sorted(ys)
+        z = max(0, min(zoom, MAP_CLUSTER_MAX_ZOOM))
+        while True:
+            level = self.levels[z]
+            lo, hi = level.ranges(x0, y0, x1, y1)
+            if int((hi - lo).sum()) <= MAP_MAX_FEATURES or z == 0:
+                break
+            z -= 1
+        idx = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi) if b > a] or [np.array([], dtype=np.int64)])
+        idx = idx[:MAP_MAX_FEATURES]
+        clusters, points = [], []
+        for i in idx:
+            if level.count[i] == 1:
+                pid, address, price, listed_at, lat, lng, score = self.points[level.first[i]]
+                points.append({
+                    "id": pid,
+                    "address": address,
+                    "price": price,
+                    "listed_at": listed_at,
+                    "lat": lat,
+                    "lng": lng,
+                    "score": score,
+                })
+                continue
+            clusters.append({
+                "id": f"z{z}-{int(level.keys[i])}",
+                "lat": float(level.lat[i]),
+                "lng": float(level.lng[i]),
+                "count": int(level.count[i]),
+                "avg_score": None if np.isnan(level.avg_score[i]) else round(float(level.avg_score[i]), 1),
+                "max_score": None if np.isinf(level.max_score[i]) else int(level.max_score[i]),
+            })
+        return {"zoom": z, "clusters": clusters, "points": points}
+
+
+_index: SpatialIndex | None = None
+_built_at = 0.0
+_dirty = True
+_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def invalidate() -> None:
+    global _dirty
+    _dirty = True
+
+
+def rebuild() -> SpatialIndex:
+    global _index, _built_at, _dirty
+    _dirty = False
+    index = SpatialIndex(listing_store.geocoded_points())
+    _index, _built_at = index, time.monotonic()
+    return index
+
+
+def _rebuild_in_background() -> None:
+    try:
+        rebuild()
+    except Exception:
+        invalidate()
+    finally:
+        _rebuilding.clear()
+
+
+def version() -> int:
+    index = _index
+    return index.version if index is not None else 0
+
+
+def get_index() -> SpatialIndex:
+    if _index is None:
+        with _lock:
+            return rebuild() if _index is None else _index
+    stale = _dirty or time.monotonic() - _built_at > MAP_INDEX_REFRESH_SECONDS
+    if stale and not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=_rebuild_in_background, name="spatial-index", daemon=True).start()
+    return _index
@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+
+from app import db
+from app.config import ALERTS_DB_PATH, DATA_DIR
+from app.listing_store import utc_timestamp
+
+SUBSCRIBERS_PATH = DATA_DIR / "alert_subscribers.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    id INTEGER PRIMARY KEY,
+    email TEXT UNIQUE,
+    phone TEXT UNIQUE,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subscriber_zips (
+    zip_code TEXT NOT NULL,
+    subscriber_id INTEGER NOT NULL REFERENCES subscribers (id) ON DELETE CASCADE,
+    PRIMARY KEY (zip_code, subscriber_id)
+) WITHOUT ROWID;
+"""
+
+_migrate_lock = threading.Lock()
+_migrated = False
+
+
+def _conn() -> sqlite3.Connection:
+    conn = db.connect(ALERTS_DB_PATH, _SCHEMA)
+    if not _migrated:
+        migrate_json(conn)
+    return conn
+
+
+def _upsert(conn: sqlite3.Connection, email: str | None, phone: str | None, zip_code: str | None) -> int:
+    email = (email or "").strip().lower() or None
+    zip_code = (zip_code or "").strip() or None
+    row = conn.execute(
+        "SELECT id, email, phone FROM subscribers WHERE email = ? OR phone = ? ORDER BY id LIMIT 1",
+        (email, phone),
+    ).fetchone()
+    if row is None:
+        subscriber_id = conn.execute(
+            "INSERT INTO subscribers (email, phone, created_at) VALUES (?, ?, ?)",
+            (email, phone, utc_timestamp()),
+        ).lastrowid
+    else:
+        subscriber_id = row["id"]
+        for column, value in (("email", email), ("phone", phone)):
+            if value and not row[column]:
+                try:
+                    conn.execute(f"UPDATE subscribers SET {column} = ? WHERE id = ?", (value, subscriber_id))
+                except sqlite3.IntegrityError:
+                    pass
+    if zip_code:
+        conn.execute(
+            "INSERT OR IGNORE INTO subscriber_zips (zip_code, subscriber_id) VALUES (?, ?)",
+            (zip_code, subscriber_id),
+        )
+    return subscriber_id
+
+
+def migrate_json(conn: sqlite3.Connection | None = None) -> int:
+    global _migrated
+    with _migrate_lock:
+        if _migrated:
+            return 0
+        conn = conn or db.connect(ALERTS_DB_PATH, _SCHEMA)
+        count = 0
+        if SUBSCRIBERS_PATH.exists():
+            try:
+                with open(SUBSCRIBERS_PATH) as f:
+                    entries = json.load(f).get("subscribers", [])
+            except Exception:
+                entries = []
+            with db.transaction(conn):
+                for entry in entries:
+                    if entry.get("email") or entry.get("phone"):
+                        _upsert(conn, entry.get("email"), entry.get("phone"), entry.get("zip_code"))
+                        count += 1
+            os.replace(SUBSCRIBERS_PATH, SUBSCRIBERS_PATH.with_suffix(".json.migrated"))
+        _migrated = True
+        return count
+
+
+def save_subscriber(email: str | None, phone: str | None, zip_code: str | None) -> int:
+    conn = _conn()
+    with db.transaction(conn):
+        return _upsert(conn, email, phone, zip_code)
+
+
+def get_subscriber(subscriber_id: int) -> dict | None:
+    row = _conn().execute(
+        "SELECT id, email, phone, created_at FROM subscribers WHERE id = ?",
+        (subscriber_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def subscribers_for_zip(zip_code: str) -> list[dict]:
+    rows = _conn().execute(
+        "SELECT s.id, s.email, s.phone, z.zip_code FROM subscriber_zips z "
+        "JOIN subscribers s ON s.id = z.subscriber_id WHERE z.zip_code = ?",
+        (zip_code,),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def count_subscribers() -> int:
+    return _conn().execute("SELECT COUNT(*) FROM subscribers").fetchone()[0]
@@ -0,0 +1,117 @@
+import hashlib
+import struct
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from app import acs_snapshot, centroids, risk_table, spatial
+from app.config import TILE_CACHE_ENTRIES
+from app.risk_engine import _load_rules, risk_version
+
+# Tile layout (little-endian): HEADER, then n_zctas ZCTA_DTYPE records, then n_points
+# POINT_DTYPE records. x/y are tile-local in [0, EXTENT); point score is avg risk * 10.
+MEDIA_TYPE = "application/vnd.firstmover.risk-tile"
+MAGIC = b"FMRT"
+FORMAT_VERSION = 1
+EXTENT = 4096
+HEADER = struct.Struct("<4sBBIIII")
+ZCTA_DTYPE = [("zcta", "<u4"), ("x", "<u2"), ("y", "<u2"), ("score", "i1")]
+POINT_DTYPE = [("x", "<u2"), ("y", "<u2"), ("count", "<u4"), ("score", "u1")]
+NO_SCORE = 255
+
+
+def _zcta_scores() -> Any:
+    rules_version, data_vintage = risk_version()
+    loaded = risk_table.load_table()
+    if loaded is not None and loaded[1].get("rules_version") == rules_version and loaded[1].get("data_vintage") == data_vintage:
+        table = loaded[0]
+        return np.where(table["source"] != risk_table.SOURCE_NONE, table["score"], 0).astype(np.int8)
+    scores = np.zeros(acs_snapshot.ZCTA_SLOTS, dtype=np.int8)
+    snapshot = acs_snapshot.load_snapshot()
+    if snapshot is not None:
+        from app.risk_vector import score_snapshot
+
+        scored = score_snapshot(snapshot[0])
+        scores[scored["present"]] = scored["score"][scored["present"]]
+    for zcta, profile in _load_rules().items():
+        if zcta.isdigit() and len(zcta) == 5:
+            scores[int(zcta)] = int(profile.get("score", 4))
+    return scores
+
+
+@lru_cache(maxsize=4)
+def _zcta_layer(version: str) -> tuple[Any, Any, Any, Any]:
+    table = centroids.load_centroids()
+    scores = _zcta_scores()
+    slots = np.flatnonzero(~np.isnan(table["lat"]) & (scores != 0))
+    x, y = spatial.project(table["lat"][slots], table["lng"][slots])
+    order = np.argsort(x)
+    return x[order], y[order], slots[order].astype(np.uint32), scores[slots[order]]
+
+
+def _layer_version() -> str:
+    loaded = risk_table.load_table()
+    table_hash = loaded[1].get("hash", "") if loaded is not None else ""
+    return ":".join([centroids.version(), *risk_version(), table_hash])
+
+
+def _index_version() -> int:
+    return spatial.get_index().version
+
+
+def tile_etag(z: int, x: int, y: int) -> str:
+    raw = f"{FORMAT_VERSION}:{z}/{x}/{y}:{_layer_version()}:{_index_version()}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def _local(mx: Any, my: Any, z: int, x: int, y: int) -> tuple[Any, Any]:
+    n = 2**z
+    return (mx * n - x) * EXTENT, (my * n - y) * EXTENT
+
+
+def _zcta_records(z: int, x: int, y: int, version: str) -> Any:
+    mx, my, zctas, scores = _zcta_layer(version)
+    n = 2**z
+    lo, hi = mx.searchsorted([x / n, (x + 1) / n])
+    px, py = _local(mx[lo:hi], my[lo:hi], z, x, y)
+    keep = (py >= 0) & (py < EXTENT)
+    out = np.zeros(int(keep.sum()), dtype=ZCTA_DTYPE)
+    out["zcta"] = zctas[lo:hi][keep]
+    out["x"] = px[keep]
+    out["y"] = py[keep]
+    out["score"] = scores[lo:hi][keep]
+    return out
+
+
+def _point_records(z: int, x: int, y: int) -> Any:
+    index = spatial.get_index()
+    if not index:
+        return np.zeros(0, dtype=POINT_DTYPE)
+    view = index.query(*spatial.tile_bounds(z, x, y), zoom=z)
+    items = [(p["lat"], p["lng"], 1, p["score"]) for p in view["points"]]
+    items += [(c["lat"], c["lng"], c["count"], c["avg_score"]) for c in view["clusters"]]
+    if not items:
+        return np.zeros(0, dtype=POINT_DTYPE)
+    lat, lng, count, score = zip(*items)
+    px, py = _local(*spatial.project(lat, lng), z, x, y)
+    keep = (px >= 0) & (px < EXTENT) & (py >= 0) & (py < EXTENT)
+    out = np.zeros(int(keep.sum()), dtype=POINT_DTYPE)
+    out["x"] = px[keep]
+    out["y"] = py[keep]
+    out["count"] = np.minimum(np.array(count), 2**32 - 1)[keep]
+    out["score"] = np.array([NO_SCORE if s is None else round(s * 10) for s in score])[keep]
+    return out
+
+
+@lru_cache(maxsize=TILE_CACHE_ENTRIES)
+def _render(z: int, x: int, y: int, etag: str) -> bytes:
+    zctas = _zcta_records(z, x, y, _layer_version())
+    points = _point_records(z, x, y)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, z, x, y, len(zctas), len(points))
+    return header + zctas.tobytes() + points.tobytes()
+
+
+def render_tile(z: int, x: int, y: int) -> tuple[bytes, str]:
+    etag = tile_etag(z, x, y)
+    return _render(z, x, y, etag), etag
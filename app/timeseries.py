@@ -0,0 +1,246 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.acs_snapshot import ZCTA_SLOTS
+from app.config import TIMESERIES_CHECK_INTERVAL, TIMESERIES_DIR
+
+COUNTS = ("purchases", "llc", "cash", "repeat", "investor")
+COLUMNS = {"zcta": "<u4", "month": "<i4", **{name: "<u4" for name in COUNTS}}
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+_lock = threading.Lock()
+_store: tuple[tuple, "Store"] | None = None
+_checked_at = 0.0
+
+
+def month_index(value: str) -> int:
+    year, month = str(value)[:7].split("-")
+    if not 1 <= int(month) <= 12:
+        raise ValueError(f"invalid month {value!r}")
+    return int(year) * 12 + int(month) - 1
+
+
+def month_label(idx: int) -> str:
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+def _pct(part: Any, whole: Any) -> Any:
+    return np.divide(part * 100.0, whole, out=np.zeros(np.shape(whole)), where=np.asarray(whole) > 0)
+
+
+class Store:
+    def __init__(self, columns: dict[str, Any]) -> None:
+        order = np.lexsort((np.arange(len(columns["zcta"])), columns["month"], columns["zcta"]))
+        zcta, month = columns["zcta"][order], columns["month"][order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (zcta[1:] != zcta[:-1]) | (month[1:] != month[:-1])
+        self.zcta = zcta[last]
+        self.month = month[last]
+        self.cum = {
+            name: np.concatenate(([0], np.cumsum(columns[name][order][last], dtype=np.int64)))
+            for name in COUNTS
+        }
+        self.offsets = np.searchsorted(self.zcta, np.arange(ZCTA_SLOTS + 1))
+        self.version = time.time_ns()
+
+    def __len__(self) -> int:
+        return len(self.zcta)
+
+    def span(self, zcta: str) -> tuple[int, int]:
+        if not zcta or not zcta.isdigit() or len(zcta) != 5:
+            return 0, 0
+        slot = int(zcta)
+        return int(self.offsets[slot]), int(self.offsets[slot + 1])
+
+    def latest(self, zcta: str) -> int | None:
+        a, b = self.span(zcta)
+        return int(self.month[b - 1]) if b > a else None
+
+    def series(self, zcta: str, start: int, end: int, step: int = 1) -> dict[str, Any] | None:
+        a, b = self.span(zcta)
+        if b == a or end < start:
+            return None
+        edges = np.append(np.arange(start, end + 1, max(1, step)), end + 1)
+        idx = a + np.searchsorted(self.month[a:b], edges)
+        out = {"months": edges[:-1]}
+        for name in COUNTS:
+            out[name] = np.diff(self.cum[name][idx])
+        return out
+
+    def totals(self, zcta: str, start: int, end: int) -> dict[str, int] | None:
+        series = self.series(zcta, start, end, step=end - start + 1)
+        if series is None:
+            return None
+        return {name: int(series[name][0]) for name in COUNTS}
+
+
+def _column_path(root: Path, name: str) -> Path:
+    return root / f"{name}.bin"
+
+
+def _signature(root: Path) -> tuple:
+    sig = []
+    for name in COLUMNS:
+        st = _column_path(root, name).stat()
+        sig.append((st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def _read_columns(root: Path) -> dict[str, Any]:
+    columns = {name: np.fromfile(_column_path(root, name), dtype=dtype) for name, dtype in COLUMNS.items()}
+    rows = min(len(col) for col in columns.values())
+    return {name: col[:rows] for name, col in columns.items()}
+
+
+def _truncate_torn(root: Path) -> None:
+    paths = {name: _column_path(root, name) for name in COLUMNS}
+    missing = [name for name, path in paths.items() if not path.exists()]
+    if missing and len(missing) < len(paths):
+        raise RuntimeError(f"time-series store at {root} is missing column files: {', '.join(missing)}")
+    sizes = {name: path.stat().st_size if path.exists() else 0 for name, path in paths.items()}
+    rows = min(sizes[name] // np.dtype(dtype).itemsize for name, dtype in COLUMNS.items())
+    for name, dtype in COLUMNS.items():
+        if sizes[name] != rows * np.dtype(dtype).itemsize:
+            os.truncate(paths[name], rows * np.dtype(dtype).itemsize)
+
+
+def load_store(root: Path = TIMESERIES_DIR) -> Store | None:
+    global _store, _checked_at
+    current = _store
+    now = time.monotonic()
+    if current is not None and now - _checked_at < TIMESERIES_CHECK_INTERVAL:
+        return current[1]
+    _checked_at = now
+    try:
+        signature = _signature(root)
+    except OSError:
+        _store = None
+        return None
+    if current is not None and current[0] == signature:
+        return current[1]
+    with _lock:
+        if _store is not None and _store[0] == signature:
+            return _store[1]
+        try:
+            store = Store(_read_columns(root))
+        except (OSError, ValueError):
+            return current[1] if current is not None else None
+        _store = (signature, store)
+        return store
+
+
+def append(rows: Iterable[dict], root: Path = TIMESERIES_DIR) -> int:
+    global _checked_at
+    values: dict[str, list[int]] = {name: [] for name in COLUMNS}
+    for row in rows:
+        zcta = str(row["zip"]).strip().zfill(5)
+        if not zcta.isdigit() or len(zcta) != 5:
+            continue
+        values["zcta"].append(int(zcta))
+        values["month"].append(month_index(row["month"]))
+        for name in COUNTS:
+            values[name].append(int(row.get(name) or 0))
+    if not values["zcta"]:
+        return 0
+    root.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        _truncate_torn(root)
+        for name, dtype in COLUMNS.items():
+            with open(_column_path(root, name), "ab") as f:
+                f.write(np.asarray(values[name], dtype=dtype).tobytes())
+        _checked_at = 0.0
+    return len(values["zcta"])
+
+
+def version() -> int:
+    store = load_store()
+    return store.version if store is not None else 0
+
+
+def map_trend(zcta: str | None, month: int) -> tuple[dict, dict] | None:
+    store = load_store()
+    if store is None or not zcta:
+        return None
+    latest = store.latest(zcta)
+    if latest is None:
+        return None
+    start = latest - 11
+    selected = start + max(1, min(12, month)) - 1
+    series = store.series(zcta, start, latest)
+    investor = np.round(_pct(series["investor"], series["purchases"])).astype(int)
+    family = np.where(series["purchases"] > 0, 100 - investor, 0)
+    trim = selected - start + 1
+    investor[trim:] = investor[trim - 1]
+    family[trim:] = family[trim - 1]
+    totals = store.totals(zcta, start, selected)
+    breakdown = {
+        name: int(round(float(_pct(totals[name], totals["purchases"]))))
+        for name in ("llc", "cash", "repeat")
+    }
+    trend = {
+        "months": [MONTH_NAMES[m % 12] for m in range(start, latest)] + ["Present"],
+        "investor": investor.tolist(),
+        "family": family.tolist(),
+    }
+    return breakdown, trend
+
+
+def stats() -> dict[str, Any]:
+    store = load_store()
+    if store is None:
+        return {"rows": 0, "zctas": 0}
+    return {
+        "rows": len(store),
+        "zctas": int(np.count_nonzero(np.diff(store.offsets))),
+        "first_month": month_label(int(store.month.min())) if len(store) else None,
+        "last_month": month_label(int(store.month.max())) if len(store) else None,
+    }
+
+
+def _rows_from_file(path: Path) -> Iterable[dict]:
+    with open(path, newline="") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-ZIP monthly purchase aggregates.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Append zip,month,purchases,llc,cash,repeat,investor rows (CSV or NDJSON)")
+    imp.add_argument("source", type=Path)
+    show = sub.add_parser("show", help="Print a ZIP's aggregates over a month range")
+    show.add_argument("zip")
+    show.add_argument("--start", help="YYYY-MM, defaults to 11 months before the latest")
+    show.add_argument("--end", help="YYYY-MM, defaults to the latest month")
+    show.add_argument("--step", type=int, default=1, help="Months per bucket")
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        added = append(_rows_from_file(args.source))
+        print(f"Appended {added} rows to {TIMESERIES_DIR}; {stats()['rows']} ZIP-months stored")
+    elif args.command == "show":
+        store = load_store()
+        latest = store.latest(args.zip) if store is not None else None
+        if latest is None:
+            raise SystemExit(f"No aggregates for {args.zip}")
+        end = month_index(args.end) if args.end else latest
+        start = month_index(args.start) if args.start else end - 11
+        series = store.series(args.zip, start, end, step=args.step)
+        print("month     " + " ".join(f"{name:>9}" for name in COUNTS))
+        for i, month in enumerate(series["months"]):
+            print(f"{month_label(int(month))}   " + " ".join(f"{int(series[name][i]):>9}" for name in COUNTS))
+
+
+if __name__ == "__main__":
+    main()
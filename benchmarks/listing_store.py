@@ -0,0 +1,77 @@
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app import listing_store
+
+ZIPS = ("92618", "92626", "92701", "92606", "92801", "92660")
+
+
+def _rows(start: int, count: int) -> list[dict]:
+    return [
+        {
+            "id": f"bench-{n:08d}",
+            "address": f"{n} Bench St, Irvine, CA {ZIPS[n % len(ZIPS)]}",
+            "price": 500_000 + n % 1000 * 1000,
+            "source": "bench",
+            "listed_at": listing_store.utc_timestamp(1_700_000_000 + n),
+            "zip_code": ZIPS[n % len(ZIPS)],
+            "risk": {"score": n % 100},
+        }
+        for n in range(start, start + count)
+    ]
+
+
+def _latency_ms(fn, samples: int) -> tuple[float, float]:
+    times = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99) - 1]
+
+
+def run(rows: int, step: int, batch: int, samples: int, path: Path) -> None:
+    listing_store.LISTINGS_DB_PATH = path
+    listing_store.INGESTED_PATH = path.with_name("ingested_listings.json")
+    listing_store._migrated = False
+    print(f"{'rows':>10} {'insert/s':>10} {'get p50':>9} {'get p99':>9} {'zip p50':>9} {'zip p99':>9} {'dedupe/s':>10}")
+    total = 0
+    while total < rows:
+        size = min(step, rows - total)
+        started = time.perf_counter()
+        for offset in range(total, total + size, batch):
+            listing_store.insert_new(_rows(offset, min(batch, total + size - offset)))
+        rate = size / (time.perf_counter() - started)
+        total += size
+
+        get = _latency_ms(lambda: listing_store.get_listing(f"bench-{random.randrange(total):08d}"), samples)
+        by_zip = _latency_ms(lambda: listing_store.query_listings(zip_code=random.choice(ZIPS), limit=20), samples)
+        started = time.perf_counter()
+        inserted, _ = listing_store.insert_new(_rows(random.randrange(total - batch + 1) if total > batch else 0, batch))
+        dedupe = batch / (time.perf_counter() - started)
+        assert inserted == 0
+        print(f"{total:>10} {rate:>10.0f} {get[0]:>8.3f}ms {get[1]:>8.3f}ms {by_zip[0]:>8.3f}ms {by_zip[1]:>8.3f}ms {dedupe:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Listing store ingest and lookup throughput as the table grows")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--step", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--db", type=Path, help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+    if args.db:
+        run(args.rows, args.step, args.batch, args.samples, args.db)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(args.rows, args.step, args.batch, args.samples, Path(tmp) / "listings.sqlite3")
+
+
+if __name__ == "__main__":
+    main()
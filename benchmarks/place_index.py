@@ -0,0 +1,43 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+from app.address import extract_zip, load_places
+
+CORPUS_PATH = Path(__file__).with_name("messy_addresses.csv")
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[tuple[str, str | None]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["text"], row["expected_zip"] or None) for row in csv.DictReader(f)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ZIP extraction accuracy and throughput on a messy-address corpus")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--places", type=Path, help="Gazetteer JSON (default: PLACES_PATH)")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    if args.places:
+        load_places(args.places)
+    corpus = load_corpus(args.corpus)
+
+    wrong = [(text, expected, extract_zip(text)) for text, expected in corpus]
+    wrong = [w for w in wrong if w[1] != w[2]]
+    resolved = sum(1 for _text, expected in corpus if expected)
+    print(f"{len(corpus)} inputs: {resolved} should resolve, {len(corpus) - resolved} should defer to the geocoder")
+    for text, expected, got in wrong:
+        print(f"  MISS {text!r}: expected {expected or 'geocoder'}, got {got or 'geocoder'}")
+    print(f"accuracy: {(len(corpus) - len(wrong)) / len(corpus):.1%}")
+
+    texts = [text for text, _expected in corpus] * args.repeat
+    started = time.perf_counter()
+    for text in texts:
+        extract_zip(text)
+    elapsed = time.perf_counter() - started
+    print(f"throughput: {len(texts) / elapsed:,.0f} lookups/s ({elapsed / len(texts) * 1e6:.1f}us each)")
+
+
+if __name__ == "__main__":
+    main()
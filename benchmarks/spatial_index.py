@@ -0,0 +1,53 @@
+import argparse
+import random
+import statistics
+import time
+
+from app import spatial
+
+
+def _points(count: int, seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    return [
+        (
+            f"bench-{n}",
+            f"{n} Bench St",
+            rng.randrange(300_000, 3_000_000, 1000),
+            "2025-01-01T00:00:00Z",
+            rng.gauss(33.70, 0.15),
+            rng.gauss(-117.85, 0.20),
+            rng.randrange(11) if n % 7 else None,
+        )
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Spatial index build time and /risk/map viewport query latency")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    points = _points(args.points, args.seed)
+    started = time.perf_counter()
+    index = spatial.SpatialIndex(points)
+    print(f"build: {len(index):,} points in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(args.seed)
+    print(f"{'zoom':>4} {'p50':>9} {'p99':>9} {'features':>9}")
+    for zoom in (6, 9, 12, 14, 16, 18):
+        times, features = [], []
+        for _ in range(args.queries):
+            box = spatial.viewport(rng.gauss(33.70, 0.15), rng.gauss(-117.85, 0.20), zoom)
+            started = time.perf_counter()
+            view = index.query(*box, zoom=zoom)
+            times.append((time.perf_counter() - started) * 1000)
+            features.append(len(view["clusters"]) + len(view["points"]))
+        times.sort()
+        p99 = times[max(0, int(len(times) * 0.99) - 1)]
+        print(f"{zoom:>4} {statistics.median(times):>7.2f}ms {p99:>7.2f}ms {statistics.median(features):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
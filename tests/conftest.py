@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="first-mover-tests-")
+for _name, _filename in {
+    "CACHE_DB_PATH": "cache.sqlite3",
+    "LISTINGS_DB_PATH": "listings.sqlite3",
+    "ALERTS_DB_PATH": "alerts.sqlite3",
+    "ALERT_OUTBOX_PATH": "alert_outbox.ndjson",
+    "ACS_SNAPSHOT_PATH": "acs5_zcta.npy",
+    "RISK_TABLE_PATH": "risk_table.npz",
+    "ZCTA_CENTROIDS_PATH": "zcta_centroids.npy",
+    "TIMESERIES_DIR": "timeseries",
+    "ENTITIES_PATH": "entities.json",
+}.items():
+    os.environ[_name] = os.path.join(_TMP, _filename)
+os.environ["ALERT_DELIVERY"] = "fake"
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["RESEND_API_KEY"] = ""
+for _provider in ("CENSUS", "GEOCODER", "GEOCODER_BATCH", "NOMINATIM", "HUD", "FREETXT"):
+    os.environ[f"RATE_LIMIT_{_provider}"] = "1000"
+
+import pytest  # noqa: E402
+
+from app import census, http_clients, listing_store, resilience  # noqa: E402
+from tests.stubs import StubTransport, StubUpstream  # noqa: E402
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    stub = StubUpstream()
+    transport = StubTransport(stub)
+    kwargs = http_clients._client_kwargs
+    monkeypatch.setattr(http_clients, "_client_kwargs", lambda name: {**kwargs(name), "transport": transport})
+    monkeypatch.setattr(http_clients, "_clients", {})
+    monkeypatch.setattr(http_clients, "_async_clients", {})
+    monkeypatch.setattr(
+        resilience,
+        "PROVIDERS",
+        {name: resilience.Provider(name, rate) for name, rate in resilience.PROVIDER_RATE_LIMITS.items()},
+    )
+    return stub
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, upstream):
+    monkeypatch.setattr(listing_store, "LISTINGS_DB_PATH", tmp_path / "listings.sqlite3")
+    monkeypatch.setattr(listing_store, "INGESTED_PATH", tmp_path / "ingested_listings.json")
+    monkeypatch.setattr(listing_store, "_migrated", False)
+    census.GEOCODE_CACHE.clear()
+    yield listing_store
+    census.GEOCODE_CACHE.clear()
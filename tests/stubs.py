@@ -0,0 +1,146 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import CENSUS_API_BASE, CENSUS_GEOCODER_BASE, FREETXT_API_BASE, NOMINATIM_BASE
+
+ACS_HEADERS = ["NAME", "B01003_001E", "B25077_001E", "B25003_002E", "B25003_003E", "zip code tabulation area"]
+
+
+def _host(base: str) -> str:
+    return urlsplit(base).netloc
+
+
+def _multipart_file(request: httpx.Request, field: str) -> str:
+    boundary = request.headers["content-type"].split("boundary=", 1)[1].encode()
+    for part in request.content.split(b"--" + boundary):
+        head, _, body = part.partition(b"\r\n\r\n")
+        if f'name="{field}"'.encode() in head:
+            return body.rsplit(b"\r\n", 1)[0].decode()
+    return ""
+
+
+class StubUpstream:
+    def __init__(self) -> None:
+        self.addresses: dict[str, dict] = {}
+        self.acs: dict[str, dict] = {}
+        self.sms_status = "DELIVERED"
+        self.down: set[str] = set()
+        self.delay = 0.0
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_address(self, query: str, lat: float, lng: float, zip_code: str, matched: str | None = None) -> None:
+        self.addresses[query.strip().lower()] = {
+            "lat": lat,
+            "lng": lng,
+            "zip": zip_code,
+            "matched": matched or f"{query.strip().upper()}, {zip_code}",
+        }
+
+    def add_zcta(self, zcta: str, population: int, median_value: int, owners: int, renters: int) -> None:
+        self.acs[zcta] = {
+            "population": population,
+            "median_value": median_value,
+            "owners": owners,
+            "renters": renters,
+        }
+
+    def count(self, provider: str) -> int:
+        return self.calls.get(provider, 0)
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        provider, handler = self._route(request)
+        with self._lock:
+            self.calls[provider] = self.calls.get(provider, 0) + 1
+        if provider in self.down:
+            if provider == "geocoder" or provider == "nominatim":
+                raise httpx.ConnectError("stub upstream down", request=request)
+            return httpx.Response(503, text="unavailable")
+        return handler(request)
+
+    def _route(self, request: httpx.Request):
+        host, path = request.url.host, request.url.path
+        if host == _host(CENSUS_API_BASE):
+            return "census", self._acs
+        if host == _host(CENSUS_GEOCODER_BASE) and path.endswith("/onelineaddress"):
+            return "geocoder", self._oneline
+        if host == _host(CENSUS_GEOCODER_BASE) and path.endswith("/addressbatch"):
+            return "geocoder_batch", self._batch
+        if host == _host(NOMINATIM_BASE):
+            return "nominatim", self._nominatim
+        if host == _host(FREETXT_API_BASE):
+            return "freetxt", self._sms
+        return "unknown", lambda _request: httpx.Response(404)
+
+    def _acs(self, request: httpx.Request) -> httpx.Response:
+        wanted = request.url.params["for"].split(":", 1)[1]
+        zctas = sorted(self.acs) if wanted == "*" else [z for z in wanted.split(",") if z in self.acs]
+        if not zctas:
+            return httpx.Response(204)
+        rows = [ACS_HEADERS] + [
+            [f"ZCTA5 {z}", str(r["population"]), str(r["median_value"]), str(r["owners"]), str(r["renters"]), z]
+            for z in zctas
+            for r in [self.acs[z]]
+        ]
+        return httpx.Response(200, json=rows)
+
+    def _oneline(self, request: httpx.Request) -> httpx.Response:
+        found = self.addresses.get(request.url.params["address"].strip().lower())
+        matches = []
+        if found:
+            matches.append({
+                "coordinates": {"x": found["lng"], "y": found["lat"]},
+                "addressComponents": {"zip": found["zip"]},
+                "matchedAddress": found["matched"],
+            })
+        return httpx.Response(200, json={"result": {"addressMatches": matches}})
+
+    def _batch(self, request: httpx.Request) -> httpx.Response:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for row in csv.reader(io.StringIO(_multipart_file(request, "addressFile"))):
+            idx, street, city, state, zip_code = (row + [""] * 5)[:5]
+            query = ", ".join(p for p in (street, city, f"{state} {zip_code}".strip()) if p)
+            found = self.addresses.get(query.lower()) or self.addresses.get(street.strip().lower())
+            if found:
+                writer.writerow([
+                    idx, query, "Match", "Exact", found["matched"], f"{found['lng']},{found['lat']}", "1", "L",
+                ])
+            else:
+                writer.writerow([idx, query, "No_Match"])
+        return httpx.Response(200, text=out.getvalue())
+
+    def _nominatim(self, request: httpx.Request) -> httpx.Response:
+        found = self.addresses.get(request.url.params["q"].strip().lower())
+        if not found:
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=[{
+            "lat": str(found["lat"]),
+            "lon": str(found["lng"]),
+            "display_name": found["matched"],
+            "address": {"postcode": found["zip"]},
+        }])
+
+    def _sms(self, _request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=json.dumps({"status": self.sms_status}))
+
+
+class StubTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    def __init__(self, upstream: StubUpstream) -> None:
+        self.upstream = upstream
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        return self.upstream.respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.upstream.delay:
+            await asyncio.sleep(self.upstream.delay)
+        return self.upstream.respond(request)
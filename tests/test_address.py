@@ -0,0 +1,75 @@
+import pytest
+
+from app import census
+from app.address import address_key, extract_zip, normalize_address
+from benchmarks.place_index import load_corpus
+
+
+@pytest.mark.parametrize(
+    ("first", "second"),
+    [
+        ("12 Lot Ave, Irvine", "12 Irvine"),
+        ("1 Space Park Dr, Irvine", "1 Dr, Irvine"),
+        ("5 Suite Ln", "5"),
+        ("8 Building Way, Irvine", "8 Way, Irvine"),
+        ("3 Lot 12 Rd, Irvine", "3 Rd, Irvine"),
+        ("40 Floor Ct", "40 Ct"),
+    ],
+)
+def test_street_names_with_unit_words_do_not_collide(first, second):
+    assert normalize_address(first) != normalize_address(second)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("12 Lot Ave, Irvine", "12 lot ave irvine"),
+        ("1 Space Park Dr, Irvine", "1 space park dr irvine"),
+        ("5 Suite Ln", "5 suite ln"),
+        ("9 Apartment Row", "9 apartment row"),
+    ],
+)
+def test_unit_words_used_as_street_names_are_kept(text, expected):
+    assert normalize_address(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "10 Main St Apt 4B, Irvine",
+        "10 Main St #12, Irvine",
+        "10 Main St # 12, Irvine",
+        "10 Main St Unit B, Irvine",
+        "10 Main St Ste. 200-A, Irvine",
+        "10 Main St Bldg C Fl 2, Irvine",
+        "10 Main St Space 14, Irvine",
+        "10 MAIN STREET, IRVINE",
+    ],
+)
+def test_unit_designators_with_unit_tokens_are_stripped(text):
+    assert normalize_address(text) == "10 main st irvine"
+
+
+def test_street_name_unit_words_get_separate_geocode_cache_entries(upstream):
+    census.GEOCODE_CACHE.clear()
+    upstream.add_address("12 Lot Ave, Irvine", 33.70, -117.80, "92614")
+    upstream.add_address("12 Irvine", 33.60, -117.70, "92618")
+    assert census.geocode_location("12 Lot Ave, Irvine")["zip_code"] == "92614"
+    assert census.geocode_location("12 Irvine")["zip_code"] == "92618"
+    assert upstream.count("geocoder") == 2
+
+
+def test_address_key_keeps_the_unit():
+    assert address_key("5 Elm St Unit 1, Irvine") != address_key("5 Elm St Unit 2, Irvine")
+    assert address_key("5 Elm St Unit 1, Irvine") != address_key("5 Elm St, Irvine")
+    assert address_key("5 Elm St Unit 1, Irvine") == "5 elm st irvine unit 1"
+
+
+@pytest.mark.parametrize("text", ["5 Elm St #1, Irvine", "5 ELM STREET Apt. 1, Irvine", "5 Elm St, Unit #1, Irvine"])
+def test_address_key_canonicalizes_unit_designators(text):
+    assert address_key(text) == address_key("5 Elm St Unit 1, Irvine")
+
+
+@pytest.mark.parametrize(("text", "expected"), load_corpus())
+def test_messy_address_corpus(text, expected):
+    assert extract_zip(text) == expected
@@ -0,0 +1,81 @@
+from app import census, ingest
+
+
+def test_batch_posts_one_csv_and_maps_results_by_row(upstream, store):
+    upstream.add_address("1 Main St, Irvine, CA 92618", 33.68, -117.82, "92618")
+    upstream.add_address("2 Main St, Irvine, CA 92618", 33.69, -117.83, "92618")
+    results = census.geocode_batch([
+        "1 Main St, Irvine, CA 92618",
+        "404 Nowhere Ln, Irvine, CA 92618",
+        "2 Main St, Irvine, CA 92618",
+        "1 MAIN STREET, Irvine, CA 92618",
+    ])
+    assert upstream.count("geocoder_batch") == 1
+    assert [r and r["latitude"] for r in results] == [33.68, None, 33.69, 33.68]
+    assert results[3]["query"] == "1 MAIN STREET, Irvine, CA 92618"
+    assert results[0]["zip_code"] == "92618"
+
+
+def test_batch_caches_matches_but_not_misses(upstream, store):
+    upstream.add_address("5 Elm St, Irvine, CA 92618", 33.6, -117.8, "92618")
+    census.geocode_batch(["5 Elm St, Irvine, CA 92618", "6 Gone St, Irvine, CA 92618"])
+    census.geocode_batch(["5 Elm St, Irvine, CA 92618", "6 Gone St, Irvine, CA 92618"])
+    assert upstream.count("geocoder_batch") == 2
+    census.geocode_batch(["5 Elm St, Irvine, CA 92618"])
+    assert upstream.count("geocoder_batch") == 2
+
+
+def test_batch_splits_at_limit(upstream, store, monkeypatch):
+    monkeypatch.setattr(census, "GEOCODE_BATCH_LIMIT", 2)
+    addresses = [f"{n} Chunk Ct, Irvine, CA 92618" for n in range(5)]
+    for n, address in enumerate(addresses):
+        upstream.add_address(address, 33.0 + n, -117.0, "92618")
+    results = census.geocode_batch(addresses)
+    assert upstream.count("geocoder_batch") == 3
+    assert [r["latitude"] for r in results] == [33.0, 34.0, 35.0, 36.0, 37.0]
+
+
+def test_background_job_geocodes_once_and_reads_never_geocode(upstream, store):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    for n in range(3):
+        upstream.add_address(f"{n} Batch Rd, Irvine, CA 92618", 33.6 + n / 100, -117.8, "92618")
+    for n in range(3):
+        store.add_listing(ingest.new_listing_row(ingest.ListingIn(address=f"{n} Batch Rd, Irvine, CA 92618"), f"ingested-b{n}"))
+    assert len(store.pending_geocode(10)) == 3
+
+    assert ingest.process_pending_listings() == 3
+    assert store.pending_geocode(10) == []
+    row = store.get_listing("ingested-b1")
+    assert (row["lat"], row["lng"], row["zip_code"]) == (33.61, -117.8, "92618")
+    assert upstream.count("geocoder_batch") == 1
+
+    calls = dict(upstream.calls)
+    with TestClient(app) as client:
+        body = client.get("/listings", params={"source": "ingested"}).json()
+        assert {item["id"] for item in body["listings"]} == {"ingested-b0", "ingested-b1", "ingested-b2"}
+        client.get("/listings/ingested-b2")
+    assert upstream.calls.get("geocoder_batch") == calls.get("geocoder_batch")
+    assert upstream.calls.get("geocoder") == calls.get("geocoder")
+
+
+def test_batch_misses_are_marked_and_only_a_bounded_fallback_runs(upstream, store, monkeypatch):
+    monkeypatch.setattr(ingest, "geocode_batch", lambda addresses: [None] * len(addresses))
+    monkeypatch.setattr(ingest, "GEOCODE_WRITE_BATCH", 2)
+    monkeypatch.setattr(ingest, "GEOCODE_FALLBACK_LIMIT", 2)
+    writes = []
+    update = store.update_listings
+    monkeypatch.setattr(store, "update_listings", lambda updates: writes.append(len(updates)) or update(updates))
+    for n in range(5):
+        address = f"{n} Miss Way, Irvine, CA"
+        upstream.add_address(address, 33.7 + n / 100, -117.8, "92618")
+        store.add_listing(ingest.new_listing_row(ingest.ListingIn(address=address), f"ingested-m{n}"))
+
+    assert ingest.process_pending_listings() == 5
+    assert store.pending_geocode(10) == []
+    assert upstream.count("geocoder") == 2
+    assert writes[:3] == [2, 2, 1]
+    located = {n for n in range(5) if "lat" in store.get_listing(f"ingested-m{n}")}
+    assert len(located) == 2
+    assert all(store.get_listing(f"ingested-m{n}")["geocoded_at"] for n in range(5))
@@ -0,0 +1,143 @@
+import json
+
+from app import db, ingest
+from app.ingest import BulkIngest, RecordParser
+
+
+def _feed_bytewise(parser: RecordParser, data: bytes) -> list:
+    out = []
+    for i in range(len(data)):
+        out.extend(parser.feed(data[i:i + 1]))
+    return out + parser.close()
+
+
+def test_csv_parser_handles_quotes_multiline_and_split_chunks():
+    data = (
+        'Address,PRICE,source\r\n'
+        '"12 Elm St, Irvine, CA 92618",950000,mls\r\n'
+        '"4 Café Ct\nUnit 2, Irvine, CA 92618",,\r\n'
+        '\r\n'
+        '9 Oak Ave Irvine CA 92618,1200000,"quoted ""source"""'
+    ).encode()
+    records = _feed_bytewise(RecordParser("csv"), data)
+    assert records == [
+        (2, {"address": "12 Elm St, Irvine, CA 92618", "price": "950000", "source": "mls"}),
+        (4, {"address": "4 Café Ct\nUnit 2, Irvine, CA 92618", "price": None, "source": None}),
+        (6, {"address": "9 Oak Ave Irvine CA 92618", "price": "1200000", "source": 'quoted "source"'}),
+    ]
+
+
+def test_csv_parser_reports_unterminated_quote():
+    parser = RecordParser("csv")
+    records = parser.feed(b'address\n"1 Never Ends St\n') + parser.close()
+    assert records == [(2, "Unterminated quoted field")]
+
+
+def test_ndjson_parser_reports_bad_lines_with_line_numbers():
+    data = '{"address": "1 A St"}\nnot json\n[1, 2]\n\n{"address": "2 B St", "price": 5}'.encode()
+    records = _feed_bytewise(RecordParser("ndjson"), data)
+    assert records[0] == (1, {"address": "1 A St"})
+    assert records[1][0] == 2 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (3, "Expected a JSON object")
+    assert records[3] == (5, {"address": "2 B St", "price": 5})
+
+
+def test_bulk_ingest_validates_rows_and_dedupes_within_upload():
+    bulk = BulkIngest(batch_size=100)
+    bulk.add(1, {"address": "1 Main St, Irvine, CA 92618", "price": "100"})
+    bulk.add(2, {"address": "1 MAIN STREET irvine ca 92618"})
+    bulk.add(3, {"address": "   "})
+    bulk.add(4, {"price": 5})
+    bulk.add(5, {"address": "2 Main St", "price": "lots"})
+    bulk.add(6, "Invalid JSON: boom")
+    assert len(bulk.batch) == 1
+    assert bulk.duplicates == 1
+    assert [e["line"] for e in bulk.errors] == [3, 4, 5, 6]
+    assert bulk.errors[1]["error"].startswith("address:")
+    assert bulk.errors[2]["error"].startswith("price:")
+
+
+def test_bulk_ingest_keeps_units_of_one_building_apart():
+    bulk = BulkIngest(batch_size=100)
+    bulk.add(1, {"address": "5 Elm St Unit 1, Irvine, CA 92618"})
+    bulk.add(2, {"address": "5 Elm St Unit 2, Irvine, CA 92618"})
+    bulk.add(3, {"address": "5 Elm St #2, Irvine, CA 92618"})
+    assert [r["address"] for r in bulk.batch] == ["5 Elm St Unit 1, Irvine, CA 92618", "5 Elm St Unit 2, Irvine, CA 92618"]
+    assert bulk.duplicates == 1
+
+
+def test_existing_address_keys_are_rebuilt_with_units(store):
+    conn = db.connect(store.LISTINGS_DB_PATH, store._SCHEMA)
+    conn.execute(
+        "INSERT INTO listings (id, address, source, listed_at, address_key) VALUES (?, ?, ?, ?, ?)",
+        ("old-1", "5 Elm St Unit 1, Irvine, CA 92618", "mls", "2025-01-01T00:00:00Z", "5 elm st irvine ca 92618"),
+    )
+    inserted, duplicates = store.insert_new([
+        {"id": "new-1", "address": "5 Elm St Unit 2, Irvine, CA 92618", "source": "mls", "listed_at": "2025-02-01T00:00:00Z"},
+        {"id": "new-2", "address": "5 Elm St Apt 1, Irvine, CA 92618", "source": "mls", "listed_at": "2025-02-01T00:00:00Z"},
+    ])
+    assert (inserted, duplicates) == (1, 1)
+    assert store.count_listings() == 2
+
+
+def test_ingest_file_writes_batches_and_skips_stored_duplicates(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "BULK_INGEST_BATCH", 2)
+    path = tmp_path / "feed.ndjson"
+    rows = [{"address": f"{n} Birch Ln, Irvine, CA 92618", "price": 500000 + n} for n in range(5)]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n{bad\n")
+    result = ingest.ingest_file(path)
+    assert (result["received"], result["inserted"], result["duplicates"], result["error_count"]) == (6, 5, 0, 1)
+    again = ingest.ingest_file(path)
+    assert (again["inserted"], again["duplicates"]) == (0, 5)
+    assert store.count_listings() == 5
+    stored = store.query_listings(zip_code=None, limit=10)
+    assert {r["risk"]["resolved_zip"] for r in stored} == {"92618"}
+
+
+def test_listings_ingested_in_the_same_millisecond_get_distinct_ids(store, monkeypatch):
+    monkeypatch.setattr(ingest.time, "time", lambda: 1_750_000_000.0)
+    rows = [ingest.new_listing_row(ingest.ListingIn(address=f"{n} Same Ms Ct, Irvine, CA 92618")) for n in range(3)]
+    for row in rows:
+        store.add_listing(row)
+    assert store.count_listings() == 3
+    assert len({BulkIngest()._prefix for _ in range(3)}) == 3
+
+
+def test_ingested_listing_is_queryable_by_its_zip_before_and_without_a_geocode(store, upstream):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        listing_id = client.post("/listings/ingest", json={"address": "5 Elm St, Irvine, CA 92660"}).json()["id"]
+        assert store.get_listing(listing_id)["zip_code"] == "92660"
+        ingest.process_pending_listings()
+        row = store.get_listing(listing_id)
+        assert row["geocoded_at"] and "lat" not in row
+        found = client.get("/listings", params={"zip_code": "92660", "source": "ingested"}).json()["listings"]
+    assert [item["id"] for item in found] == [listing_id]
+
+
+def test_listing_reads_run_off_the_event_loop(store, monkeypatch):
+    import asyncio
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    on_loop = []
+
+    def check(real):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(real.__name__)
+            except RuntimeError:
+                pass
+            return real(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(store, "query_listings", check(store.query_listings))
+    monkeypatch.setattr(store, "get_listing", check(store.get_listing))
+    with TestClient(app) as client:
+        client.get("/listings", params={"source": "ingested"})
+        client.get("/listings/ingested-missing")
+    assert on_loop == []
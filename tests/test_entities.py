@@ -0,0 +1,89 @@
+import pytest
+
+from app import entities
+
+
+def test_header_only_csv_builds_an_empty_summary(tmp_path):
+    source = tmp_path / "deeds.csv"
+    source.write_text("owner,mailing_address,property_address,zip,sale_date,cash\n")
+    meta = entities.build([source], path=tmp_path / "entities.json")
+    assert (meta["records"], meta["entities"], meta["investor_entities"]) == (0, 0, 0)
+    assert entities.load_summary(tmp_path / "entities.json")["zips"] == {}
+
+
+def test_records_without_an_investor_zip_summarize_to_no_buyers(tmp_path):
+    source = tmp_path / "deeds.csv"
+    source.write_text(
+        "owner,property_address,zip\n"
+        "Jane Doe,1 Elm St,92618\n"
+        "Sunset Holdings LLC,2 Elm St,\n"
+    )
+    meta = entities.build([source], path=tmp_path / "entities.json")
+    assert (meta["records"], meta["investor_entities"]) == (2, 1)
+    assert entities.load_summary(tmp_path / "entities.json")["zips"] == {}
+
+
+@pytest.mark.parametrize(
+    ("owner", "full"),
+    [
+        ("Tr Nguyen", "tr nguyen"),
+        ("Nguyen Trust", "nguyen trust"),
+        ("The Nguyen Family Trust", "nguyen family trust"),
+        ("Smith Living Trust", "smith living trust"),
+        ("Jane Doe Revocable Trust", "jane doe revocable trust"),
+        ("Jane Doe, Trustee", "jane doe trustee"),
+    ],
+)
+def test_personal_trusts_are_not_companies(owner, full):
+    assert entities.normalize_name(owner)[0] == full
+    assert entities.normalize_name(owner)[2] is False
+
+
+def test_company_trusts_are_still_companies():
+    assert entities.normalize_name("Sunset Holdings Trust") == ("sunset holdings trust", "sunset holdings", True)
+
+
+def _groups(owners: list[str]) -> list[set[str]]:
+    result = entities.resolve({"owner": owner} for owner in owners)
+    groups: dict[int, set[str]] = {}
+    for owner, label in zip(owners, result["entity"].tolist()):
+        groups.setdefault(label, set()).add(owner)
+    return sorted(groups.values(), key=lambda g: sorted(g))
+
+
+def test_company_names_differing_in_the_distinctive_word_do_not_merge():
+    assert _groups(["ABC Properties LLC", "ABD Properties LLC", "ABC Properties, Inc."]) == [
+        {"ABC Properties LLC", "ABC Properties, Inc."},
+        {"ABD Properties LLC"},
+    ]
+
+
+def test_misspelled_company_names_still_merge():
+    assert _groups(["Evergreen Capital LLC", "Evergren Capital, Inc."]) == [
+        {"Evergreen Capital LLC", "Evergren Capital, Inc."},
+    ]
+
+
+def test_entities_rebuild_makes_stored_listing_risk_stale(store, monkeypatch, tmp_path):
+    from app import ingest
+
+    monkeypatch.setattr(entities, "_summary", None)
+    row = ingest.new_listing_row(ingest.ListingIn(address="1 Stale Ct, Irvine, CA 92618"), "ingested-stale")
+    row.update(ingest.score_fields(row))
+    store.add_listing(row)
+    assert not ingest.is_stale(store.get_listing("ingested-stale"))
+
+    source = tmp_path / "deeds.csv"
+    source.write_text(
+        "owner,property_address,zip\n"
+        + "".join(f"Sunset Holdings LLC,{n} Deed St,92618\n" for n in range(3))
+    )
+    try:
+        entities.build([source])
+        assert ingest.is_stale(store.get_listing("ingested-stale"))
+        assert ingest.rescore_listings() == 1
+        stored = store.get_listing("ingested-stale")
+        assert not ingest.is_stale(stored)
+        assert stored["risk"]["properties_owned"] == 3
+    finally:
+        entities.ENTITIES_PATH.unlink(missing_ok=True)
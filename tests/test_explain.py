@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app import explain
+
+SIGNALS = ["High share of LLC buyers", "All-cash purchases above metro average"]
+
+
+def _completion(text: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def _chunk(text: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeOpenAI:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=self)
+
+    def _text(self, messages: list[dict]) -> str:
+        with self._lock:
+            self.calls += 1
+        return f" Explained #{self.calls}: {messages[0]['content'][-40:]} "
+
+    def create(self, model: str, messages: list[dict], max_tokens: int, stream: bool = False):
+        time.sleep(self.delay)
+        return _completion(self._text(messages))
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    async def create(self, model: str, messages: list[dict], max_tokens: int, stream: bool = False):
+        await asyncio.sleep(self.delay)
+        text = self._text(messages)
+        if not stream:
+            return _completion(text)
+
+        async def chunks():
+            for word in text.split(" "):
+                yield _chunk(word + " ")
+
+        return chunks()
+
+
+@pytest.fixture
+def fake_openai(upstream):
+    sync_client, async_client = FakeOpenAI(delay=0.1), FakeAsyncOpenAI(delay=0.1)
+    explain.set_client(sync_client, async_client)
+    explain.EXPLAIN_CACHE.clear()
+    yield sync_client, async_client
+    explain.set_client()
+    explain.EXPLAIN_CACHE.clear()
+
+
+def _explain(location: str = "92618") -> str:
+    return explain.generate_risk_explanation(SIGNALS, 8, "High risk", "fallback", location)
+
+
+async def _explain_async(location: str = "92618", deadline: float | None = 5.0) -> str:
+    return await explain.generate_risk_explanation_async(SIGNALS, 8, "High risk", "fallback", location, deadline=deadline)
+
+
+def test_concurrent_identical_requests_share_one_call(fake_openai):
+    client, _async_client = fake_openai
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _i: _explain(), range(8)))
+    assert client.calls == 1
+    assert len(set(results)) == 1 and results[0].startswith("Explained #1")
+    assert _explain() == results[0]
+    assert client.calls == 1
+
+
+def test_cache_is_keyed_by_content(fake_openai):
+    client, _async_client = fake_openai
+    first = _explain("92618")
+    assert _explain("92626") != first
+    assert client.calls == 2
+    assert explain.cached_risk_explanation(SIGNALS, 8, "High risk", "fallback", "92626") != "fallback"
+    assert explain.cached_risk_explanation(SIGNALS, 7, "High risk", "fallback", "92626") == "fallback"
+
+
+def test_concurrent_async_requests_share_one_call(fake_openai):
+    sync_client, client = fake_openai
+
+    async def burst():
+        return await asyncio.gather(*(_explain_async() for _ in range(8)))
+
+    results = asyncio.run(burst())
+    assert client.calls == 1 and sync_client.calls == 0
+    assert len(set(results)) == 1 and results[0] != "fallback"
+    assert _explain() == results[0]
+
+
+def test_deadline_falls_back_and_late_result_is_cached(fake_openai):
+    _sync_client, client = fake_openai
+    client.delay = 0.3
+
+    async def slow_then_cached():
+        first = await _explain_async(deadline=0.05)
+        await asyncio.sleep(0.4)
+        return first, await _explain_async(deadline=0.05)
+
+    first, second = asyncio.run(slow_then_cached())
+    assert first == "fallback"
+    assert second.startswith("Explained #1")
+    assert client.calls == 1
+
+
+def test_warm_generates_once_per_zip(fake_openai):
+    client, _async_client = fake_openai
+    client.delay = 0.0
+    assert explain.warm(["92618", "92626"]) == {"generated": 2, "cached": 0, "fallback": 0}
+    assert explain.warm(["92618", "92626"]) == {"generated": 0, "cached": 2, "fallback": 0}
+    assert client.calls == 2
+
+
+def test_stream_sends_risk_before_tokens_and_caches_the_text(fake_openai):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    _sync_client, client = fake_openai
+    with TestClient(app) as http:
+        body = http.post("/risk/score/stream", json={"zip_code": "92618"}).text
+        events = [block.split("\n", 1)[0].removeprefix("event: ") for block in body.strip().split("\n\n")]
+        assert events[0] == "risk" and events[-1] == "done"
+        assert events.count("token") > 1
+        score = http.post("/risk/score", json={"zip_code": "92618"}).json()
+    assert score["explanation"].startswith("Explained #1")
+    assert client.calls == 1
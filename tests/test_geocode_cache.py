@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app import census
+from app.request_scope import _memo
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    census.GEOCODE_CACHE.clear()
+    yield
+    census.GEOCODE_CACHE.clear()
+
+
+def test_hit_is_cached_under_normalized_key(upstream):
+    upstream.add_address("1 Main St, Irvine, CA 92618", 33.68, -117.82, "92618")
+    first = census.geocode_location("1 Main St, Irvine, CA 92618")
+    assert first["zip_code"] == "92618"
+    second = census.geocode_location("1 MAIN STREET  Irvine CA 92618")
+    assert second["zip_code"] == "92618"
+    assert second["query"] == "1 MAIN STREET  Irvine CA 92618"
+    assert upstream.count("geocoder") == 1
+
+
+def test_clean_miss_is_negative_cached(upstream):
+    assert census.geocode_location("404 Nowhere Ln, Irvine, CA") is None
+    assert upstream.count("geocoder") == 1
+    assert upstream.count("nominatim") == 1
+    assert census.geocode_location("404 Nowhere Ln, Irvine, CA") is None
+    assert upstream.count("geocoder") == 1
+    assert upstream.count("nominatim") == 1
+
+
+def test_transport_error_is_not_negative_cached(upstream):
+    upstream.down.add("geocoder")
+    assert census.geocode_location("9 Flaky Ct, Irvine, CA") is None
+    assert census.geocode_location("9 Flaky Ct, Irvine, CA") is None
+    assert upstream.count("geocoder") == 2
+    upstream.down.clear()
+    upstream.add_address("9 Flaky Ct, Irvine, CA", 33.6, -117.8, "92620")
+    assert census.geocode_location("9 Flaky Ct, Irvine, CA")["zip_code"] == "92620"
+
+
+def test_fallback_hit_from_nominatim_is_cached(upstream):
+    upstream.down.add("geocoder")
+    upstream.addresses["7 osm way, irvine, ca"] = {
+        "lat": 33.7, "lng": -117.7, "zip": "92602-1234", "matched": "7 Osm Way, Irvine"
+    }
+    assert census.geocode_location("7 Osm Way, Irvine, CA")["zip_code"] == "92602"
+    assert census.geocode_location("7 Osm Way, Irvine, CA")["zip_code"] == "92602"
+    assert upstream.count("nominatim") == 1
+
+
+def test_async_requests_share_one_geocode_per_request(upstream):
+    upstream.add_address("3 Oak Ave, Irvine, CA", 33.6, -117.8, "92612")
+    upstream.delay = 0.05
+
+    async def one_request():
+        token = _memo.set({})
+        try:
+            return await asyncio.gather(*(census.geocode_location_async("3 Oak Ave, Irvine, CA") for _ in range(5)))
+        finally:
+            _memo.reset(token)
+
+    results = asyncio.run(one_request())
+    assert {r["zip_code"] for r in results} == {"92612"}
+    assert upstream.count("geocoder") == 1
@@ -0,0 +1,76 @@
+import pytest
+
+from app import job_queue
+from app.config import JOB_MAX_ATTEMPTS
+from app.job_queue import PermanentJobError, RetryLater
+
+
+@pytest.fixture(autouse=True)
+def queue_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "ALERTS_DB_PATH", tmp_path / "alerts.sqlite3")
+
+
+def _job(key: str) -> dict:
+    return dict(job_queue._conn().execute("SELECT * FROM jobs WHERE idempotency_key = ?", (key,)).fetchone())
+
+
+def _make_due(key: str) -> None:
+    job_queue._conn().execute("UPDATE jobs SET run_at = 0 WHERE idempotency_key = ?", (key,))
+
+
+def test_enqueue_is_idempotent():
+    assert job_queue.enqueue("sms", {"n": 1}, "dup")
+    assert not job_queue.enqueue("sms", {"n": 2}, "dup")
+    assert job_queue.stats() == {"queued": 1}
+
+
+def test_transient_failures_back_off_then_fail():
+    def flaky(_payload):
+        raise RuntimeError("upstream 503")
+
+    job_queue.enqueue("flaky", {}, "flaky-1")
+    run_ats = []
+    for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+        _make_due("flaky-1")
+        assert job_queue.run_one({"flaky": flaky})
+        job = _job("flaky-1")
+        assert job["attempts"] == attempt
+        assert job["last_error"] == "upstream 503"
+        run_ats.append(job["run_at"] - job["updated_at"])
+    assert job["status"] == "failed"
+    assert run_ats[1] > run_ats[0] > 0
+
+
+def test_retry_later_defers_without_consuming_attempt():
+    def limited(_payload):
+        raise RetryLater("rate limited", 30.0)
+
+    job_queue.enqueue("limited", {}, "limited-1")
+    for _ in range(JOB_MAX_ATTEMPTS + 2):
+        _make_due("limited-1")
+        assert job_queue.run_one({"limited": limited})
+    job = _job("limited-1")
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert job["run_at"] - job["updated_at"] == pytest.approx(30.0, abs=1.0)
+
+
+def test_permanent_error_and_unknown_kind_fail_immediately():
+    def rejected(_payload):
+        raise PermanentJobError("opt-in required")
+
+    job_queue.enqueue("rejected", {}, "rejected-1")
+    job_queue.enqueue("mystery", {}, "mystery-1")
+    assert job_queue.run_one({"rejected": rejected})
+    assert job_queue.run_one({"rejected": rejected})
+    assert _job("rejected-1")["status"] == "failed"
+    assert "No handler" in _job("mystery-1")["last_error"]
+
+
+def test_success_passes_idempotency_key_and_completes():
+    seen = []
+    job_queue.enqueue("ok", {"to": "a@example.com"}, "ok-1")
+    assert job_queue.run_one({"ok": seen.append})
+    assert seen == [{"to": "a@example.com", "idempotency_key": "ok-1"}]
+    assert _job("ok-1")["status"] == "done"
+    assert not job_queue.run_one({"ok": seen.append})
@@ -0,0 +1,38 @@
+import pytest
+
+from app import alert_service, ingest, job_queue, subscriber_store
+
+
+@pytest.fixture
+def alerts(tmp_path, monkeypatch, store):
+    monkeypatch.setattr(job_queue, "ALERTS_DB_PATH", tmp_path / "alerts.sqlite3")
+    monkeypatch.setattr(subscriber_store, "ALERTS_DB_PATH", tmp_path / "alerts.sqlite3")
+    monkeypatch.setattr(subscriber_store, "SUBSCRIBERS_PATH", tmp_path / "alert_subscribers.json")
+    monkeypatch.setattr(subscriber_store, "_migrated", False)
+
+
+def _listing_jobs() -> int:
+    return job_queue._conn().execute("SELECT COUNT(*) FROM jobs WHERE idempotency_key LIKE 'listing:%'").fetchone()[0]
+
+
+def _ingest(client, address: str) -> str:
+    return client.post("/listings/ingest", json={"address": address, "price": 900000}).json()["id"]
+
+
+def test_listing_alerts_go_out_once_and_never_on_rescore(alerts, upstream, store):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    alert_service.subscribe(email="early@example.com", zip_code="92618")
+    upstream.add_address("7 Alert Ln, Irvine, CA", 33.65, -117.8, "92618")
+    with TestClient(app) as client:
+        at_ingest = _ingest(client, "8 Alert Ln, Irvine, CA 92618")
+        after_geocode = _ingest(client, "7 Alert Ln, Irvine, CA")
+    ingest.process_pending_listings()
+    assert _listing_jobs() == 2
+    assert store.get_listing(at_ingest)["alerted_at"]
+    assert store.get_listing(after_geocode)["alerted_at"]
+
+    alert_service.subscribe(email="late@example.com", zip_code="92618")
+    assert ingest.rescore_listings(force=True) == 2
+    assert _listing_jobs() == 2
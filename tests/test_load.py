@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import census
+from app.main import app
+
+UPSTREAM_DELAY = 0.2
+LEVELS = (1, 10, 50)
+
+
+@pytest.fixture
+def slow_upstream(upstream, store):
+    census.ACS_CACHE.clear()
+    upstream.delay = UPSTREAM_DELAY
+    for n in range(sum(LEVELS) * 2):
+        zcta = f"{95000 + n}"
+        upstream.add_zcta(zcta, population=40_000 + n, median_value=650_000, owners=9_000, renters=7_000)
+        upstream.add_address(f"{n} Scaling Way", 38.5, -121.4, zcta)
+    return upstream
+
+
+async def _burst(client: httpx.AsyncClient, requests: list) -> tuple[float, list[httpx.Response]]:
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.request(method, url, **kwargs) for method, url, kwargs in requests))
+    return time.perf_counter() - started, responses
+
+
+async def _scaling(make_request) -> dict[int, float]:
+    timings = {}
+    offset = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=30) as client:
+        for level in LEVELS:
+            elapsed, responses = await _burst(client, [make_request(offset + i) for i in range(level)])
+            assert all(r.status_code == 200 for r in responses)
+            timings[level] = elapsed
+            offset += level
+    return timings
+
+
+def _report(name: str, timings: dict[int, float]) -> None:
+    print(f"\n{name}: upstream latency {UPSTREAM_DELAY}s")
+    for level, elapsed in timings.items():
+        print(f"  {level:>3} concurrent: {elapsed:.2f}s wall, {level / elapsed:.1f} req/s")
+
+
+def test_risk_score_scales_with_concurrency(slow_upstream):
+    timings = asyncio.run(_scaling(lambda n: ("POST", "/risk/score", {"json": {"address": f"{n} Scaling Way"}})))
+    _report("POST /risk/score", timings)
+    assert slow_upstream.count("geocoder") == sum(LEVELS)
+    assert slow_upstream.count("census") == sum(LEVELS)
+    serial = LEVELS[-1] * 2 * UPSTREAM_DELAY
+    assert timings[LEVELS[-1]] < serial / 5
+    assert timings[LEVELS[-1]] < timings[1] * 4
+
+
+def test_listings_scale_with_concurrency(slow_upstream):
+    timings = asyncio.run(_scaling(lambda n: ("GET", "/listings", {"params": {"zip_code": f"{95000 + n}"}})))
+    _report("GET /listings", timings)
+    assert slow_upstream.count("census") == sum(LEVELS)
+    serial = LEVELS[-1] * UPSTREAM_DELAY
+    assert timings[LEVELS[-1]] < serial / 5
+    assert timings[LEVELS[-1]] < timings[1] * 4
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from app import alert_service, census, resilience
+from app.config import BREAKER_FAILURE_THRESHOLD
+from app.job_queue import RetryLater
+from app.resilience import CircuitBreaker, ProviderUnavailable, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    assert bucket.reserve(0) == 0.0
+    assert bucket.reserve(0) == 0.0
+    assert bucket.reserve(0) is None
+    wait = bucket.reserve(5)
+    assert 0.9 < wait <= 1.0
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=50.0, burst=1)
+    assert bucket.reserve(0) == 0.0
+    assert bucket.reserve(0) is None
+    time.sleep(0.05)
+    assert bucket.reserve(0) == 0.0
+
+
+def test_breaker_opens_after_threshold_and_half_opens_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_trial_fails():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_in() > 0
+
+
+def test_breaker_fails_fast_on_dead_upstream(upstream):
+    upstream.down.add("geocoder")
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(Exception):
+            census._census_geocode("1 Dead End Rd, Irvine, CA")
+    calls = upstream.count("geocoder")
+    with pytest.raises(ProviderUnavailable):
+        census._census_geocode("1 Dead End Rd, Irvine, CA")
+    assert upstream.count("geocoder") == calls
+    assert resilience.stats()["geocoder"]["state"] == "open"
+    assert resilience.stats()["geocoder"]["rejected"] == 1
+
+
+def test_client_errors_do_not_trip_breaker():
+    provider = resilience.Provider("test", rate=100)
+    request = resilience.httpx.Request("GET", "https://example.test")
+    error = resilience.httpx.HTTPStatusError(
+        "bad request", request=request, response=resilience.httpx.Response(400, request=request)
+    )
+    for _ in range(BREAKER_FAILURE_THRESHOLD + 1):
+        provider.admit(0)
+        provider.record(error)
+    assert provider.breaker.state == "closed"
+
+
+def test_sms_limit_throttles_provider_and_defers_job(upstream, monkeypatch):
+    monkeypatch.setattr(alert_service, "ALERT_DELIVERY", "live")
+    upstream.sms_status = "LIMIT REACHED"
+    with pytest.raises(RetryLater):
+        alert_service.deliver_sms({"phone": "9495550100", "body": "hello"})
+    assert resilience.stats()["freetxt"]["state"] == "open"
+    with pytest.raises(RetryLater) as excinfo:
+        alert_service.deliver_sms({"phone": "9495550100", "body": "hello"})
+    assert excinfo.value.delay > 0
+    assert upstream.count("freetxt") == 1
+
+
+def _half_open(provider: resilience.Provider) -> None:
+    provider.breaker.reset_seconds = 0.0
+    provider.breaker.trip(0.0)
+
+
+def test_cancelled_half_open_trial_releases_the_breaker(upstream):
+    provider = resilience.PROVIDERS["census"]
+    _half_open(provider)
+
+    async def cancel_trial():
+        started = asyncio.Event()
+
+        async def call():
+            async with resilience.guard_async("census"):
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(call())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert provider.breaker.state == "half_open"
+    with resilience.guard("census"):
+        pass
+    assert provider.breaker.state == "closed"
+
+
+def test_closed_generator_releases_the_half_open_trial(upstream):
+    provider = resilience.PROVIDERS["openai"]
+    _half_open(provider)
+
+    def stream():
+        with resilience.guard("openai"):
+            yield "chunk"
+            yield "never"
+
+    events = stream()
+    assert next(events) == "chunk"
+    events.close()
+    assert provider.breaker.allow()
@@ -0,0 +1,80 @@
+import itertools
+
+from app import acs_snapshot, risk_vector
+from app.risk_engine import _profile_from_census
+
+UNITS = [
+    (0, 0),
+    (0, 100),
+    (100, 0),
+    (49, 51),
+    (50, 50),
+    (57, 43),
+    (58, 42),
+    (63, 37),
+    (64, 36),
+    (43, 5),
+    (45, 3),
+    (None, 100),
+    (100, None),
+    (None, None),
+]
+MEDIANS = [None, 0, 699_999, 700_000, 999_999, 1_000_000]
+POPULATIONS = [None, 0, 69_999, 70_000]
+
+
+def _boundary_rows() -> dict[str, dict]:
+    rows = {}
+    for n, ((owner, renter), median, population) in enumerate(itertools.product(UNITS, MEDIANS, POPULATIONS)):
+        rows[f"{10_000 + n:05d}"] = {
+            "owner_occupied_units": owner,
+            "renter_occupied_units": renter,
+            "median_home_value": median,
+            "population": population,
+        }
+    return rows
+
+
+def test_vector_scores_match_scalar_scorer_at_boundaries():
+    rows = _boundary_rows()
+    table = acs_snapshot.table_from_rows(rows)
+    result = risk_vector.verify(table)
+    assert result["zctas"] == len(rows)
+    assert result["mismatches"] == []
+
+    scored = risk_vector.score_snapshot(table)
+    for zcta, row in rows.items():
+        expected = _profile_from_census(row)
+        assert risk_vector.profile_at(scored, int(zcta)) == expected, zcta
+        assert int(scored["related_entities"][int(zcta)]) == expected["related_entities"], zcta
+        assert bool(scored["all_cash"][int(zcta)]) == expected["all_cash"], zcta
+
+
+def test_thresholds_fall_on_the_scalar_side():
+    table = acs_snapshot.table_from_rows({
+        "10001": {"owner_occupied_units": 58, "renter_occupied_units": 42, "median_home_value": 700_000, "population": 70_000},
+        "10002": {"owner_occupied_units": 64, "renter_occupied_units": 36, "median_home_value": 1_000_000, "population": 69_999},
+        "10003": {"owner_occupied_units": 0, "renter_occupied_units": 0, "median_home_value": 0, "population": 0},
+    })
+    scored = risk_vector.score_snapshot(table)
+    assert [int(scored["owner_signal"][i]) for i in (10001, 10002, 10003)] == [2, 3, 1]
+    assert [int(scored["value_signal"][i]) for i in (10001, 10002, 10003)] == [1, 0, 2]
+    assert [bool(scored["population_signal"][i]) for i in (10001, 10002, 10003)] == [True, False, False]
+    assert int(scored["properties_owned"][10003]) == 12
+    assert int(scored["present"].sum()) == 3
+
+
+def test_verify_reports_mismatched_slots(monkeypatch):
+    table = acs_snapshot.table_from_rows(_boundary_rows())
+    original = risk_vector._profile_from_census
+
+    def off_by_one(zcta):
+        profile = original(zcta)
+        if zcta["median_home_value"] == 700_000:
+            profile = {**profile, "score": profile["score"] - 1}
+        return profile
+
+    monkeypatch.setattr(risk_vector, "_profile_from_census", off_by_one)
+    mismatches = risk_vector.verify(table)["mismatches"]
+    assert mismatches
+    assert all(_boundary_rows()[zcta]["median_home_value"] == 700_000 for zcta in mismatches)
@@ -0,0 +1,30 @@
+import pytest
+
+from app import listing_store, spatial
+from app.routers import risk
+
+
+@pytest.fixture
+def empty_index(monkeypatch):
+    monkeypatch.setattr(spatial, "_index", None)
+    monkeypatch.setattr(spatial, "_dirty", True)
+
+
+def test_map_key_does_not_build_the_index(empty_index, monkeypatch):
+    def fail():
+        raise AssertionError("index built on the event loop")
+
+    monkeypatch.setattr(listing_store, "geocoded_points", fail)
+    key = risk._map_key("Irvine, CA", 12, None)
+    assert spatial.version() == 0 and key[5] == 0
+    assert spatial._index is None
+
+
+def test_version_follows_the_built_index(empty_index, monkeypatch):
+    points = [(f"p{i}", f"{i} Grid St", None, "2025-01-01", 33.6 + i / 1000, -117.8, i % 10) for i in range(50)]
+    monkeypatch.setattr(listing_store, "geocoded_points", lambda: points)
+    index = spatial.get_index()
+    assert len(index) == 50
+    assert spatial.version() == index.version != 0
+    view = index.query(-118.0, 33.5, -117.6, 33.8, zoom=10)
+    assert sum(c["count"] for c in view["clusters"]) + len(view["points"]) == 50
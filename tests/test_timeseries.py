@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from app import timeseries
+
+
+def _store(root):
+    return timeseries.Store(timeseries._read_columns(root))
+
+
+def test_append_truncates_a_torn_previous_append(tmp_path):
+    timeseries.append([{"zip": "92618", "month": "2025-04", "purchases": 10, "investor": 4}], root=tmp_path)
+    with open(tmp_path / "zcta.bin", "ab") as f:
+        f.write(np.asarray([92701], dtype="<u4").tobytes() + b"\x01\x02")
+    with open(tmp_path / "month.bin", "ab") as f:
+        f.write(b"\x07")
+
+    assert timeseries.append([{"zip": "92626", "month": "2025-05", "purchases": 3, "llc": 1}], root=tmp_path) == 1
+    sizes = {name: (tmp_path / f"{name}.bin").stat().st_size for name in timeseries.COLUMNS}
+    assert set(sizes.values()) == {8}
+
+    store = _store(tmp_path)
+    assert len(store) == 2
+    assert store.latest("92626") == timeseries.month_index("2025-05")
+    assert store.totals("92626", store.latest("92626"), store.latest("92626"))["llc"] == 1
+    assert store.latest("92701") is None
+    assert store.totals("92618", timeseries.month_index("2025-04"), timeseries.month_index("2025-04"))["investor"] == 4
+
+
+def test_append_refuses_to_truncate_to_a_missing_column(tmp_path):
+    timeseries.append([{"zip": "92618", "month": "2025-04", "purchases": 1}], root=tmp_path)
+    (tmp_path / "cash.bin").unlink()
+    with pytest.raises(RuntimeError, match="cash"):
+        timeseries.append([{"zip": "92660", "month": "2025-06", "purchases": 2}], root=tmp_path)
+    assert (tmp_path / "zcta.bin").stat().st_size == 4
+    assert (tmp_path / "purchases.bin").stat().st_size == 4